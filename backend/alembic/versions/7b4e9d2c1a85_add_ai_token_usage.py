@@ -0,0 +1,40 @@
+"""add_ai_token_usage
+
+Revision ID: 7b4e9d2c1a85
+Revises: 3c1f2a7d9e40
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e9d2c1a85'
+down_revision: Union[str, None] = '3c1f2a7d9e40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ai_token_usage',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('user_id', 'day', name='uq_ai_token_usage_user_day'),
+    )
+    op.create_index('ix_ai_token_usage_user_id', 'ai_token_usage', ['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ai_token_usage_user_id', table_name='ai_token_usage')
+    op.drop_table('ai_token_usage')
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+import time
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
 from sqlmodel import Session
 
-from app.services.ai_service import extract_medication_info
+from app.services.ai_service import (
+    extract_medication_info,
+    plan_extraction,
+    stream_medication_info,
+    MEDICATION_FIELDS,
+)
+from app.services.token_budget import TokenBudgetExceeded
+from app.services.ai_job_service import AIJobService
 from app.utils.database import get_session
-from app.models.medication import Medication, MedicationCreate
-from app.models.medication_log import MedicationLog, MedicationLogCreate
-from datetime import datetime, date
+from app.models.ai_job import AIJobRead
 
 router = APIRouter(prefix="/ai", tags=["ai"])
+ai_job_service = AIJobService()
 
 
 class MedicationNoteRequest(BaseModel):
@@ -26,6 +35,12 @@ class MedicationNoteResponse(BaseModel):
     saved: bool = False
 
 
+class AnalyzeJobAccepted(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+
+
 @router.post("/analyze-note", response_model=MedicationNoteResponse)
 async def analyze_medication_note(
     request: MedicationNoteRequest,
@@ -34,7 +49,7 @@ async def analyze_medication_note(
 ):
     try:
         # Extract information from the note using AI
-        extracted_info = await extract_medication_info(request.note)
+        extracted_info = await extract_medication_info(request.note, user_id=user_id)
         
         response = MedicationNoteResponse(
             medication_name=extracted_info.get("medication_name"),
@@ -46,94 +61,113 @@ async def analyze_medication_note(
         )
         
         return response
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing note: {str(e)}")
 
 
-@router.post("/analyze-and-save", response_model=MedicationNoteResponse)
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/analyze-note/stream")
+async def stream_medication_note(
+    request: MedicationNoteRequest,
+    user_id: int = 1,  # Temporary, will be replaced with real authentication
+):
+    """
+    Server-sent events variant of /analyze-note.
+
+    Emits one `field` event per extracted field as soon as the model has
+    written it, then a `done` event with the full result plus
+    `time_to_first_field_ms` and `total_ms`.
+    """
+    if not request.note and not request.image:
+        raise HTTPException(
+            status_code=400,
+            detail="Either note or image must be provided"
+        )
+
+    try:
+        plan = await plan_extraction(note=request.note, image_data=request.image, user_id=user_id)
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+
+    async def event_stream():
+        started = time.perf_counter()
+        first_field_ms = None
+        result = {field: None for field in MEDICATION_FIELDS}
+        try:
+            async for field, value in stream_medication_info(plan):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if first_field_ms is None:
+                    first_field_ms = elapsed_ms
+                result[field] = value
+                yield _sse_event("field", {"field": field, "value": value, "elapsed_ms": round(elapsed_ms, 1)})
+            # Validated here so a bad field value still ends in an `error` event
+            response = MedicationNoteResponse(**result, saved=False)
+        except Exception as e:
+            print(f"Error streaming medication info: {e}")
+            yield _sse_event("error", {"detail": f"Error analyzing note: {str(e)}"})
+            return
+
+        total_ms = (time.perf_counter() - started) * 1000
+        yield _sse_event("done", {
+            **response.model_dump(),
+            "time_to_first_field_ms": round(first_field_ms, 1) if first_field_ms is not None else None,
+            "total_ms": round(total_ms, 1),
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/analyze-and-save", response_model=AnalyzeJobAccepted, status_code=status.HTTP_202_ACCEPTED)
 async def analyze_and_save_medication(
     request: MedicationNoteRequest,
+    http_request: Request,
+    response: Response,
     user_id: int = 1,  # Temporary, will be replaced with real authentication
     session: Session = Depends(get_session),
 ):
-    print('analyze_and_save_medication', request.note, request.image)
-    try:
-        # Check if we have either note or image
-        if not request.note and not request.image:
-            raise HTTPException(
-                status_code=400,
-                detail="Either note or image must be provided"
-            )
-        
-        # Extract information using AI
-        if request.note:
-            print('Processing text note')
-            extracted_info = await extract_medication_info(note=request.note)
-            notes_content = request.note
-        else:
-            print('Processing image data')
-            extracted_info = await extract_medication_info(image_data=request.image)
-            notes_content = "Image uploaded and analyzed by AI"
-        
-        print('extracted_info', extracted_info)
-        
-        # Check if we have a medication name
-        if not extracted_info.get("medication_name"):
-            raise HTTPException(
-                status_code=400, 
-                detail="Could not extract medication information from the input"
-            )
-        
-        # Create or update the medication
-        medication_create = MedicationCreate(
-            name=extracted_info.get("medication_name"),
-            dosage=extracted_info.get("dosage"),
-            frequency=extracted_info.get("frequency"),
-            notes=notes_content
-        )
-        
-        # Save the medication
-        db_medication = Medication.from_orm(medication_create, update={"user_id": user_id})
-        session.add(db_medication)
-        session.commit()
-        session.refresh(db_medication)
-        
-        # Handle taken_at field - convert text like "today" to proper datetime
-        taken_at = extracted_info.get("taken_at")
-        if taken_at:
-            if taken_at.lower() == "today":
-                taken_at = datetime.now().date().isoformat()
-            elif taken_at.lower() == "yesterday":
-                taken_at = (datetime.now().date().replace(day=datetime.now().day-1)).isoformat()
-        else:
-            taken_at = datetime.now().date().isoformat()
-            
-        # Create a medication log entry
-        medication_log_create = MedicationLogCreate(
-            medication_ids=[db_medication.id],
-            notes=notes_content,
-            feeling_after=extracted_info.get("feeling_after"),
-            taken_at=taken_at,  # Use the processed taken_at value instead of the raw value
-        )
-        
-        # Save the medication log
-        db_medication_log = MedicationLog.from_orm(medication_log_create, update={"user_id": user_id})
-        session.add(db_medication_log)
-        session.commit()
-        
-        response = MedicationNoteResponse(
-            medication_name=extracted_info.get("medication_name"),
-            dosage=extracted_info.get("dosage"),
-            frequency=extracted_info.get("frequency"),
-            taken_at=taken_at,  # Also use the processed taken_at here
-            feeling_after=extracted_info.get("feeling_after"),
-            saved=True
+    # Check if we have either note or image
+    if not request.note and not request.image:
+        raise HTTPException(
+            status_code=400,
+            detail="Either note or image must be provided"
         )
-        
-        return response
-    except HTTPException as e:
-        print('HTTPException', e)
-        raise e
-    except Exception as e:
-        print('Exception', e)
-        raise HTTPException(status_code=500, detail=f"Error saving medication: {str(e)}")
\ No newline at end of file
+
+    # Reject requests over the token limits before they are queued
+    try:
+        await plan_extraction(note=request.note, image_data=request.image, user_id=user_id)
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+
+    # The model call and the DB writes run in an AI job worker, the client
+    # polls the job until it succeeds or fails.
+    job = ai_job_service.enqueue(session, user_id, note=request.note, image=request.image)
+    status_url = str(http_request.url_for("get_ai_job", job_id=job.id))
+    response.headers["Location"] = status_url
+    return AnalyzeJobAccepted(job_id=job.id, status=job.status, status_url=status_url)
+
+
+@router.get("/jobs/metrics")
+async def get_ai_job_metrics(session: Session = Depends(get_session)):
+    return ai_job_service.get_metrics(session)
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobRead)
+async def get_ai_job(
+    job_id: int,
+    user_id: int = 1,  # Temporary, will be replaced with real authentication
+    session: Session = Depends(get_session),
+):
+    job = ai_job_service.get_job(session, job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,5 +1,7 @@
 from .medication import Medication, MedicationCreate, MedicationRead, MedicationUpdate
 from .medication_log import MedicationLog, MedicationLogCreate, MedicationLogRead, MedicationLogUpdate
+from .ai_job import AIJob, AIJobRead, AIJobStatus
+from .ai_token_usage import AITokenUsage
 
 __all__ = [
     "Medication",
@@ -9,7 +11,11 @@ __all__ = [
     "MedicationLog",
     "MedicationLogCreate",
     "MedicationLogRead",
-    "MedicationLogUpdate"
+    "MedicationLogUpdate",
+    "AIJob",
+    "AIJobRead",
+    "AIJobStatus",
+    "AITokenUsage"
 ]
 
 # First rebuild base models to ensure they're fully defined
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from sqlalchemy import Column, JSON, Index, Text
+from sqlmodel import SQLModel, Field
+
+
+class AIJobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class AIJob(SQLModel, table=True):
+    __tablename__ = "ai_job"
+    __table_args__ = (
+        # Workers poll for the oldest runnable job, keep that lookup on an index
+        Index("ix_ai_job_status_available_at", "status", "available_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    kind: str = Field(default="analyze_and_save")
+    status: str = Field(default=AIJobStatus.PENDING)
+    note: Optional[str] = Field(default=None, sa_column=Column(Text))
+    image: Optional[str] = Field(default=None, sa_column=Column(Text))
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    last_error: Optional[str] = None
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    worker: Optional[str] = None
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class AIJobRead(SQLModel):
+    id: int
+    status: str
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,17 @@
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+
+class AITokenUsage(SQLModel, table=True):
+    __tablename__ = "ai_token_usage"
+    __table_args__ = (UniqueConstraint("user_id", "day", name="uq_ai_token_usage_user_day"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    day: date
+    prompt_tokens: int = Field(default=0)
+    completion_tokens: int = Field(default=0)
+    requests: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,242 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import and_, or_, text, update
+from sqlmodel import Session, select
+
+from ..models.ai_job import AIJob, AIJobStatus
+from ..models.medication import Medication, MedicationCreate
+from ..models.medication_log import MedicationLog, MedicationLogCreate
+from .ai_service import extract_medication_info
+from .token_budget import TokenBudgetExceeded
+
+AI_JOB_MAX_ATTEMPTS = int(os.getenv("AI_JOB_MAX_ATTEMPTS", "3"))
+AI_JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("AI_JOB_RETRY_BACKOFF_SECONDS", "5"))
+# A running job whose worker has not finished it within this window is
+# considered abandoned (worker crashed) and becomes claimable again.
+AI_JOB_LEASE_SECONDS = int(os.getenv("AI_JOB_LEASE_SECONDS", "300"))
+AI_JOB_METRICS_WINDOW_MINUTES = int(os.getenv("AI_JOB_METRICS_WINDOW_MINUTES", "60"))
+
+
+class NonRetryableJobError(Exception):
+    """Raised when retrying a job cannot change its outcome."""
+
+
+def normalize_taken_at(taken_at: Optional[str]) -> str:
+    """Convert relative values like "today" into an ISO date."""
+    today = datetime.now().date()
+    if not taken_at:
+        return today.isoformat()
+    if taken_at.lower() == "today":
+        return today.isoformat()
+    if taken_at.lower() == "yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    return taken_at
+
+
+def save_extracted_medication(
+    session: Session,
+    extracted_info: Dict[str, Any],
+    notes_content: str,
+    user_id: int,
+) -> Dict[str, Any]:
+    """
+    Add a medication and its log entry from extracted AI fields to the session.
+
+    Nothing is committed: the caller commits the rows together with its own
+    changes, so a failure before that commit leaves no partial save behind.
+    """
+    medication_create = MedicationCreate(
+        name=extracted_info.get("medication_name"),
+        dosage=extracted_info.get("dosage"),
+        frequency=extracted_info.get("frequency"),
+        notes=notes_content
+    )
+    db_medication = Medication.from_orm(medication_create, update={"user_id": user_id})
+    session.add(db_medication)
+    # Assigns db_medication.id for the log entry, inside the open transaction
+    session.flush()
+
+    taken_at = normalize_taken_at(extracted_info.get("taken_at"))
+    medication_log_create = MedicationLogCreate(
+        medication_ids=[db_medication.id],
+        notes=notes_content,
+        feeling_after=extracted_info.get("feeling_after"),
+        taken_at=taken_at,
+    )
+    db_medication_log = MedicationLog.from_orm(medication_log_create, update={"user_id": user_id})
+    session.add(db_medication_log)
+
+    return {
+        "medication_name": extracted_info.get("medication_name"),
+        "dosage": extracted_info.get("dosage"),
+        "frequency": extracted_info.get("frequency"),
+        "taken_at": taken_at,
+        "feeling_after": extracted_info.get("feeling_after"),
+        "saved": True,
+    }
+
+
+class AIJobService:
+    def enqueue(self, session: Session, user_id: int, note: Optional[str] = None,
+                image: Optional[str] = None) -> AIJob:
+        job = AIJob(
+            user_id=user_id,
+            note=note,
+            image=image,
+            max_attempts=AI_JOB_MAX_ATTEMPTS,
+        )
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job
+
+    def get_job(self, session: Session, job_id: int, user_id: int) -> Optional[AIJob]:
+        statement = select(AIJob).where(AIJob.id == job_id, AIJob.user_id == user_id)
+        return session.exec(statement).first()
+
+    def claim_next_job(self, session: Session, worker: str) -> Optional[AIJob]:
+        """
+        Lease the oldest runnable job for `worker`.
+
+        `FOR UPDATE SKIP LOCKED` lets any number of workers poll the same
+        table: rows locked by another worker's claim are skipped instead of
+        waited on, so two workers never receive the same job.
+
+        An expired lease is only taken over while the job has attempts left,
+        abandoned jobs that used them all are marked failed instead so a job
+        that keeps crashing its worker is not re-leased forever.
+        """
+        now = datetime.utcnow()
+        lease_cutoff = now - timedelta(seconds=AI_JOB_LEASE_SECONDS)
+        self._fail_exhausted_leases(session, now, lease_cutoff)
+        statement = (
+            select(AIJob)
+            .where(or_(
+                and_(AIJob.status == AIJobStatus.PENDING, AIJob.available_at <= now),
+                and_(
+                    AIJob.status == AIJobStatus.RUNNING,
+                    AIJob.started_at < lease_cutoff,
+                    AIJob.attempts < AIJob.max_attempts,
+                ),
+            ))
+            .order_by(AIJob.available_at, AIJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = session.exec(statement).first()
+        if job is None:
+            session.rollback()
+            return None
+
+        job.status = AIJobStatus.RUNNING
+        job.worker = worker
+        job.attempts += 1
+        job.started_at = now
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job
+
+    def _fail_exhausted_leases(self, session: Session, now: datetime, lease_cutoff: datetime):
+        session.exec(
+            update(AIJob)
+            .where(
+                AIJob.status == AIJobStatus.RUNNING,
+                AIJob.started_at < lease_cutoff,
+                AIJob.attempts >= AIJob.max_attempts,
+            )
+            .values(
+                status=AIJobStatus.FAILED,
+                finished_at=now,
+                last_error="Worker lease expired on the last attempt",
+            )
+        )
+        session.commit()
+
+    async def run_job(self, session: Session, job: AIJob) -> AIJob:
+        """Run the analysis for a claimed job and record its outcome."""
+        try:
+            if job.note:
+                extracted_info = await extract_medication_info(
+                    note=job.note, user_id=job.user_id, raise_errors=True
+                )
+                notes_content = job.note
+            elif job.image:
+                extracted_info = await extract_medication_info(
+                    image_data=job.image, user_id=job.user_id, raise_errors=True
+                )
+                notes_content = "Image uploaded and analyzed by AI"
+            else:
+                raise NonRetryableJobError("Either note or image must be provided")
+
+            # The model answered but found nothing, asking again will not help
+            if not extracted_info.get("medication_name"):
+                raise NonRetryableJobError("Could not extract medication information from the input")
+
+            # The medication rows and the job's success are committed together,
+            # so a retried job never finds an earlier attempt's rows
+            job.result = save_extracted_medication(session, extracted_info, notes_content, job.user_id)
+            job.status = AIJobStatus.SUCCEEDED
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            session.add(job)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            job.last_error = str(e)
+            if isinstance(e, (NonRetryableJobError, TokenBudgetExceeded)) or job.attempts >= job.max_attempts:
+                job.status = AIJobStatus.FAILED
+                job.finished_at = datetime.utcnow()
+            else:
+                # Exponential backoff before the job becomes claimable again
+                delay = AI_JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+                job.status = AIJobStatus.PENDING
+                job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+            session.add(job)
+            session.commit()
+
+        session.refresh(job)
+        return job
+
+    def get_metrics(self, session: Session) -> Dict[str, Any]:
+        """Queue depth per status and end-to-end latency of recently finished jobs."""
+        depth = {status: 0 for status in (
+            AIJobStatus.PENDING, AIJobStatus.RUNNING, AIJobStatus.SUCCEEDED, AIJobStatus.FAILED
+        )}
+        rows = session.exec(text("SELECT status, COUNT(*) FROM ai_job GROUP BY status")).all()
+        for status, count in rows:
+            depth[status] = count
+
+        latency = session.exec(text("""
+            SELECT COUNT(*),
+                   AVG(EXTRACT(EPOCH FROM finished_at - created_at)),
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM finished_at - created_at)),
+                   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM finished_at - created_at)),
+                   AVG(EXTRACT(EPOCH FROM started_at - created_at))
+            FROM ai_job
+            WHERE status = :status AND finished_at >= :since
+        """).bindparams(
+            status=AIJobStatus.SUCCEEDED,
+            since=datetime.utcnow() - timedelta(minutes=AI_JOB_METRICS_WINDOW_MINUTES),
+        )).first()
+        oldest_pending = session.exec(text(
+            "SELECT MIN(created_at) FROM ai_job WHERE status = :status"
+        ).bindparams(status=AIJobStatus.PENDING)).first()[0]
+
+        completed, avg_s, p50_s, p95_s, avg_wait_s = latency
+        return {
+            "queue_depth": depth[AIJobStatus.PENDING],
+            "jobs_by_status": depth,
+            "oldest_pending_age_seconds": (
+                (datetime.utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0
+            ),
+            "window_minutes": AI_JOB_METRICS_WINDOW_MINUTES,
+            "completed_in_window": completed,
+            "latency_seconds": {
+                "avg": float(avg_s or 0.0),
+                "p50": float(p50_s or 0.0),
+                "p95": float(p95_s or 0.0),
+                "avg_queue_wait": float(avg_wait_s or 0.0),
+            },
+        }
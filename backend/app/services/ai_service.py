@@ -1,15 +1,22 @@
-import os
-import base64
-from typing import Dict, Any, Optional
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
 
-load_dotenv()
+from app.services.json_stream import IncrementalJSONObjectParser
+from app.services.llm_clients import MAX_COMPLETION_TOKENS, TEXT_MODEL, VISION_MODEL
+from app.services.llm_providers import get_provider
+from app.services.token_budget import (
+    AI_MIN_NOTE_TOKENS,
+    TokenBudgetExceeded,
+    count_message_tokens,
+    count_tokens,
+    fit_note,
+    token_usage,
+    trim_to_tokens,
+)
 
-# Initialize OpenAI client
-openai_api_key = os.getenv("OPENAI_API_KEY")
-model = ChatOpenAI(api_key=openai_api_key, model="gpt-4o-mini")
+load_dotenv()
 
 # Define the prompt template for text notes
 EXTRACT_MEDICATION_PROMPT = """
@@ -61,73 +68,154 @@ Respond with a JSON object in the following format:
 If any information is not visible in the image, use null for that field.
 """
 
-extract_medication_prompt = ChatPromptTemplate.from_template(EXTRACT_MEDICATION_PROMPT)
-extract_medication_from_image_prompt = ChatPromptTemplate.from_template(EXTRACT_MEDICATION_FROM_IMAGE_PROMPT)
 
+MEDICATION_FIELDS = ("medication_name", "dosage", "frequency", "taken_at", "feeling_after")
+
+
+def _build_extraction_messages(note: Optional[str] = None, image_data: Optional[str] = None):
+    """Return the model name and chat messages for a text note or an image."""
+    if note:
+        # Process text note
+        prompt = EXTRACT_MEDICATION_PROMPT.format(note=note)
+        return TEXT_MODEL, [{"role": "user", "content": prompt}]
+
+    if image_data:
+        # Strip off the prefix if it exists (e.g., "data:image/jpeg;base64,")
+        if "base64," in image_data:
+            image_data = image_data.split("base64,")[1]
+
+        # Create a message with image content
+        content = [
+            {"type": "text", "text": EXTRACT_MEDICATION_FROM_IMAGE_PROMPT.format()},
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image_data}"
+                }
+            }
+        ]
+        return VISION_MODEL, [{"role": "user", "content": content}]
+
+    raise ValueError("Either note or image_data must be provided")
+
+
+@dataclass
+class ExtractionPlan:
+    model_name: str
+    messages: List[Dict[str, Any]]
+    prompt_tokens: int
+    user_id: Optional[int] = None
+    trimmed: bool = False
+
+
+async def plan_extraction(
+    note: Optional[str] = None, image_data: Optional[str] = None, user_id: Optional[int] = None
+) -> ExtractionPlan:
+    """
+    Build the model request and apply the token limits before any model call.
+
+    Over-long notes are trimmed (or rejected, see AI_OVERSIZE_POLICY). When a
+    user's remaining daily allowance cannot fit the request, the note is
+    trimmed to what is left; if even that is too small, TokenBudgetExceeded
+    is raised.
+    """
+    trimmed = False
+    if note:
+        original = note
+        note, _ = fit_note(note, TEXT_MODEL)
+        trimmed = note != original
+
+    model_name, messages = _build_extraction_messages(note, image_data)
+    prompt_tokens = count_message_tokens(messages, model_name)
+
+    remaining = await token_usage.remaining_async(user_id) if user_id is not None else None
+    if remaining is not None and prompt_tokens + MAX_COMPLETION_TOKENS > remaining:
+        note_allowance = 0
+        if note:
+            overhead = prompt_tokens - count_tokens(note, model_name)
+            note_allowance = remaining - MAX_COMPLETION_TOKENS - overhead
+        if note_allowance < AI_MIN_NOTE_TOKENS:
+            raise TokenBudgetExceeded(
+                f"Daily AI token limit reached ({token_usage.daily_limit} tokens), try again tomorrow"
+            )
+        note = trim_to_tokens(note, note_allowance, model_name)
+        trimmed = True
+        model_name, messages = _build_extraction_messages(note, image_data)
+        prompt_tokens = count_message_tokens(messages, model_name)
+
+    return ExtractionPlan(model_name, messages, prompt_tokens, user_id, trimmed)
+
+
+async def _record_usage(plan: ExtractionPlan, completion: str):
+    if plan.user_id is None:
+        return
+    try:
+        await token_usage.record_async(plan.user_id, plan.prompt_tokens, count_tokens(completion, plan.model_name))
+    except Exception as e:
+        print(f"Error recording token usage: {e}")
 
-async def extract_medication_info(note: Optional[str] = None, image_data: Optional[str] = None) -> Dict[str, Any]:
+
+async def extract_medication_info(
+    note: Optional[str] = None,
+    image_data: Optional[str] = None,
+    user_id: Optional[int] = None,
+    raise_errors: bool = False,
+) -> Dict[str, Any]:
     """
     Extract medication information from a user note or image using LLM.
     
     Args:
         note: A free-text note containing medication information
         image_data: A base64-encoded image of medication packaging or prescription
+        user_id: User charged for the tokens, None skips the daily limit
+        raise_errors: Re-raise model and parsing errors instead of returning
+            empty fields, so the job queue can retry them
         
     Returns:
         A dictionary with extracted medication information
+
+    Raises:
+        TokenBudgetExceeded: the request does not fit the token limits
     """
+    plan = await plan_extraction(note, image_data, user_id)
     try:
-        if note:
-            # Process text note
-            chain = extract_medication_prompt | model
-            response = chain.invoke({"note": note})
-        elif image_data:
-            # Process image
-            # Strip off the prefix if it exists (e.g., "data:image/jpeg;base64,")
-            if "base64," in image_data:
-                image_data = image_data.split("base64,")[1]
-                
-            # Process with vision model
-            from langchain_openai import ChatOpenAI
-            vision_model = ChatOpenAI(api_key=openai_api_key, model="gpt-4o")
-            
-            # Create a message with image content
-            from langchain_core.messages import HumanMessage
-            message = HumanMessage(
-                content=[
-                    {"type": "text", "text": extract_medication_from_image_prompt.template},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}"
-                        }
-                    }
-                ]
-            )
-            
-            # Get response
-            response = vision_model.invoke([message])
-        else:
-            raise ValueError("Either note or image_data must be provided")
+        content = await get_provider().complete(plan.messages, plan.model_name)
+        await _record_usage(plan, content)
         
         # Extract the JSON part from the response
-        content = response.content
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0].strip()
         elif "```" in content:
             content = content.split("```")[1].split("```")[0].strip()
             
         # Parse the content as JSON
-        import json
         result = json.loads(content)
         return result
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error extracting medication info: {e}")
         # Return empty values as fallback
-        return {
-            "medication_name": None,
-            "dosage": None,
-            "frequency": None,
-            "taken_at": None,
-            "feeling_after": None
-        } 
\ No newline at end of file
+        return {field: None for field in MEDICATION_FIELDS}
+
+
+async def stream_medication_info(plan: ExtractionPlan) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream extracted medication fields as the model writes them.
+
+    Yields `(field, value)` pairs for the known medication fields, in the
+    order the model completes them. Errors are raised to the caller, which
+    decides how to report them mid-stream.
+    """
+    parser = IncrementalJSONObjectParser()
+    completion = []
+
+    async for chunk in get_provider().stream(plan.messages, plan.model_name):
+        completion.append(chunk)
+        for field, value in parser.feed(chunk):
+            if field in MEDICATION_FIELDS:
+                yield field, value
+        if parser.done:
+            break
+
+    await _record_usage(plan, "".join(completion))
@@ -0,0 +1,91 @@
+import json
+from typing import Any, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+_INCOMPLETE = object()
+
+
+class IncrementalJSONObjectParser:
+    """
+    Parse a top-level JSON object that arrives in chunks.
+
+    `feed` returns every `(key, value)` pair that became complete with the new
+    chunk, so callers can act on a field as soon as the model has written it
+    instead of waiting for the closing brace. Text before the first `{` (for
+    example a ```json fence) is ignored, and so is everything after the object.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._buffer += chunk
+        fields = []
+
+        while self._state != "done":
+            if self._state == "start":
+                brace = self._buffer.find("{", self._pos)
+                if brace == -1:
+                    self._pos = len(self._buffer)
+                    break
+                self._pos = brace + 1
+                self._state = "key"
+                continue
+
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+
+            if self._state == "key":
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    break
+                if char == ",":
+                    self._pos += 1
+                    continue
+                decoded = self._decode()
+                if decoded is _INCOMPLETE:
+                    break
+                self._key = decoded
+                self._state = "colon"
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':' at position {self._pos}")
+                self._pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                decoded = self._decode()
+                if decoded is _INCOMPLETE:
+                    break
+                fields.append((self._key, decoded))
+                self._key = None
+                self._state = "key"
+
+        return fields
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _decode(self):
+        """Decode one complete JSON value at the cursor, or return _INCOMPLETE if more input is needed."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return _INCOMPLETE
+        # Numbers and literals have no closing delimiter: "12" may still
+        # become "125", so only accept them once something follows.
+        if self._buffer[self._pos] not in '"{[' and end >= len(self._buffer):
+            return _INCOMPLETE
+        self._pos = end
+        return value
@@ -0,0 +1,114 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# Shared HTTP settings for every model client. One pool per process means the
+# TLS connection to the API is kept alive between requests instead of being
+# re-established for each new client.
+HTTP_TIMEOUT_SECONDS = float(os.getenv("OPENAI_HTTP_TIMEOUT", "60"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_HTTP_KEEPALIVE_CONNECTIONS", "10"))
+
+TEXT_MODEL = os.getenv("OPENAI_TEXT_MODEL", "gpt-4o-mini")
+VISION_MODEL = os.getenv("OPENAI_VISION_MODEL", "gpt-4o")
+# The extraction answer is a small JSON object, cap what a call can bill
+MAX_COMPLETION_TOKENS = int(os.getenv("OPENAI_MAX_COMPLETION_TOKENS", "400"))
+
+_lock = threading.Lock()
+_clients: Dict[str, Any] = {}
+_http_client = None
+_http_async_client = None
+
+
+def _http_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+    )
+
+
+def _get_http_clients():
+    """Return the process-wide sync and async HTTP clients, creating them on first use."""
+    global _http_client, _http_async_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.Client(limits=_http_limits(), timeout=HTTP_TIMEOUT_SECONDS)
+        _http_async_client = httpx.AsyncClient(limits=_http_limits(), timeout=HTTP_TIMEOUT_SECONDS)
+    return _http_client, _http_async_client
+
+
+def get_chat_model(model_name: Optional[str] = None):
+    """
+    Return the shared chat model client for `model_name`.
+
+    langchain and the OpenAI SDK are only imported the first time a client is
+    requested, so processes that never serve AI traffic do not pay for them.
+
+    Args:
+        model_name: OpenAI model name, defaults to the text model
+
+    Returns:
+        A ChatOpenAI instance reused by every caller in this process
+    """
+    model_name = model_name or TEXT_MODEL
+    client = _clients.get(model_name)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(model_name)
+        if client is None:
+            from langchain_openai import ChatOpenAI
+
+            http_client, http_async_client = _get_http_clients()
+            client = ChatOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                model=model_name,
+                max_tokens=MAX_COMPLETION_TOKENS,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            _clients[model_name] = client
+    return client
+
+
+def get_text_model():
+    return get_chat_model(TEXT_MODEL)
+
+
+def get_vision_model():
+    return get_chat_model(VISION_MODEL)
+
+
+def _detach_clients():
+    global _http_client, _http_async_client
+    with _lock:
+        _clients.clear()
+        http_client, http_async_client = _http_client, _http_async_client
+        _http_client = None
+        _http_async_client = None
+    return http_client, http_async_client
+
+
+def reset_clients():
+    """
+    Drop cached clients and close the sync connection pool.
+
+    The async pool can only be closed from an event loop, async callers
+    should use aclose_clients() instead so it is not leaked.
+    """
+    http_client, _ = _detach_clients()
+    if http_client is not None:
+        http_client.close()
+
+
+async def aclose_clients():
+    """Drop cached clients and close both connection pools."""
+    http_client, http_async_client = _detach_clients()
+    if http_client is not None:
+        http_client.close()
+    if http_async_client is not None:
+        await http_async_client.aclose()
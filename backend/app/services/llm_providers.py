@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.llm_clients import get_chat_model
+
+# Messages use the OpenAI chat format: [{"role": "user", "content": str | list}]
+Messages = List[Dict[str, Any]]
+
+
+@dataclass
+class ProviderStats:
+    calls: int = 0
+    model_seconds: float = 0.0
+
+    def reset(self):
+        self.calls = 0
+        self.model_seconds = 0.0
+
+
+class LLMProvider:
+    """
+    Base class for chat model backends.
+
+    Subclasses implement `_complete` and `_stream`. The public methods add
+    timing so `stats.model_seconds` holds exactly the time spent waiting on
+    the backend, which lets callers compute their own overhead.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = ProviderStats()
+
+    async def complete(self, messages: Messages, model: str) -> str:
+        started = time.perf_counter()
+        try:
+            return await self._complete(messages, model)
+        finally:
+            self.stats.calls += 1
+            self.stats.model_seconds += time.perf_counter() - started
+
+    async def stream(self, messages: Messages, model: str) -> AsyncIterator[str]:
+        self.stats.calls += 1
+        iterator = self._stream(messages, model).__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.stats.model_seconds += time.perf_counter() - started
+            yield chunk
+
+    async def _complete(self, messages: Messages, model: str) -> str:
+        raise NotImplementedError
+
+    async def _stream(self, messages: Messages, model: str) -> AsyncIterator[str]:
+        # Backends without native streaming return the whole answer as one chunk
+        yield await self._complete(messages, model)
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat models through the shared clients in llm_clients."""
+
+    name = "openai"
+
+    async def _complete(self, messages: Messages, model: str) -> str:
+        response = await get_chat_model(model).ainvoke(messages)
+        return response.content
+
+    async def _stream(self, messages: Messages, model: str) -> AsyncIterator[str]:
+        async for chunk in get_chat_model(model).astream(messages):
+            if chunk.content:
+                yield chunk.content
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic offline backend.
+
+    Answers with a JSON object derived from the note text, after a fixed
+    latency, so the AI path can be load-tested without network access.
+    Streaming spreads the same latency across `chunk_size`-character chunks,
+    with `first_token_ms` spent before the first one.
+    """
+
+    name = "fake"
+
+    _DOSAGE_RE = re.compile(r"\d+(?:[.,]\d+)?\s?(?:mg|mcg|ml|g|viên|IU)\b", re.IGNORECASE)
+    _NAME_RE = re.compile(r"\b([A-Z][a-zA-Z]{3,})\b")
+
+    def __init__(self, latency_ms: float = 800, first_token_ms: float = 200, chunk_size: int = 8):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.first_token_ms = min(first_token_ms, latency_ms)
+        self.chunk_size = chunk_size
+
+    def render(self, messages: Messages) -> str:
+        text = _message_text(messages)
+        # Only look at the user's note, not the instructions around it
+        if "User note:" in text:
+            text = text.split("User note:", 1)[1].split("Respond with", 1)[0]
+        name = self._NAME_RE.search(text)
+        dosage = self._DOSAGE_RE.search(text)
+        answer = {
+            "medication_name": name.group(1) if name else None,
+            "dosage": dosage.group(0) if dosage else None,
+            "frequency": None,
+            "taken_at": "today",
+            "feeling_after": None,
+        }
+        return "```json\n" + json.dumps(answer, ensure_ascii=False, indent=2) + "\n```"
+
+    async def _complete(self, messages: Messages, model: str) -> str:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self.render(messages)
+
+    async def _stream(self, messages: Messages, model: str) -> AsyncIterator[str]:
+        content = self.render(messages)
+        chunks = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        per_chunk = (self.latency_ms - self.first_token_ms) / max(len(chunks) - 1, 1)
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(per_chunk / 1000)
+            yield chunk
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording matches the request."""
+
+
+class CassetteProvider(LLMProvider):
+    """
+    Record/replay backend.
+
+    In "record" mode every call goes to `inner` and the answer (and its
+    chunks and latency) is stored in a JSON cassette keyed by a hash of the
+    model and messages. In "replay" mode answers come from the cassette
+    only, optionally with the recorded latency.
+    """
+
+    name = "cassette"
+
+    def __init__(self, path: str, mode: str = "replay", inner: Optional[LLMProvider] = None,
+                 replay_latency: bool = False):
+        super().__init__()
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Record mode needs an inner provider")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def key(messages: Messages, model: str) -> str:
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, key: str, model: str, chunks: List[str], latency_ms: float):
+        with self._lock:
+            self._entries[key] = {
+                "model": model,
+                "response": "".join(chunks),
+                "chunks": chunks,
+                "latency_ms": round(latency_ms, 1),
+            }
+            self._save()
+
+    def _lookup(self, messages: Messages, model: str) -> Dict[str, Any]:
+        key = self.key(messages, model)
+        entry = self._entries.get(key)
+        if entry is None:
+            raise CassetteMissError(f"No cassette entry for {model} request {key[:12]} in {self.path}")
+        return entry
+
+    async def _complete(self, messages: Messages, model: str) -> str:
+        if self.mode == "record":
+            started = time.perf_counter()
+            content = await self.inner.complete(messages, model)
+            self._record(self.key(messages, model), model, [content], (time.perf_counter() - started) * 1000)
+            return content
+
+        entry = self._lookup(messages, model)
+        if self.replay_latency:
+            await asyncio.sleep(entry["latency_ms"] / 1000)
+        return entry["response"]
+
+    async def _stream(self, messages: Messages, model: str) -> AsyncIterator[str]:
+        if self.mode == "record":
+            started = time.perf_counter()
+            chunks = []
+            async for chunk in self.inner.stream(messages, model):
+                chunks.append(chunk)
+                yield chunk
+            self._record(self.key(messages, model), model, chunks, (time.perf_counter() - started) * 1000)
+            return
+
+        entry = self._lookup(messages, model)
+        chunks = entry.get("chunks") or [entry["response"]]
+        per_chunk = entry["latency_ms"] / len(chunks) if self.replay_latency else 0
+        for chunk in chunks:
+            if per_chunk:
+                await asyncio.sleep(per_chunk / 1000)
+            yield chunk
+
+
+def _message_text(messages: Messages) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(part.get("text", "") for part in content if part.get("type") == "text")
+    return "\n".join(parts)
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Build the provider selected by `name` or the LLM_PROVIDER variable.
+
+    LLM_PROVIDER: openai (default), fake or cassette
+    LLM_FAKE_LATENCY_MS / LLM_FAKE_FIRST_TOKEN_MS: fake provider timing
+    LLM_CASSETTE_PATH / LLM_CASSETTE_MODE (record|replay) /
+    LLM_CASSETTE_REPLAY_LATENCY (true|false): cassette settings
+    """
+    name = (name or os.getenv("LLM_PROVIDER", "openai")).lower()
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "fake":
+        return FakeProvider(
+            latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "800")),
+            first_token_ms=float(os.getenv("LLM_FAKE_FIRST_TOKEN_MS", "200")),
+        )
+    if name == "cassette":
+        mode = os.getenv("LLM_CASSETTE_MODE", "replay")
+        return CassetteProvider(
+            path=os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.json"),
+            mode=mode,
+            inner=OpenAIProvider() if mode == "record" else None,
+            replay_latency=os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "false").lower() == "true",
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_provider() -> LLMProvider:
+    """Return the process-wide provider, created on first use."""
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+    return _provider
+
+
+def set_provider(provider: Optional[LLMProvider]):
+    """Replace the process-wide provider, None resets it to the configured one."""
+    global _provider
+    _provider = provider
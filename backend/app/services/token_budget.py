@@ -0,0 +1,230 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Longest note sent to the model as-is. Longer notes are trimmed or rejected
+# depending on AI_OVERSIZE_POLICY ("trim" or "reject").
+AI_MAX_NOTE_TOKENS = int(os.getenv("AI_MAX_NOTE_TOKENS", "2000"))
+AI_OVERSIZE_POLICY = os.getenv("AI_OVERSIZE_POLICY", "trim").lower()
+# Per-user allowance of prompt + completion tokens per UTC day, 0 disables it
+AI_DAILY_TOKEN_LIMIT = int(os.getenv("AI_DAILY_TOKEN_LIMIT", "50000"))
+# When the daily allowance cannot fit the full note, it is trimmed to what is
+# left, unless that leaves fewer than this many note tokens.
+AI_MIN_NOTE_TOKENS = int(os.getenv("AI_MIN_NOTE_TOKENS", "100"))
+# Tokens charged for an image input, OpenAI bills a fixed amount per tile
+AI_IMAGE_TOKENS = int(os.getenv("AI_IMAGE_TOKENS", "765"))
+# In-memory counters are re-read from the database after this many seconds,
+# so several API workers converge on the shared total.
+AI_TOKEN_USAGE_REFRESH_SECONDS = float(os.getenv("AI_TOKEN_USAGE_REFRESH_SECONDS", "30"))
+
+# Tokens the chat format adds around every message
+_TOKENS_PER_MESSAGE = 4
+_TRIM_MARKER = "\n[...]\n"
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a request cannot be served within the configured token limits."""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class _ApproximateEncoding:
+    """
+    Stand-in for a tiktoken encoding when its BPE file cannot be loaded.
+
+    tiktoken downloads the BPE ranks on first use, which fails on hosts
+    without internet access. Words are split into pieces of at most four
+    characters, close to the real average for mixed Vietnamese/English
+    text, and decoding joins the pieces back.
+    """
+
+    _PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]|\s+")
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return self._PIECE_RE.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    import tiktoken
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Could not load tiktoken encoding for {model}, using an approximate count: {e}")
+        return _ApproximateEncoding()
+
+
+def count_tokens(text: Optional[str], model: str) -> int:
+    if not text:
+        return 0
+    return len(_get_encoding(model).encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: str) -> int:
+    """Estimate the prompt tokens of chat messages, images included."""
+    total = 0
+    for message in messages:
+        total += _TOKENS_PER_MESSAGE
+        content = message.get("content")
+        if isinstance(content, str):
+            total += count_tokens(content, model)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                total += count_tokens(part.get("text"), model)
+            elif part.get("type") == "image_url":
+                total += AI_IMAGE_TOKENS
+    return total
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Shorten `text` to at most `max_tokens` tokens.
+
+    Keeps the beginning and the end of the note, which is where people
+    usually write the medication and how they felt, and drops the middle.
+    """
+    encoding = _get_encoding(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+
+    budget = max(max_tokens - len(encoding.encode(_TRIM_MARKER)), 2)
+    head = budget * 2 // 3
+    tail = budget - head
+    return encoding.decode(tokens[:head]) + _TRIM_MARKER + encoding.decode(tokens[-tail:])
+
+
+def fit_note(note: str, model: str) -> Tuple[str, int]:
+    """Apply the per-note limit, returning the note to send and its token count."""
+    note_tokens = count_tokens(note, model)
+    if note_tokens <= AI_MAX_NOTE_TOKENS:
+        return note, note_tokens
+    if AI_OVERSIZE_POLICY == "reject":
+        raise TokenBudgetExceeded(
+            f"Note is {note_tokens} tokens, the limit is {AI_MAX_NOTE_TOKENS}"
+        )
+    note = trim_to_tokens(note, AI_MAX_NOTE_TOKENS, model)
+    return note, count_tokens(note, model)
+
+
+class TokenUsageTracker:
+    """
+    Per-user daily token accounting.
+
+    Reads come from in-memory counters, so checking a budget costs no query.
+    Each recorded call is added to the counter and upserted into the
+    ai_token_usage table, and counters are refreshed from the table every
+    AI_TOKEN_USAGE_REFRESH_SECONDS to pick up usage from other processes.
+
+    The database calls are synchronous, async code should use
+    remaining_async() and record_async(), which run them in a thread.
+    """
+
+    def __init__(self, daily_limit: int = AI_DAILY_TOKEN_LIMIT):
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        # (user_id, day) -> [tokens used, monotonic time of the last DB read]
+        self._counters: Dict[Tuple[int, date], List[float]] = {}
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.utcnow().date()
+
+    def _load(self, user_id: int, day: date) -> int:
+        from sqlalchemy import text
+        from sqlmodel import Session
+        from app.utils.database import engine
+
+        with Session(engine) as session:
+            row = session.exec(text(
+                "SELECT prompt_tokens + completion_tokens FROM ai_token_usage "
+                "WHERE user_id = :user_id AND day = :day"
+            ).bindparams(user_id=user_id, day=day)).first()
+        return int(row[0]) if row else 0
+
+    def used_today(self, user_id: int) -> int:
+        cached = self._cached(user_id)
+        if cached is not None:
+            return cached
+
+        key = (user_id, self._today())
+        used = self._load(*key)
+        with self._lock:
+            # Drop counters from previous days while we hold the lock
+            for stale in [k for k in self._counters if k[1] != key[1]]:
+                del self._counters[stale]
+            self._counters[key] = [used, time.monotonic()]
+        return used
+
+    def remaining(self, user_id: int) -> Optional[int]:
+        """Tokens left today, or None when there is no daily limit."""
+        if self.daily_limit <= 0:
+            return None
+        return max(self.daily_limit - self.used_today(user_id), 0)
+
+    def _cached(self, user_id: int) -> Optional[int]:
+        key = (user_id, self._today())
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter and time.monotonic() - counter[1] < AI_TOKEN_USAGE_REFRESH_SECONDS:
+                return int(counter[0])
+        return None
+
+    async def remaining_async(self, user_id: int) -> Optional[int]:
+        """remaining() for the event loop, only a counter refresh leaves it."""
+        if self.daily_limit <= 0:
+            return None
+        used = self._cached(user_id)
+        if used is None:
+            used = await asyncio.to_thread(self.used_today, user_id)
+        return max(self.daily_limit - used, 0)
+
+    async def record_async(self, user_id: int, prompt_tokens: int, completion_tokens: int):
+        await asyncio.to_thread(self.record, user_id, prompt_tokens, completion_tokens)
+
+    def record(self, user_id: int, prompt_tokens: int, completion_tokens: int):
+        from sqlalchemy import text
+        from sqlmodel import Session
+        from app.utils.database import engine
+
+        day = self._today()
+        with self._lock:
+            counter = self._counters.get((user_id, day))
+            if counter:
+                counter[0] += prompt_tokens + completion_tokens
+
+        with Session(engine) as session:
+            session.exec(text("""
+                INSERT INTO ai_token_usage (user_id, day, prompt_tokens, completion_tokens, requests, updated_at)
+                VALUES (:user_id, :day, :prompt_tokens, :completion_tokens, 1, :now)
+                ON CONFLICT (user_id, day) DO UPDATE SET
+                    prompt_tokens = ai_token_usage.prompt_tokens + EXCLUDED.prompt_tokens,
+                    completion_tokens = ai_token_usage.completion_tokens + EXCLUDED.completion_tokens,
+                    requests = ai_token_usage.requests + 1,
+                    updated_at = EXCLUDED.updated_at
+            """).bindparams(
+                user_id=user_id,
+                day=day,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                now=datetime.utcnow(),
+            ))
+            session.commit()
+
+
+token_usage = TokenUsageTracker()
@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+from sqlmodel import Session
+
+from app.utils.database import engine
+from app.services.ai_job_service import AIJobService
+from app.services.llm_clients import aclose_clients
+
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "2"))
+AI_JOB_POLL_INTERVAL_SECONDS = float(os.getenv("AI_JOB_POLL_INTERVAL_SECONDS", "1"))
+
+ai_job_service = AIJobService()
+
+
+async def run_worker(worker_name: str, poll_interval: float = AI_JOB_POLL_INTERVAL_SECONDS):
+    """
+    Drain the ai_job queue forever.
+
+    The whole worker lives in one event loop so the shared async HTTP client
+    in llm_clients keeps its connections between jobs.
+    """
+    print(f"AI job worker {worker_name} started")
+    try:
+        while True:
+            with Session(engine) as session:
+                job = ai_job_service.claim_next_job(session, worker_name)
+                if job is None:
+                    await asyncio.sleep(poll_interval)
+                    continue
+
+                job = await ai_job_service.run_job(session, job)
+                print(f"AI job {job.id} -> {job.status} (attempt {job.attempts}/{job.max_attempts})")
+    finally:
+        await aclose_clients()
+
+
+def _worker_process(index: int):
+    worker_name = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    try:
+        asyncio.run(run_worker(worker_name))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(count: int = AI_JOB_WORKERS):
+    """Start `count` worker processes and wait for them."""
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(index,), name=f"ai-job-worker-{index}")
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {count} AI job worker(s)")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    run_workers()
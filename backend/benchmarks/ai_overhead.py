@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Offline AI endpoint benchmark
+
+Drives the AI endpoints in-process through the ASGI app with an offline
+provider, so no OpenAI key or network is needed. The provider records the
+exact time spent waiting on the "model"; everything else is our overhead.
+
+    python benchmarks/ai_overhead.py --requests 200 --concurrency 20
+    python benchmarks/ai_overhead.py --provider cassette --cassette cassettes/llm.json
+    python benchmarks/ai_overhead.py --profile          # cProfile of the request path
+"""
+
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+DEFAULT_NOTE = "Sáng nay tôi uống Paracetamol 500mg, sau khi uống thấy đỡ đau đầu"
+
+
+async def run(args):
+    # Per-user accounting needs the database, keep the run self-contained
+    os.environ.setdefault("AI_DAILY_TOKEN_LIMIT", "0")
+    import main
+    from app.services.llm_providers import create_provider, set_provider
+
+    if args.provider == "cassette":
+        os.environ["LLM_CASSETTE_PATH"] = args.cassette
+        os.environ["LLM_CASSETTE_MODE"] = "replay"
+    else:
+        os.environ["LLM_FAKE_LATENCY_MS"] = str(args.latency_ms)
+    provider = create_provider(args.provider)
+    set_provider(provider)
+
+    path = "/api/ai/analyze-note/stream" if args.stream else "/api/ai/analyze-note"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request(index):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(path, json={"note": f"{args.note} #{index}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        # Warm up imports and lazily built objects outside the measurement
+        await one_request(-1)
+        latencies.clear()
+        provider.stats.reset()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(args.requests)))
+        wall = time.perf_counter() - started
+
+    model_per_call = provider.stats.model_seconds / max(provider.stats.calls, 1)
+    mean_latency = statistics.mean(latencies)
+    print(f"📊 {path} via {provider.name} provider")
+    print("-" * 60)
+    print(f"Requests:            {args.requests} (concurrency {args.concurrency})")
+    print(f"Throughput:          {args.requests / wall:.1f} req/s")
+    print(f"Latency p50 / p95:   {statistics.median(latencies) * 1000:.2f} / "
+          f"{statistics.quantiles(latencies, n=20)[18] * 1000:.2f} ms")
+    print(f"Model time / call:   {model_per_call * 1000:.2f} ms")
+    print(f"Overhead / request:  {(mean_latency - model_per_call) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline AI endpoint benchmark")
+    parser.add_argument("--provider", choices=["fake", "cassette"], default="fake")
+    parser.add_argument("--cassette", default="cassettes/llm.json")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fake model latency")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--stream", action="store_true", help="Benchmark the SSE endpoint")
+    parser.add_argument("--note", default=DEFAULT_NOTE)
+    parser.add_argument("--profile", action="store_true", help="Print the top cProfile entries")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        asyncio.run(run(args))
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
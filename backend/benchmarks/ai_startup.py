@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+AI stack startup benchmark
+
+Measures, each in a fresh interpreter:
+- import time of the API app (`main`), and whether langchain got loaded by it
+- cost of the first and second model client lookup
+- latency of the first and second `extract_medication_info` call (--call)
+
+Run it on two revisions to compare before/after:
+    python benchmarks/ai_startup.py --runs 5
+    python benchmarks/ai_startup.py --runs 5 --call   # needs OPENAI_API_KEY
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t0
+print(json.dumps({"import_s": elapsed, "langchain_loaded": "langchain_openai" in sys.modules}))
+"""
+
+CLIENT_PROBE = """
+import json, time
+import main
+t0 = time.perf_counter()
+try:
+    from app.services.llm_clients import get_text_model
+except ImportError:
+    from app.services.ai_service import model
+    get_text_model = lambda: model
+get_text_model()
+first = time.perf_counter() - t0
+t0 = time.perf_counter()
+get_text_model()
+second = time.perf_counter() - t0
+print(json.dumps({"first_client_s": first, "second_client_s": second}))
+"""
+
+CALL_PROBE = """
+import asyncio, json, time
+import main
+from app.services.ai_service import extract_medication_info
+
+async def run():
+    note = "Took 500mg paracetamol twice this morning, felt sleepy after"
+    t0 = time.perf_counter()
+    await extract_medication_info(note=note)
+    first = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    await extract_medication_info(note=note)
+    second = time.perf_counter() - t0
+    return {"first_call_s": first, "second_call_s": second}
+
+print(json.dumps(asyncio.run(run())))
+"""
+
+
+def run_probe(source):
+    # Client construction only needs a key to be present, not a valid one
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    result = subprocess.run(
+        [sys.executable, "-c", source],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples, key):
+    values = [sample[key] for sample in samples]
+    return statistics.median(values) * 1000, min(values) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI stack startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per probe")
+    parser.add_argument("--call", action="store_true", help="Also time real model calls")
+    args = parser.parse_args()
+
+    probes = [("import", IMPORT_PROBE, ["import_s"]),
+              ("client", CLIENT_PROBE, ["first_client_s", "second_client_s"])]
+    if args.call:
+        probes.append(("call", CALL_PROBE, ["first_call_s", "second_call_s"]))
+
+    print(f"📊 AI startup benchmark ({args.runs} runs per probe)")
+    print("-" * 60)
+    for name, source, keys in probes:
+        samples = [run_probe(source) for _ in range(args.runs)]
+        for key in keys:
+            median_ms, best_ms = summarize(samples, key)
+            print(f"{key:<20} median {median_ms:9.1f} ms   best {best_ms:9.1f} ms")
+        if name == "import":
+            print(f"{'langchain_loaded':<20} {samples[0]['langchain_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
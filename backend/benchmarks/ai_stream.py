@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Streaming extraction latency benchmark
+
+Compares, against a running API, the client-side time to the first extracted
+field on /ai/analyze-note/stream with the full latency of /ai/analyze-note:
+    python benchmarks/ai_stream.py --base-url http://localhost:8001 --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+DEFAULT_NOTE = "Sáng nay tôi uống Paracetamol 500mg, ngày 2 lần, sau khi uống thấy đỡ đau đầu"
+
+
+def time_full_response(client, base_url, note):
+    started = time.perf_counter()
+    response = client.post(f"{base_url}/api/ai/analyze-note", json={"note": note})
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def time_stream(client, base_url, note):
+    """Return (client time to first field, client total, server-reported timings)."""
+    started = time.perf_counter()
+    first_field_ms = None
+    done = {}
+    event = None
+    with client.stream("POST", f"{base_url}/api/ai/analyze-note/stream", json={"note": note}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                if event == "field" and first_field_ms is None:
+                    first_field_ms = (time.perf_counter() - started) * 1000
+                elif event == "done":
+                    done = json.loads(line[len("data: "):])
+                elif event == "error":
+                    raise RuntimeError(line)
+    return first_field_ms, (time.perf_counter() - started) * 1000, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming extraction latency benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--note", default=DEFAULT_NOTE)
+    args = parser.parse_args()
+
+    full, first, total, server_first = [], [], [], []
+    with httpx.Client(timeout=120) as client:
+        for _ in range(args.runs):
+            full.append(time_full_response(client, args.base_url, args.note))
+            first_ms, total_ms, done = time_stream(client, args.base_url, args.note)
+            first.append(first_ms or total_ms)
+            total.append(total_ms)
+            if done.get("time_to_first_field_ms") is not None:
+                server_first.append(done["time_to_first_field_ms"])
+
+    print(f"📊 Streaming benchmark ({args.runs} runs)")
+    print("-" * 60)
+    print(f"{'analyze-note full response':<32} median {statistics.median(full):8.1f} ms")
+    print(f"{'stream time to first field':<32} median {statistics.median(first):8.1f} ms")
+    if server_first:
+        print(f"{'  (server-side)':<32} median {statistics.median(server_first):8.1f} ms")
+    print(f"{'stream total':<32} median {statistics.median(total):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Parser benchmarks on saved site pages
+Run with: pytest benchmarks/bench_parsers.py
+
+benchmarks/fixtures/<domain>/ holds a listing page and article pages of each
+site in sites/, with expected.json saying what should be extracted from them;
+fixtures/dates.json pairs date strings with the time they stand for. The
+benchmarks drive FinancialNewsSpider.parse, parse_article and parse_date on
+HtmlResponse objects built from those files, the way the engine calls them,
+and add to each pytest-benchmark result (extra_info):
+
+- pages_per_second (dates_per_second for parse_date)
+- peak_kib_per_page: memory allocated at the peak of parsing one page (tracemalloc)
+- accuracy: share of expected values extracted exactly, per field
+- structured_share (parse_article): share of the extracted fields served from
+  JSON-LD / OpenGraph metadata instead of the site selectors
+
+test_parse_article fails when any field of a site comes out right on fewer
+than MIN_FIELD_ACCURACY of its pages, test_parse_listing when fewer than
+MIN_LINK_RECALL of the expected article links are queued, so a selector
+that regresses on a fixture does not pass unnoticed.
+
+test_content_extraction and test_link_extraction compare the site selectors
+with the text density fallback (main_content.py) and with taking the whole
+page or every link, on the parsed fixture pages.
+
+    pytest benchmarks/bench_parsers.py -s                     # also print accuracy
+    pytest benchmarks/bench_parsers.py --benchmark-autosave   # then change selectors or parsers
+    pytest benchmarks/bench_parsers.py --benchmark-compare    # and compare
+
+Needs pytest-benchmark.
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.reactor import install_reactor
+from scrapy.utils.test import get_crawler
+
+from scrapy_project import main_content
+from scrapy_project.extraction import content_text
+from scrapy_project.site_config import read_seed_files, validate_site_config
+from scrapy_project.spiders.financial_news import FinancialNewsSpider
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ARTICLE_FIELDS = ('title', 'content', 'excerpt', 'author', 'published_date', 'image_url', 'tags')
+# Lowest accuracies the site selectors may reach on the fixture pages
+MIN_FIELD_ACCURACY = 0.9
+MIN_LINK_RECALL = 0.9
+# Publication times on the fixture pages are Vietnam time
+VIETNAM_TZ = timezone(timedelta(hours=7))
+
+FixturePage = namedtuple('FixturePage', 'domain name url body expected')
+
+
+class FixtureSpider(FinancialNewsSpider):
+    """The spider on every site config in sites/, enabled or not, without a database"""
+    site_configs = dict(validate_site_config(raw) for raw in read_seed_files())
+
+
+def load_pages():
+    pages = []
+    for domain in sorted(os.listdir(FIXTURES_DIR)):
+        site_dir = os.path.join(FIXTURES_DIR, domain)
+        if not os.path.isdir(site_dir):
+            continue
+        with open(os.path.join(site_dir, 'expected.json'), encoding='utf-8') as f:
+            expected = json.load(f)
+        for name, page in sorted(expected.items()):
+            with open(os.path.join(site_dir, name), 'rb') as f:
+                pages.append(FixturePage(domain, name, page['url'], f.read(), page))
+    return pages
+
+
+PAGES = load_pages()
+SITES = sorted({page.domain for page in PAGES})
+with open(os.path.join(FIXTURES_DIR, 'dates.json'), encoding='utf-8') as f:
+    DATES = [(text, datetime.fromisoformat(expected)) for text, expected in json.load(f)]
+
+
+@pytest.fixture(scope='module')
+def spider():
+    # Crawlers check the reactor, even when nothing is downloaded
+    install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
+    return FixtureSpider.from_crawler(get_crawler(FixtureSpider, {'LOG_LEVEL': 'WARNING'}))
+
+
+def make_response(spider, page):
+    # A new response every time, so no parsed tree is reused between rounds
+    meta = {'domain': page.domain, 'site_id': spider.site_configs[page.domain]['id'], 'article': True}
+    return HtmlResponse(page.url, body=page.body, encoding='utf-8', request=Request(page.url, meta=meta))
+
+
+def run_parse(spider, pages):
+    return [list(spider.parse(make_response(spider, page))) for page in pages]
+
+
+def first_output(results):
+    """First output of an async callback that never has to wait, as without an extraction pool"""
+    try:
+        results.__anext__().send(None)
+    except StopIteration as e:
+        return e.value
+    except StopAsyncIteration:
+        return None
+    raise RuntimeError('callback waited, the benchmarks run without EXTRACTION_POOL_SIZE')
+
+
+def run_parse_article(spider, pages):
+    return [first_output(spider.parse_article(make_response(spider, page))) for page in pages]
+
+
+def run_parse_date(spider, dates):
+    return [spider.parse_date(text) for text, _ in dates]
+
+
+def same_time(value, expected):
+    # A time without a zone is not the expected instant
+    return isinstance(value, datetime) and value.tzinfo is not None and value == expected
+
+
+def same_day(value, expected):
+    if not isinstance(value, datetime):
+        return False
+    if value.tzinfo is not None:
+        value = value.astimezone(expected.tzinfo)
+    return value.date() == expected.date()
+
+
+def article_accuracy(pages, items):
+    """{field: share of the pages where the field came out as expected}"""
+    matched = dict.fromkeys(ARTICLE_FIELDS, 0)
+    totals = dict.fromkeys(ARTICLE_FIELDS, 0)
+    for page, item in zip(pages, items):
+        item = item or {}
+        for field, expected in page.expected['fields'].items():
+            totals[field] += 1
+            value = item.get(field)
+            if field == 'published_date':
+                ok = same_time(value, datetime.fromisoformat(expected))
+            elif field == 'content':
+                ok = value == ' '.join(expected)
+            elif field == 'tags':
+                ok = set(value or ()) == set(expected)
+            else:
+                ok = value == expected
+            matched[field] += ok
+    return {field: round(matched[field] / totals[field], 3) for field in ARTICLE_FIELDS if totals[field]}
+
+
+def listing_accuracy(pages, results):
+    """Precision and recall of the queued article links, and the next page"""
+    expected_links = queued_links = true_links = 0
+    next_pages = 0
+    for page, requests in zip(pages, results):
+        expected = set(page.expected['articles'])
+        queued = {r.url for r in requests if getattr(r.callback, '__name__', '') == 'parse_article'}
+        expected_links += len(expected)
+        queued_links += len(queued)
+        true_links += len(expected & queued)
+        next_page = next((r.url for r in requests if getattr(r.callback, '__name__', '') == 'parse'), None)
+        next_pages += next_page == page.expected['next_page']
+    return {
+        'link_precision': round(true_links / max(queued_links, 1), 3),
+        'link_recall': round(true_links / max(expected_links, 1), 3),
+        'next_page': round(next_pages / len(pages), 3),
+    }
+
+
+def peak_kib_per_page(run, spider, pages):
+    """Mean of the memory allocation peaks while parsing each page"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for page in pages:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run(spider, [page])
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return round(sum(peaks) / len(peaks) / 1024, 1)
+
+
+def structured_share(spider, pages):
+    """Share of the article fields taken from JSON-LD / OpenGraph, from the spider's stats"""
+    stats = spider.crawler.stats
+    names = ('structured_data/fields', 'structured_data/selector_fields')
+    before = [stats.get_value(name, 0) for name in names]
+    run_parse_article(spider, pages)
+    structured, selectors = (stats.get_value(name, 0) - start for name, start in zip(names, before))
+    return round(structured / max(structured + selectors, 1), 3)
+
+
+def report(benchmark, count, unit, accuracy, peak_kib=None, structured=None):
+    info = {'accuracy': accuracy}
+    if peak_kib is not None:
+        info['peak_kib_per_page'] = peak_kib
+    if structured is not None:
+        info['structured_share'] = structured
+    line = ''
+    if benchmark.stats is not None:  # None with --benchmark-disable
+        rate = count / benchmark.stats.stats.mean
+        info[f'{unit}_per_second'] = round(rate, 1)
+        line = f"{rate:8.0f} {unit}/s | "
+    benchmark.extra_info.update(info)
+    if peak_kib is not None:
+        line += f"{peak_kib:6.0f} KiB peak/page | "
+    if structured is not None:
+        line += f"structured data {structured:.0%} | "
+    print(f"\n📊 {benchmark.name}: {line}" + ', '.join(f"{name} {share:.0%}" for name, share in accuracy.items()))
+
+
+@pytest.mark.parametrize('domain', SITES)
+def test_parse_listing(benchmark, spider, domain):
+    pages = [page for page in PAGES if page.domain == domain and 'articles' in page.expected]
+    results = benchmark(run_parse, spider, pages)
+    accuracy = listing_accuracy(pages, results)
+    report(benchmark, len(pages), 'pages', accuracy, peak_kib_per_page(run_parse, spider, pages))
+    assert all(results)
+    assert accuracy['link_recall'] >= MIN_LINK_RECALL, f"{domain}: link recall {accuracy['link_recall']:.0%}"
+
+
+@pytest.mark.parametrize('domain', SITES)
+def test_parse_article(benchmark, spider, domain):
+    pages = [page for page in PAGES if page.domain == domain and 'fields' in page.expected]
+    items = benchmark(run_parse_article, spider, pages)
+    accuracy = article_accuracy(pages, items)
+    report(benchmark, len(pages), 'pages', accuracy,
+           peak_kib_per_page(run_parse_article, spider, pages), structured_share(spider, pages))
+    assert all(item and item.get('title') for item in items)
+    below = {field: share for field, share in accuracy.items() if share < MIN_FIELD_ACCURACY}
+    assert not below, f"{domain}: fields below {MIN_FIELD_ACCURACY:.0%} accuracy: {below}"
+
+
+def test_parse_date(benchmark, spider):
+    parsed = benchmark(run_parse_date, spider, DATES)
+    accuracy = {
+        'exact': round(sum(same_time(v, e) for v, (_, e) in zip(parsed, DATES)) / len(DATES), 3),
+        'day': round(sum(same_day(v, e) for v, (_, e) in zip(parsed, DATES)) / len(DATES), 3),
+    }
+    report(benchmark, len(DATES), 'dates', accuracy)
+
+
+def token_f1(value, expected):
+    """F1 score of the words of `value` against the words of `expected`"""
+    got, want = Counter((value or '').split()), Counter(expected.split())
+    common = sum((got & want).values())
+    if not common:
+        return 0.0
+    precision, recall = common / sum(got.values()), common / sum(want.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+CONTENT_METHODS = {
+    'site_selectors': lambda spider, page, root: spider.extractors[page.domain].extract_content(root),
+    'density_fallback': lambda spider, page, root: main_content.main_content_text(root),
+    'whole_page': lambda spider, page, root: content_text(root),
+}
+
+LINK_METHODS = {
+    'site_selectors': lambda spider, page, root: spider.extractors[page.domain].links(root),
+    'headline_links': lambda spider, page, root: main_content.article_links(root),
+    'every_link': lambda spider, page, root: root.xpath('//a/@href'),
+}
+
+
+def parsed(spider, kind):
+    pages = [page for page in PAGES if kind in page.expected]
+    return pages, [make_response(spider, page).selector.root for page in pages]
+
+
+@pytest.mark.parametrize('method', CONTENT_METHODS)
+def test_content_extraction(benchmark, spider, method):
+    extract = CONTENT_METHODS[method]
+    pages, roots = parsed(spider, 'fields')
+    contents = benchmark(lambda: [extract(spider, page, root) for page, root in zip(pages, roots)])
+    expected = [' '.join(page.expected['fields']['content']) for page in pages]
+    report(benchmark, len(pages), 'pages', {
+        'exact': round(sum(' '.join((c or '').split()) == e for c, e in zip(contents, expected)) / len(pages), 3),
+        'token_f1': round(sum(token_f1(c, e) for c, e in zip(contents, expected)) / len(pages), 3),
+    })
+
+
+@pytest.mark.parametrize('method', LINK_METHODS)
+def test_link_extraction(benchmark, spider, method):
+    extract = LINK_METHODS[method]
+    pages, roots = parsed(spider, 'articles')
+    results = benchmark(lambda: [extract(spider, page, root) for page, root in zip(pages, roots)])
+    found = queued = true_found = true_queued = expected_links = 0
+    for page, hrefs in zip(pages, results):
+        expected = set(page.expected['articles'])
+        urls = {urljoin(page.url, href.strip()) for href in hrefs if href.strip()}
+        articles = {url for url in urls if spider.is_article_url(url, page.domain)}
+        found, true_found = found + len(urls), true_found + len(urls & expected)
+        queued, true_queued = queued + len(articles), true_queued + len(articles & expected)
+        expected_links += len(expected)
+    report(benchmark, len(pages), 'pages', {
+        'precision': round(true_found / max(found, 1), 3),
+        'classified_precision': round(true_queued / max(queued, 1), 3),
+        'recall': round(true_queued / max(expected_links, 1), 3),
+    })
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Politeness delay throughput benchmark
+
+Crawls a local mock site served on several loopback addresses (one
+"domain" each) twice: once with the old time.sleep() based delay and once
+with RandomDelayMiddleware's per-slot delay, and reports pages per second.
+
+    python benchmarks/delay_throughput.py --domains 3 --pages 30 --delay 0.05 0.15
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapy.utils.reactor import install_reactor
+
+install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
+
+import scrapy
+from scrapy.crawler import CrawlerRunner
+from twisted.internet import defer, reactor
+
+import mock_site
+from scrapy_project.middlewares import RandomDelayMiddleware
+
+
+class BlockingRandomDelayMiddleware:
+    """The previous implementation: sleeps inside the reactor thread"""
+
+    def __init__(self, delay_range):
+        self.delay_range = delay_range
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(tuple(map(float, crawler.settings.getlist('RANDOM_DELAY_RANGE'))))
+
+    def process_request(self, request, spider):
+        time.sleep(random.uniform(*self.delay_range))
+        return None
+
+
+class MockSiteSpider(scrapy.Spider):
+    name = 'mock_site'
+
+    def __init__(self, hosts, port, pages_per_domain, **kwargs):
+        super().__init__(**kwargs)
+        self.start_urls = [f'http://{host}:{port}/' for host in hosts]
+        self.pages_per_domain = pages_per_domain
+
+    def parse(self, response):
+        links = response.css('h3.story__title a::attr(href)').getall()[:self.pages_per_domain]
+        for href in links:
+            yield response.follow(href, callback=self.parse_article)
+
+    def parse_article(self, response):
+        yield {
+            'url': response.url,
+            'title': response.css('h1::text').get(),
+            'paragraphs': len(response.css('div.detail__content p')),
+        }
+
+
+@defer.inlineCallbacks
+def run(args):
+    hosts = [f'127.0.0.{i}' for i in range(1, args.domains + 1)]
+    ports = mock_site.listen(hosts, args.port, pages=args.pages)
+    variants = [('time.sleep (old)', BlockingRandomDelayMiddleware),
+                ('download slot (new)', RandomDelayMiddleware)]
+
+    print(f"📊 Delay throughput: {args.domains} domains x {args.pages} articles, "
+          f"delay {args.delay[0]}-{args.delay[1]}s")
+    print("-" * 60)
+    for label, middleware in variants:
+        runner = CrawlerRunner({
+            'DOWNLOADER_MIDDLEWARES': {middleware: 550},
+            'RANDOM_DELAY_RANGE': args.delay,
+            'DOWNLOAD_DELAY': 0,
+            'CONCURRENT_REQUESTS': 16,
+            'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+            'AUTOTHROTTLE_ENABLED': False,
+            'LOG_LEVEL': 'ERROR',
+            'TELNETCONSOLE_ENABLED': False,
+        })
+        crawler = runner.create_crawler(MockSiteSpider)
+        started = time.perf_counter()
+        yield runner.crawl(crawler, hosts=hosts, port=args.port, pages_per_domain=args.pages)
+        elapsed = time.perf_counter() - started
+        pages = crawler.stats.get_value('response_received_count', 0)
+        print(f"{label:<20} {pages:5d} pages in {elapsed:7.2f}s  ->  {pages / elapsed:7.2f} pages/s")
+
+    for port in ports:
+        yield port.stopListening()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Politeness delay throughput benchmark')
+    parser.add_argument('--domains', type=int, default=3)
+    parser.add_argument('--pages', type=int, default=30, help='Articles crawled per domain')
+    parser.add_argument('--delay', type=float, nargs=2, default=[0.05, 0.15])
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    def start():
+        d = run(args)
+        d.addErrback(lambda failure: failure.printTraceback())
+        d.addBoth(lambda _: reactor.stop())
+
+    reactor.callWhenRunning(start)
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
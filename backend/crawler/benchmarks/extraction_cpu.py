@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Article content extraction CPU benchmark
+
+Extracts the content of the same article pages the previous way (a second
+BeautifulSoup html.parser parse, then every <p>/<li> of the document) and
+the current way (content_text() on the node matched in Scrapy's own lxml
+tree), and reports CPU time per article and the extracted text length.
+Both include building the response selector, which parse_article needs
+for its other fields anyway.
+
+    python benchmarks/extraction_cpu.py --pages 200 --paragraphs 30
+
+Needs beautifulsoup4 for the previous implementation.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+from scrapy.http import HtmlResponse
+
+from httpcache_storage import make_pages
+from scrapy_project.extraction import content_text
+
+CONTENT_SELECTOR = 'div.detail__content'
+
+# Navigation, related stories and footer around the article, as on a real page
+PAGE_CHROME = (
+    '<ul class="menu">' + ''.join(f'<li><a href="/muc-{i}.htm">Chuyên mục {i}</a></li>' for i in range(25)) + '</ul>'
+    '<div class="sidebar"><ul>' + ''.join(
+        f'<li><a href="/tin-{i}.htm">Tin đọc nhiều số {i} về thị trường</a></li>' for i in range(30)
+    ) + '</ul></div>'
+    '<footer><p>Tạp chí Kinh tế Việt Nam</p><p>Giấy phép số 123/GP-BTTTT</p></footer>'
+    '<script>var ads = {"slots": [1, 2, 3]};</script>'
+)
+
+
+def extract_previous(response):
+    response.selector  # parsed for the other fields
+    soup = BeautifulSoup(response.body, "html.parser")
+    if soup.select_one(CONTENT_SELECTOR):
+        content = '\n'.join(p.get_text(strip=True) for p in soup.find_all(['p', 'li']) if p.get_text(strip=True))
+        if not content.strip():
+            content = soup.get_text(separator='\n', strip=True)
+        return content
+    return None
+
+
+def extract_current(response):
+    html_content = response.css(CONTENT_SELECTOR)
+    if html_content:
+        return content_text(html_content[0].root)
+    return None
+
+
+def run(label, extract, pages):
+    lengths = 0
+    started = time.process_time()
+    for url, body in pages:
+        # A new response each time, so nothing is reused from a previous parse
+        response = HtmlResponse(url, body=body, encoding='utf-8')
+        lengths += len(extract(response) or '')
+    cpu = time.process_time() - started
+    print(f"{label:<34} {cpu / len(pages) * 1000:7.3f} ms CPU/article | "
+          f"{lengths / len(pages):8.0f} chars of content/article")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Article content extraction CPU benchmark')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=30, help='Paragraphs per article')
+    args = parser.parse_args()
+
+    pages = [
+        (url, body.replace(b'<body>', b'<body>' + PAGE_CHROME.encode('utf-8'), 1))
+        for url, body in make_pages(args.pages, args.paragraphs)
+    ]
+    print(f"📊 Content extraction: {args.pages} articles, {sum(len(b) for _, b in pages) / len(pages) / 1024:.1f} KiB each")
+    print("-" * 60)
+    previous = run('BeautifulSoup, whole document', extract_previous, pages)
+    current = run('lxml tree, content node only', extract_current, pages)
+    print(f"Speed-up: {previous / current:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Extraction pool scaling benchmark
+
+Serves the local mock site (long articles) from a separate process and
+crawls it with FinancialNewsSpider once per EXTRACTION_POOL_SIZE, then
+reports articles per second and the spider process's own CPU time per
+article. Pool size 0 extracts in the reactor thread as before; with a pool
+the spider process only downloads and builds items, so the throughput can
+grow with the pool up to the number of free cores.
+
+    python benchmarks/extraction_pool.py --pool-sizes 0 1 2 4 --pages 300 --paragraphs 200
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapy.utils.reactor import install_reactor
+
+install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
+
+from scrapy.crawler import CrawlerRunner
+from twisted.internet import defer, reactor
+
+from scrapy_project.site_config import read_seed_files, validate_site_config
+from scrapy_project.spiders.financial_news import FinancialNewsSpider
+
+HOST = '127.0.0.1'
+
+
+class PoolBenchSpider(FinancialNewsSpider):
+    name = 'extraction_pool_bench'
+    allowed_domains = [HOST]
+
+
+def configure_spider(args):
+    """The mock site, with VnEconomy's selectors and no politeness limits"""
+    _, config = validate_site_config(read_seed_files()[0])
+    domain = f'{HOST}:{args.port}'
+    config.update(
+        start_urls=[f'http://{domain}/'],
+        crawl_profile=dict(config['crawl_profile'], concurrency=args.concurrency, delay=0, max_requests=0),
+        url_patterns={'article': [r'/bai-viet-\d+\.htm$']},
+    )
+    PoolBenchSpider.site_configs = {domain: config}
+
+
+def serve(args):
+    import mock_site
+    mock_site.listen([HOST], args.port, pages=args.pages, paragraphs=args.paragraphs, latency=args.latency)
+    reactor.run()
+
+
+@defer.inlineCallbacks
+def run(args):
+    print(f"📊 Extraction pool: {args.pages} articles of {args.paragraphs} paragraphs, "
+          f"{args.latency * 1000:.0f} ms latency, {args.concurrency} concurrent requests, {os.cpu_count()} CPUs")
+    print("-" * 60)
+    for pool_size in args.pool_sizes:
+        runner = CrawlerRunner({
+            'EXTRACTION_POOL_SIZE': pool_size,
+            'ITEM_PIPELINES': {},
+            'CONCURRENT_REQUESTS': args.concurrency,
+            'DOWNLOAD_DELAY': 0,
+            'ROBOTSTXT_OBEY': False,
+            'LOG_LEVEL': 'ERROR',
+            'TELNETCONSOLE_ENABLED': False,
+        })
+        crawler = runner.create_crawler(PoolBenchSpider)
+        started, cpu_started = time.perf_counter(), time.process_time()
+        yield runner.crawl(crawler)
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+        articles = crawler.stats.get_value('item_scraped_count', 0) - 1  # minus the SiteItem
+        print(f"pool size {pool_size}: {articles} articles in {elapsed:6.2f}s = {articles / elapsed:7.2f} articles/s "
+              f"| spider process {cpu / max(articles, 1) * 1000:5.2f} ms CPU/article")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extraction pool scaling benchmark')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--pages', type=int, default=300, help='Articles on the mock site')
+    parser.add_argument('--paragraphs', type=int, default=200, help='Paragraphs per article')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per response')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=8795)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    server = subprocess.Popen([
+        sys.executable, __file__, '--serve', '--pages', str(args.pages),
+        '--paragraphs', str(args.paragraphs), '--latency', str(args.latency), '--port', str(args.port),
+    ])
+    time.sleep(1)
+    configure_spider(args)
+
+    def start():
+        d = run(args)
+        d.addErrback(lambda failure: failure.printTraceback())
+        d.addBoth(lambda _: reactor.stop())
+
+    try:
+        reactor.callWhenRunning(start)
+        reactor.run()
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Article field extraction micro-benchmark
+
+Extracts title, excerpt, author, date, image and tags from already parsed
+article pages the previous way (splitting each selector string and running
+one response.css() query per alternative) and with the site's precompiled
+SiteExtractor, and reports fields extracted per second.
+
+    python benchmarks/field_extraction.py --pages 500 --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapy.http import HtmlResponse
+
+from extraction_cpu import PAGE_CHROME
+from httpcache_storage import make_pages
+from scrapy_project.extraction import SiteExtractor
+from scrapy_project.site_config import read_seed_files
+
+# Sites usually list several alternatives per field, like most seed files in sites/
+SELECTORS = dict(
+    read_seed_files()[0]['article_selectors'],
+    title='h1.title-detail, h1.detail__title',
+    excerpt='.sapo, h2.detail__summary',
+    author='.author, .detail__author',
+    published_date='.detail-time, div.detail__meta',
+    image='.detail-image img, figure.detail__avatar img',
+)
+
+ARTICLE_EXTRAS = (
+    '<meta name="keywords" content="chứng khoán, ngân hàng, lãi suất">'
+    '<div class="detail__author">Minh Anh</div>'
+    '<figure class="detail__avatar"><img src="/images/anh-bia.jpg"></figure>'
+    '<div class="tags"><a href="/tag/vn-index">VN-Index</a><a href="/tag/co-phieu">Cổ phiếu</a></div>'
+)
+
+
+def extract_previous(response, selectors):
+    fields = {}
+    for selector in selectors['title'].split(', '):
+        title = response.css(f'{selector}::text').get()
+        if title:
+            fields['title'] = title.strip()
+            break
+    for selector in selectors['excerpt'].split(', '):
+        excerpt = response.css(f'{selector}::text').get()
+        if excerpt:
+            fields['excerpt'] = excerpt.strip()
+            break
+    for selector in selectors['author'].split(', '):
+        author = response.css(f'{selector}::text').get()
+        if author:
+            fields['author'] = author.strip()
+            break
+    for selector in selectors['published_date'].split(', '):
+        date_text = (response.css(f'{selector}::text').get() or
+                     response.css(f'{selector}::attr(datetime)').get())
+        if date_text:
+            fields['published_date'] = date_text.strip()
+            break
+    for selector in selectors['image'].split(', '):
+        image_url = response.css(f'{selector}::attr(src)').get()
+        if image_url:
+            fields['image_url'] = image_url
+            break
+    tags = []
+    meta_keywords = response.css('meta[name="keywords"]::attr(content)').get()
+    if meta_keywords:
+        tags.extend([tag.strip() for tag in meta_keywords.split(',')])
+    tag_links = response.css('.tags a::text, .categories a::text, .tag a::text').getall()
+    if tag_links:
+        tags.extend([tag.strip() for tag in tag_links])
+    if tags:
+        fields['tags'] = tags[:10]
+    return fields
+
+
+def extract_current(response, extractor):
+    root = response.selector.root
+    fields = {
+        'title': extractor.extract_title(root),
+        'excerpt': extractor.extract_excerpt(root),
+        'author': extractor.extract_author(root),
+        'published_date': extractor.extract_date_text(root),
+        'image_url': extractor.extract_image(root),
+        'tags': extractor.extract_tags(root),
+    }
+    return {name: value for name, value in fields.items() if value}
+
+
+def run(label, extract, responses, rounds):
+    fields = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for response in responses:
+            fields += len(extract(response))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {fields / elapsed:10.0f} fields/s | "
+          f"{elapsed / (rounds * len(responses)) * 1e6:7.1f} µs/article | {fields // rounds} fields")
+    return fields / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Article field extraction micro-benchmark')
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    responses = []
+    for url, body in make_pages(args.pages, 10):
+        body = body.replace(b'<body>', b'<body>' + (PAGE_CHROME + ARTICLE_EXTRAS).encode('utf-8'), 1)
+        response = HtmlResponse(url, body=body, encoding='utf-8')
+        response.selector  # parse outside the timed loop
+        responses.append(response)
+
+    extractor = SiteExtractor(SELECTORS)
+    first = responses[0]
+    assert extract_previous(first, SELECTORS) == extract_current(first, extractor), \
+        (extract_previous(first, SELECTORS), extract_current(first, extractor))
+
+    print(f"📊 Field extraction: {args.pages} parsed articles x {args.rounds} rounds")
+    print("-" * 60)
+    previous = run('response.css() per alternative', lambda r: extract_previous(r, SELECTORS), responses, args.rounds)
+    current = run('precompiled SiteExtractor', lambda r: extract_current(r, extractor), responses, args.rounds)
+    print(f"Speed-up: {current / previous:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
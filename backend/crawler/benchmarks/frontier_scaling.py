@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared frontier scaling benchmark
+
+Serves the local mock site from a separate process and crawls it with 1, 2,
+4... spider processes sharing one PostgresFrontierScheduler crawl, then
+reports pages per second and checks that no page was fetched twice. Each
+process is limited to a few concurrent requests, like a polite worker, so
+the throughput comes from adding processes.
+
+    python benchmarks/frontier_scaling.py --workers 1 2 4 --pages 400 \\
+        -s POSTGRES_HOST=localhost -s POSTGRES_PASSWORD=password
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapy.utils.reactor import install_reactor
+
+install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
+
+import scrapy
+from scrapy.settings import Settings
+
+HOST = '127.0.0.1'
+
+
+class FrontierBenchSpider(scrapy.Spider):
+    name = 'frontier_bench'
+
+    def __init__(self, port, **kwargs):
+        super().__init__(**kwargs)
+        self.start_urls = [f'http://{HOST}:{port}/']
+
+    def parse(self, response):
+        for href in response.css('a::attr(href)').getall():
+            yield response.follow(href, callback=self.parse)
+
+
+def serve(args):
+    from twisted.internet import reactor
+
+    import mock_site
+    mock_site.listen([HOST], args.port, pages=args.pages, latency=args.latency)
+    reactor.run()
+
+
+def work(args, db_settings):
+    from scrapy.crawler import CrawlerProcess
+
+    settings = {
+        'SCHEDULER': 'scrapy_project.frontier.PostgresFrontierScheduler',
+        'FRONTIER_CRAWL_ID': args.crawl_id,
+        'FRONTIER_POLL_INTERVAL': 0.2,
+        'CONCURRENT_REQUESTS': args.concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': args.concurrency,
+        'DOWNLOAD_DELAY': 0,
+        'ROBOTSTXT_OBEY': False,
+        'LOG_LEVEL': 'WARNING',
+        **db_settings,
+    }
+    process = CrawlerProcess(settings)
+    process.crawl(FrontierBenchSpider, port=args.port)
+    process.start()
+
+
+def frontier_counts(db_settings, crawl_id):
+    from scrapy_project.db import connect
+
+    connection = connect(Settings(db_settings))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT status, COUNT(*), SUM(attempts) FROM crawl_frontier WHERE crawl_id = %s GROUP BY status",
+            (crawl_id,),
+        )
+        counts = {status: (rows, attempts) for status, rows, attempts in cursor.fetchall()}
+    connection.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared frontier scaling benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--pages', type=int, default=400, help='Articles on the mock site')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per response')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent requests per worker')
+    parser.add_argument('--port', type=int, default=8781)
+    parser.add_argument('-s', dest='settings', action='append', default=[],
+                        help='POSTGRES_* setting as NAME=VALUE')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--crawl-id', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    db_settings = dict(setting.split('=', 1) for setting in args.settings)
+
+    if args.serve:
+        return serve(args)
+    if args.worker:
+        return work(args, db_settings)
+
+    common = [
+        '--pages', str(args.pages), '--latency', str(args.latency),
+        '--concurrency', str(args.concurrency), '--port', str(args.port),
+    ] + [f'-s{setting}' for setting in args.settings]
+    server = subprocess.Popen([sys.executable, __file__, '--serve'] + common)
+    time.sleep(1)
+
+    print(f"📊 Shared frontier: {args.pages + 1} pages, {args.latency * 1000:.0f} ms latency, "
+          f"{args.concurrency} concurrent requests per worker")
+    print("-" * 60)
+    try:
+        for workers in args.workers:
+            crawl_id = f'frontier-bench-{os.getpid()}-{workers}-{int(time.time())}'
+            started = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, __file__, '--worker', '--crawl-id', crawl_id] + common)
+                for _ in range(workers)
+            ]
+            for process in processes:
+                process.wait()
+            elapsed = time.perf_counter() - started
+
+            counts = frontier_counts(db_settings, crawl_id)
+            done, attempts = counts.get('done', (0, 0))
+            others = {status: rows for status, (rows, _) in counts.items() if status != 'done'}
+            print(f"{workers} worker(s): {done} pages in {elapsed:6.2f}s = {done / elapsed:7.2f} pages/s "
+                  f"| leases per page {attempts / max(done, 1):.2f} | not done {others or 0}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+HTTP cache storage benchmark
+
+Stores the same synthetic article pages in Scrapy's FilesystemCacheStorage
+and in SqliteCacheStorage, then reports store time, lookup latency (hits
+and misses) and disk footprint of each.
+
+    python benchmarks/httpcache_storage.py --pages 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scrapy.utils.reactor import install_reactor
+
+install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.utils.misc import load_object
+from scrapy.utils.test import get_crawler
+
+from mock_site import ARTICLE_TEMPLATE
+
+STORAGES = {
+    'filesystem': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+    'sqlite+zstd': 'scrapy_project.httpcache.SqliteCacheStorage',
+}
+
+
+def make_pages(count, paragraphs):
+    rng = random.Random(42)
+    words = ('thị trường chứng khoán ngân hàng lãi suất cổ phiếu doanh nghiệp '
+             'tăng trưởng xuất khẩu lạm phát tỷ giá đầu tư').split()
+    pages = []
+    for n in range(count):
+        body = ''.join(
+            '<p>' + ' '.join(rng.choice(words) for _ in range(40)) + '.</p>' for _ in range(paragraphs)
+        )
+        html = ARTICLE_TEMPLATE.format(n=n, paragraphs=body, links='')
+        pages.append((f'https://vneconomy.vn/bai-viet-{n}.htm', html.encode('utf-8')))
+    return pages
+
+
+def disk_usage(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.stat(os.path.join(root, name)).st_blocks * 512
+    return total
+
+
+def run_storage(label, storage_path, pages, lookups):
+    with tempfile.TemporaryDirectory() as cachedir:
+        crawler = get_crawler(Spider, {
+            'HTTPCACHE_DIR': cachedir,
+            'HTTPCACHE_EXPIRATION_SECS': 0,
+        })
+        spider = crawler._create_spider('bench')
+        storage = load_object(storage_path)(crawler.settings)
+        storage.open_spider(spider)
+
+        requests = [Request(url) for url, _ in pages]
+        started = time.perf_counter()
+        for request, (url, body) in zip(requests, pages):
+            response = HtmlResponse(url, body=body, headers={'Content-Type': 'text/html; charset=utf-8'})
+            storage.store_response(spider, request, response)
+        store_seconds = time.perf_counter() - started
+
+        rng = random.Random(7)
+        hit_latencies = []
+        for _ in range(lookups):
+            request = rng.choice(requests)
+            started = time.perf_counter()
+            response = storage.retrieve_response(spider, request)
+            hit_latencies.append(time.perf_counter() - started)
+            assert response is not None and response.body
+        miss_latencies = []
+        for n in range(lookups):
+            request = Request(f'https://vneconomy.vn/khong-co-{n}.htm')
+            started = time.perf_counter()
+            assert storage.retrieve_response(spider, request) is None
+            miss_latencies.append(time.perf_counter() - started)
+
+        storage.close_spider(spider)
+        footprint = disk_usage(cachedir)
+        files = sum(len(files) for _, _, files in os.walk(cachedir))
+
+    raw_bytes = sum(len(body) for _, body in pages)
+    print(f"{label:<12} store {store_seconds / len(pages) * 1000:6.3f} ms/page | "
+          f"hit p50 {statistics.median(hit_latencies) * 1000:6.3f} ms "
+          f"p95 {statistics.quantiles(hit_latencies, n=20)[18] * 1000:6.3f} ms | "
+          f"miss p50 {statistics.median(miss_latencies) * 1000:6.3f} ms | "
+          f"disk {footprint / 1024 / 1024:7.2f} MiB ({footprint / raw_bytes:5.2f}x raw) in {files} files")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP cache storage benchmark')
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--paragraphs', type=int, default=30, help='Paragraphs per article page')
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.paragraphs)
+    raw = sum(len(body) for _, body in pages)
+    print(f"📊 HTTP cache storage: {args.pages} pages, {raw / 1024 / 1024:.2f} MiB of HTML")
+    print("-" * 60)
+    for label, storage_path in STORAGES.items():
+        run_storage(label, storage_path, pages, args.lookups)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Local mock news site for crawler benchmarks
+
+Serves a homepage linking to numbered article pages, each article linking to
+a few others, so a spider can walk it like a real news site. /robots.txt
+points at /sitemap.xml, which lists every article. Bind it to
+several loopback addresses (127.0.0.1, 127.0.0.2, ...) to get several
+"domains" on one machine.
+"""
+
+from twisted.web import resource, server
+
+ARTICLE_TEMPLATE = """<html><head><title>Bài viết {n}</title></head>
+<body>
+<h1 class="detail__title">Bài viết số {n}</h1>
+<h2 class="detail__summary">Tóm tắt bài viết {n}</h2>
+<div class="detail__meta">Thứ Hai, 12/5/2025 08:30 (GMT+7)</div>
+<div class="detail__content">{paragraphs}</div>
+<ul class="related">{links}</ul>
+</body></html>"""
+
+
+class MockNewsSite(resource.Resource):
+    isLeaf = True
+
+    def __init__(self, pages=200, links_per_page=5, paragraphs=20, latency=0.0):
+        super().__init__()
+        self.pages = pages
+        self.links_per_page = links_per_page
+        self.paragraph_html = ''.join(
+            f'<p>Đoạn văn {i}: thị trường chứng khoán biến động mạnh trong phiên hôm nay.</p>'
+            for i in range(paragraphs)
+        )
+        self.latency = latency
+
+    def _links(self, start):
+        return ''.join(
+            f'<li><h3 class="story__title"><a href="/bai-viet-{(start + i) % self.pages}.htm">'
+            f'Bài viết {(start + i) % self.pages}</a></h3></li>'
+            for i in range(1, self.links_per_page + 1)
+        )
+
+    def _render(self, request):
+        path = request.path.decode()
+        if path.startswith('/bai-viet-') and path.endswith('.htm'):
+            n = int(path[len('/bai-viet-'):-len('.htm')])
+            body = ARTICLE_TEMPLATE.format(n=n, paragraphs=self.paragraph_html, links=self._links(n))
+        elif path == '/robots.txt':
+            request.setHeader(b'content-type', b'text/plain')
+            host = request.getRequestHostname().decode()
+            return f'User-agent: *\nSitemap: http://{host}:{request.getHost().port}/sitemap.xml\n'.encode()
+        elif path == '/sitemap.xml':
+            urls = ''.join(
+                f'<url><loc>/bai-viet-{n}.htm</loc><lastmod>2025-05-{n % 28 + 1:02d}T08:00:00+07:00</lastmod></url>'
+                for n in range(self.pages)
+            )
+            request.setHeader(b'content-type', b'application/xml')
+            return ('<?xml version="1.0" encoding="UTF-8"?>'
+                    f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>').encode()
+        else:
+            links = ''.join(
+                f'<h3 class="story__title"><a href="/bai-viet-{n}.htm">Bài viết {n}</a></h3>'
+                for n in range(self.pages)
+            )
+            body = f'<html><body>{links}</body></html>'
+        request.setHeader(b'content-type', b'text/html; charset=utf-8')
+        return body.encode('utf-8')
+
+    def render_GET(self, request):
+        if not self.latency:
+            return self._render(request)
+
+        from twisted.internet import reactor
+
+        def finish():
+            request.write(self._render(request))
+            request.finish()
+
+        reactor.callLater(self.latency, finish)
+        return server.NOT_DONE_YET
+
+
+def listen(hosts, port, **site_kwargs):
+    """Serve one MockNewsSite on every host in `hosts`, return the listening ports."""
+    from twisted.internet import reactor
+
+    site = server.Site(MockNewsSite(**site_kwargs))
+    return [reactor.listenTCP(port, site, interface=host) for host in hosts]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate lookup benchmark
+
+Fills post_fingerprints in a scratch schema with --posts rows (random band
+keys, generated in SQL) plus the real signatures of --stories generated
+articles, then times NearDuplicateIndex.find() for an edited copy of every
+story (another byline, a few words changed, the last paragraph cut or a
+"read more" line added), which should find the story, and for as many new
+articles, which should find nothing. Reports the lookup latency, the
+candidates compared per lookup and the copies found. The articles are made
+of the words of the fixture pages in benchmarks/fixtures/.
+
+    python benchmarks/near_duplicates.py --posts 1000000 --stories 1000 \\
+        -s POSTGRES_HOST=localhost -s POSTGRES_PASSWORD=password
+
+The schema is kept, and reused by the next run with the same --posts;
+--scan also times one lookup comparing every stored signature.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+
+from scrapy.settings import Settings
+
+from scrapy_project.db import connect
+from scrapy_project.near_duplicates import (
+    BANDS, ROWS, NearDuplicateIndex, minhash, similarity, unpack,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+BENCH_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS sites (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id SERIAL PRIMARY KEY,
+    site_id INTEGER REFERENCES sites(id) ON DELETE CASCADE,
+    title VARCHAR(1000) NOT NULL,
+    url VARCHAR(1000)
+);
+INSERT INTO sites (name) VALUES ('near-duplicates-bench') ON CONFLICT DO NOTHING;
+"""
+
+
+def vocabulary():
+    words = set()
+    for path in glob.glob(os.path.join(FIXTURES_DIR, '*', 'expected.json')):
+        with open(path, encoding='utf-8') as f:
+            for page in json.load(f).values():
+                for paragraph in page.get('fields', {}).get('content', []):
+                    words.update(paragraph.split())
+    return sorted(words)
+
+
+def make_article(rng, words, paragraphs=8):
+    return [' '.join(rng.choices(words, k=rng.randint(40, 80))) for _ in range(paragraphs)]
+
+
+def syndicate(rng, paragraphs):
+    """A copy of an article as another site would republish it"""
+    copy = [f"Theo {rng.choice(['VnEconomy', 'CafeF', 'Dân trí', 'TTXVN'])}"] + list(paragraphs)
+    if rng.random() < 0.5:
+        copy.pop()
+    else:
+        copy.append('Xem thêm: Diễn biến thị trường chứng khoán hôm nay')
+    text = ' '.join(copy).split()
+    for _ in range(5):
+        text[rng.randrange(len(text))] = rng.choice(['và', 'của', 'đã', 'trong'])
+    return ' '.join(text)
+
+
+def load(connection, posts):
+    """Create the tables and fill them with `posts` random fingerprints, unless already there"""
+    with connection.cursor() as cursor:
+        cursor.execute(BENCH_TABLES_SQL)
+        NearDuplicateIndex(connection).ensure_schema()
+        cursor.execute("SELECT COUNT(*) FROM posts WHERE url LIKE 'https://example.com/bai-%%'")
+        if cursor.fetchone()[0] == posts:
+            return None
+
+        started = time.perf_counter()
+        cursor.execute("TRUNCATE posts, post_fingerprints, post_duplicates RESTART IDENTITY")
+        cursor.execute("DROP INDEX IF EXISTS idx_post_fingerprints_band_keys")
+        cursor.execute("""
+            INSERT INTO posts (site_id, title, url)
+            SELECT 1, 'Bài ' || g, 'https://example.com/bai-' || g || '.htm'
+            FROM generate_series(1, %s) g
+        """, (posts,))
+        cursor.execute("""
+            INSERT INTO post_fingerprints (post_id, signature, band_keys)
+            SELECT id, decode(repeat(md5(id::text), 16), 'hex'),
+                   ARRAY(SELECT ('x' || substr(md5(id || ':' || band), 1, 16))::bit(64)::bigint
+                         FROM generate_series(1, %s) band)
+            FROM posts
+        """, (BANDS,))
+    connection.commit()
+    NearDuplicateIndex(connection).ensure_schema()
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE posts, post_fingerprints")
+    connection.autocommit = False
+    return time.perf_counter() - started
+
+
+def add_stories(connection, stories):
+    index = NearDuplicateIndex(connection)
+    post_ids = []
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM posts WHERE url LIKE 'https://example.com/story-%%'")
+        for number, paragraphs in enumerate(stories):
+            cursor.execute(
+                "INSERT INTO posts (site_id, title, url) VALUES (1, %s, %s) RETURNING id",
+                (f'Story {number}', f'https://example.com/story-{number}.htm'),
+            )
+            post_id = cursor.fetchone()[0]
+            index.add(post_id, minhash('\n'.join(paragraphs)))
+            post_ids.append(post_id)
+    connection.commit()
+    return post_ids
+
+
+def time_lookups(index, signatures):
+    latencies, candidates, matches = [], [], []
+    for number, signature in enumerate(signatures):
+        # Like NearDuplicatePipeline, leaving out the post the article itself is saved as
+        article = dict(url=f'https://example.com/copy-{number}.htm', title=f'Copy {number}', site_id=1)
+        started = time.perf_counter()
+        matches.append(index.find(signature, **article))
+        latencies.append(time.perf_counter() - started)
+        candidates.append(len(index.candidates(signature)))
+        index.connection.commit()
+    return latencies, candidates, matches
+
+
+def report(label, latencies, candidates):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<28} p50 {statistics.median(latencies) * 1000:6.2f} ms | p95 {p95 * 1000:6.2f} ms "
+          f"| {statistics.mean(candidates):5.2f} candidates per lookup")
+
+
+def full_scan(connection, signature):
+    """The lookup without band keys: compare with every stored signature"""
+    started = time.perf_counter()
+    best = 0
+    with connection.cursor(name='near_duplicates_scan') as cursor:
+        cursor.itersize = 10000
+        cursor.execute("SELECT post_id, signature FROM post_fingerprints")
+        for _, data in cursor:
+            best = max(best, similarity(signature, unpack(data)))
+    connection.commit()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate lookup benchmark')
+    parser.add_argument('--posts', type=int, default=1000000, help='Fingerprints in the table')
+    parser.add_argument('--stories', type=int, default=1000, help='Articles looked up, copies and new')
+    parser.add_argument('--schema', default='near_duplicates_bench')
+    parser.add_argument('--scan', action='store_true', help='Also time a lookup scanning every signature')
+    parser.add_argument('--seed', type=int, default=48)
+    parser.add_argument('-s', dest='settings', action='append', default=[],
+                        help='POSTGRES_* setting as NAME=VALUE')
+    args = parser.parse_args()
+    db_settings = dict(setting.split('=', 1) for setting in args.settings)
+
+    connection = connect(Settings(db_settings))
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {args.schema}")
+        cursor.execute(f"SET search_path TO {args.schema}")
+    connection.commit()
+
+    print(f"📊 Near-duplicate lookup: {args.posts:,} posts, {BANDS} bands of {ROWS} MinHash values")
+    print("-" * 60)
+    loaded = load(connection, args.posts)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_size_pretty(pg_relation_size('idx_post_fingerprints_band_keys')), "
+                       "pg_size_pretty(pg_total_relation_size('post_fingerprints'))")
+        index_size, table_size = cursor.fetchone()
+    connection.commit()
+    print(f"Fingerprints: {'loaded in %.0fs' % loaded if loaded else 'reused'} | "
+          f"band key index {index_size} | table with indexes {table_size}")
+
+    rng = random.Random(args.seed)
+    words = vocabulary()
+    stories = [make_article(rng, words) for _ in range(args.stories)]
+    post_ids = add_stories(connection, stories)
+
+    copies = [syndicate(rng, paragraphs) for paragraphs in stories]
+    new_articles = ['\n'.join(make_article(rng, words)) for _ in range(args.stories)]
+    started = time.perf_counter()
+    copy_signatures = [minhash(text) for text in copies]
+    signing = (time.perf_counter() - started) / len(copies)
+    new_signatures = [minhash(text) for text in new_articles]
+    words_per_article = statistics.mean(len(text.split()) for text in copies)
+    print(f"Signature: {signing * 1000:.2f} ms per article of {words_per_article:.0f} words")
+
+    index = NearDuplicateIndex(connection)
+    latencies, candidates, matches = time_lookups(index, copy_signatures)
+    found = sum(match is not None and match[0] == post_id for match, post_id in zip(matches, post_ids))
+    report('copies of stored stories', latencies, candidates)
+    latencies, candidates, matches = time_lookups(index, new_signatures)
+    report('new articles', latencies, candidates)
+    print("-" * 60)
+    print(f"Copies linked to their story: {found}/{len(copies)} | "
+          f"new articles linked: {sum(match is not None for match in matches)}/{len(new_articles)}")
+
+    if args.scan:
+        print(f"Full scan of {args.posts:,} signatures: {full_scan(connection, copy_signatures[0]):.2f}s per lookup")
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Long-running crawl scheduler
+Run with: python crawler_manager.py daemon
+
+Keeps one Twisted reactor and one set of Scrapy settings alive and starts
+the financial news spider for each site through CrawlerRunner whenever
+the site's crawl_profile interval_minutes has passed since its last run.
+Runs of different sites overlap, runs of one site never do. Every run is
+recorded in the crawl_runs table (python crawler_manager.py history).
+Site configs are re-read from the sites table when their config_version
+changes, so edited selectors and intervals apply from the next run on.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+SCRAPY_PROJECT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapy_project')
+sys.path.insert(0, SCRAPY_PROJECT_PATH)
+os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'scrapy_project.settings')
+
+CRAWL_RUNS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    id SERIAL PRIMARY KEY,
+    crawl_id VARCHAR(100) NOT NULL,
+    site VARCHAR(255) NOT NULL,
+    discovery VARCHAR(32) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    finish_reason VARCHAR(100),
+    items_scraped INTEGER,
+    pages_fetched INTEGER,
+    errors INTEGER,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
+);
+-- Outcomes of the run's posts upserts (PostgresPipeline's posts/* stats)
+ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS posts_inserted INTEGER;
+ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS posts_updated INTEGER;
+ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS posts_unchanged INTEGER;
+CREATE INDEX IF NOT EXISTS idx_crawl_runs_site_started_at ON crawl_runs (site, started_at DESC);
+"""
+
+
+class CrawlDaemon:
+    """Starts per-site crawls on their interval inside one reactor"""
+
+    def __init__(self, runner, spidercls, discovery='homepage', tick_seconds=30):
+        from scrapy_project.db import connect
+        from scrapy_project.site_config import SiteConfigStore
+
+        self.runner = runner
+        self.spidercls = spidercls
+        self.discovery = discovery
+        self.tick_seconds = tick_seconds
+        self.connection = connect(runner.settings)
+        self.site_store = SiteConfigStore(self.connection)
+        self.site_store.ensure_schema()
+        self.site_versions = None
+        # domain -> minutes between two runs, for the enabled sites
+        self.intervals = {}
+        self.running = {}
+        # domain -> start of its last run, read from crawl_runs on the first tick
+        self.last_started = None
+        self.reload_sites()
+
+    def reset_connection(self):
+        """Roll back the failed transaction, or reconnect if the connection is gone"""
+        from scrapy_project.db import connect
+        from scrapy_project.site_config import SiteConfigStore
+
+        if not self.connection.closed:
+            try:
+                self.connection.rollback()
+                return
+            except Exception:
+                self.connection.close()
+        try:
+            self.connection = connect(self.runner.settings)
+        except Exception as e:
+            print(f"❌ Database unavailable, retrying on the next tick: {e}")
+            return
+        self.site_store = SiteConfigStore(self.connection)
+        print("🔌 Reconnected to the database")
+
+    def reload_sites(self):
+        """Re-read the site configs if any config_version changed, return True if so"""
+        from scrapy_project.site_config import load_site_configs
+
+        try:
+            versions = self.site_store.versions()
+        except Exception as e:
+            print(f"❌ Failed to check site config versions: {e}")
+            self.reset_connection()
+            return False
+        if versions == self.site_versions:
+            return False
+        self.site_versions = versions
+        site_configs = self.spidercls.site_configs or load_site_configs(self.runner.settings)
+        self.intervals = {
+            domain: config['crawl_profile']['interval_minutes']
+            for domain, config in site_configs.items()
+        }
+        return True
+
+    def start(self):
+        from twisted.internet import reactor
+        from twisted.internet.task import LoopingCall
+
+        reactor.addSystemEventTrigger('before', 'shutdown', self.stop)
+        for domain, minutes in self.intervals.items():
+            print(f"⏰ {domain}: every {minutes:g} minutes")
+        self.task = LoopingCall(self.tick)
+        self.task.start(self.tick_seconds).addErrback(self.task_failed)
+
+    def task_failed(self, failure):
+        """Keep scheduling after an error that escaped tick()"""
+        print(f"❌ Scheduling loop failed, restarting it: {failure.getErrorMessage()}")
+        if not self.task.running:
+            self.task.start(self.tick_seconds, now=False).addErrback(self.task_failed)
+
+    def load_history(self):
+        """Pick up the schedule where the previous daemon left it"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(CRAWL_RUNS_TABLE_SQL)
+            # Runs of a daemon that died without closing them
+            cursor.execute("""
+                UPDATE crawl_runs SET status = 'interrupted', finished_at = NOW()
+                WHERE status = 'running'
+            """)
+            cursor.execute("""
+                SELECT site, MAX(started_at) FROM crawl_runs
+                WHERE discovery = %s GROUP BY site
+            """, (self.discovery,))
+            self.last_started = dict(cursor.fetchall())
+        self.connection.commit()
+
+    def tick(self):
+        # An error here must not end the LoopingCall: the next tick tries again
+        try:
+            self.schedule_runs()
+        except Exception as e:
+            print(f"❌ Scheduling tick failed: {e}")
+            self.reset_connection()
+
+    def schedule_runs(self):
+        if self.last_started is None:
+            self.load_history()
+        if self.reload_sites():
+            print(f"🔄 Site configs changed, now scheduling {', '.join(sorted(self.intervals)) or 'no sites'}")
+            for domain, minutes in self.intervals.items():
+                print(f"⏰ {domain}: every {minutes:g} minutes")
+        now = datetime.now(timezone.utc)
+        for domain, minutes in self.intervals.items():
+            if domain in self.running:
+                continue
+            last_started = self.last_started.get(domain)
+            if last_started is None or now - last_started >= timedelta(minutes=minutes):
+                self.start_run(domain, now)
+
+    def start_run(self, domain, now):
+        from scrapy.crawler import Crawler
+
+        crawl_id = f"{self.spidercls.name}-{domain}-{now.strftime('%Y%m%d%H%M%S')}"
+        settings = self.runner.settings.copy()
+        settings.set('FRONTIER_CRAWL_ID', crawl_id, priority='cmdline')
+        crawler = Crawler(self.spidercls, settings)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO crawl_runs (crawl_id, site, discovery, started_at)
+                VALUES (%s, %s, %s, %s) RETURNING id
+            """, (crawl_id, domain, self.discovery, now))
+            run_id = cursor.fetchone()[0]
+        self.connection.commit()
+
+        print(f"🕷️  [{now:%Y-%m-%d %H:%M:%S}] Starting run {run_id} for {domain} ({crawl_id})")
+        self.last_started[domain] = now
+        d = self.runner.crawl(crawler, discovery=self.discovery, sites=domain)
+        d.addBoth(self.run_finished, run_id, domain, crawler, crawl_id)
+        self.running[domain] = d
+
+    def run_finished(self, result, run_id, domain, crawler, crawl_id):
+        from twisted.python.failure import Failure
+
+        self.running.pop(domain, None)
+        # A crawl that failed while starting up has no stats
+        stats = crawler.stats.get_stats() if crawler.stats is not None else {}
+        reason = stats.get('finish_reason')
+        if reason is None:
+            reason = f"error: {result.getErrorMessage()}"[:100] if isinstance(result, Failure) else 'failed'
+        status = 'finished' if reason == 'finished' else 'interrupted' if reason == 'shutdown' else 'failed'
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE crawl_runs SET
+                        status = %s, finish_reason = %s, items_scraped = %s,
+                        pages_fetched = %s, errors = %s, posts_inserted = %s,
+                        posts_updated = %s, posts_unchanged = %s, finished_at = NOW()
+                    WHERE id = %s
+                """, (
+                    status, reason,
+                    stats.get('item_scraped_count', 0),
+                    stats.get('response_received_count', 0),
+                    stats.get('log_count/ERROR', 0),
+                    stats.get('posts/inserted', 0),
+                    stats.get('posts/updated', 0),
+                    stats.get('posts/unchanged', 0),
+                    run_id,
+                ))
+            self.connection.commit()
+        except Exception as e:
+            print(f"❌ Failed to record run {run_id}: {e}")
+            self.reset_connection()
+        print(f"🏁 Run {run_id} for {domain} {status}: {stats.get('item_scraped_count', 0)} items "
+              f"({stats.get('posts/inserted', 0)} new, {stats.get('posts/updated', 0)} updated, "
+              f"{stats.get('posts/unchanged', 0)} unchanged)")
+        self.prune_crawls(crawl_id)
+
+    def prune_crawls(self, crawl_id):
+        """Delete the run's frontier and checkpoint, and those of runs left behind"""
+        from scrapy_project.checkpoint import CheckpointStore, prune_checkpoints
+        from scrapy_project.frontier import delete_crawl_frontier, prune_frontier
+
+        days = self.runner.settings.getint('DAEMON_CRAWL_RETENTION_DAYS', 7)
+        try:
+            rows = delete_crawl_frontier(self.connection, crawl_id)
+            CheckpointStore(self.connection).delete(crawl_id)
+            rows += prune_frontier(self.connection, days)
+            prune_checkpoints(self.connection, days)
+        except Exception as e:
+            print(f"❌ Failed to prune crawl {crawl_id}: {e}")
+            self.reset_connection()
+            return
+        if rows:
+            print(f"🧹 Pruned {rows} frontier requests")
+
+    def stop(self):
+        from twisted.internet.defer import DeferredList
+
+        print("🛑 Stopping crawl daemon, waiting for running crawls to close...")
+        if self.task.running:
+            self.task.stop()
+        # Wait for run_finished of every run, not just for the engines to stop
+        runs = DeferredList(list(self.running.values()))
+        self.runner.stop()
+        runs.addBoth(lambda _: self.connection.close())
+        return runs
+
+
+def run_daemon(discovery='homepage', tick_seconds=30):
+    """Run scheduled crawls until interrupted (Ctrl+C)"""
+    from scrapy.utils.project import get_project_settings
+    from scrapy.utils.reactor import install_reactor
+
+    # Settings are evaluated once, so the daemon writes a single log file
+    settings = get_project_settings()
+    install_reactor(settings['TWISTED_REACTOR'])
+
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.log import configure_logging
+    from twisted.internet import reactor
+
+    from scrapy_project.spiders.financial_news import FinancialNewsSpider
+
+    settings.set('SCHEDULER', 'scrapy_project.frontier.PostgresFrontierScheduler', priority='cmdline')
+    configure_logging(settings)
+    runner = CrawlerRunner(settings)
+    daemon = CrawlDaemon(runner, FinancialNewsSpider, discovery, tick_seconds)
+    reactor.callWhenRunning(daemon.start)
+    reactor.run()
@@ -4,7 +4,10 @@ Financial News Crawler Management Script
 Run with: python crawler_manager.py [command]
 
 Commands:
-- crawl: Run the financial news crawler
+- crawl: Run the financial news crawler (--discovery homepage|sitemap, --workers N, --resume)
+- daemon: Keep running and crawl each site on its crawl_profile interval
+- history: Show recent daemon runs
+- sites: Show site configs (--load to load the YAML files in sites/)
 - setup: Set up database tables
 - test: Test database connection
 - clean: Clean old data
@@ -31,6 +34,7 @@ DB_CONFIG = {
 }
 
 SCRAPY_PROJECT_PATH = os.path.join(os.path.dirname(__file__), 'scrapy_project')
+sys.path.insert(0, os.path.abspath(SCRAPY_PROJECT_PATH))
 
 
 def test_database_connection():
@@ -67,22 +71,20 @@ def test_database_connection():
 
 def setup_database():
     """Set up database tables"""
+    # Tables owned by a crawler component are defined next to the code using them
+    from crawl_daemon import CRAWL_RUNS_TABLE_SQL
+    from scrapy_project.checkpoint import CHECKPOINTS_TABLE_SQL
+    from scrapy_project.conditional import VALIDATORS_TABLE_SQL
+    from scrapy_project.discovery import CRAWL_STATE_TABLE_SQL
+    from scrapy_project.frontier import FRONTIER_TABLE_SQL
+    from scrapy_project.near_duplicates import NEAR_DUPLICATES_TABLE_SQL
+    from scrapy_project.seen_urls import SEEN_URLS_TABLE_SQL
+    from scrapy_project.site_config import SITES_TABLE_SQL
+
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
-        # Create sites table
-        sites_table = """
-        CREATE TABLE IF NOT EXISTS sites (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(255) NOT NULL UNIQUE,
-            base_url VARCHAR(500) NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-        
         # Create posts table
         posts_table = """
         CREATE TABLE IF NOT EXISTS posts (
@@ -95,12 +97,23 @@ def setup_database():
             author VARCHAR(255),
             tags TEXT[],
             image_url VARCHAR(1000),
-            published_date TIMESTAMP,
+            published_date TIMESTAMPTZ,
             scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(title, site_id)
         );
+        ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+        -- Dates saved before they carried a zone were Vietnam dates
+        DO $$
+        BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'posts'
+                  AND column_name = 'published_date') = 'timestamp without time zone' THEN
+                ALTER TABLE posts ALTER COLUMN published_date TYPE TIMESTAMPTZ
+                    USING published_date AT TIME ZONE 'Asia/Ho_Chi_Minh';
+            END IF;
+        END $$;
         """
         
         # Create indexes
@@ -114,30 +127,29 @@ def setup_database():
         ]
         
         print("📊 Creating database tables...")
-        cursor.execute(sites_table)
+        cursor.execute(SITES_TABLE_SQL)
         cursor.execute(posts_table)
+        cursor.execute(NEAR_DUPLICATES_TABLE_SQL)
+        cursor.execute(SEEN_URLS_TABLE_SQL)
+        cursor.execute(VALIDATORS_TABLE_SQL)
+        cursor.execute(CRAWL_STATE_TABLE_SQL)
+        cursor.execute(FRONTIER_TABLE_SQL)
+        cursor.execute(CHECKPOINTS_TABLE_SQL)
+        cursor.execute(CRAWL_RUNS_TABLE_SQL)
         
         print("📊 Creating indexes...")
         for index in indexes:
             cursor.execute(index)
         
-        # Insert initial site data
-        print("📊 Inserting initial site data...")
-        sites_data = [
-            (1, 'VnEconomy', 'https://vneconomy.vn', 'Vietnam Economic News'),
-            (2, 'Dân Trí Finance', 'https://fica.dantri.com.vn', 'Dân Trí Financial News'),
-            (3, 'CafeF', 'https://cafef.vn', 'CafeF Financial News'),
-            (4, 'Vietnam Finance', 'https://vietnamfinance.vn', 'Vietnam Finance News'),
-            (5, 'StockBiz', 'https://stockbiz.vn', 'StockBiz Financial News')
-        ]
+        conn.commit()
         
-        for site_data in sites_data:
-            cursor.execute("""
-                INSERT INTO sites (id, name, base_url, description)
-                VALUES (%s, %s, %s, %s);
-            """, site_data)
+        # Insert initial site data from the seed files in sites/
+        print("📊 Loading site configs...")
+        from scrapy_project.site_config import SiteConfigStore, read_seed_files
+        store = SiteConfigStore(conn)
+        for raw in read_seed_files():
+            store.save(raw)
         
-        conn.commit()
         conn.close()
         
         print("✅ Database setup completed successfully!")
@@ -148,19 +160,76 @@ def setup_database():
         return False
 
 
-def run_crawler():
-    """Run the financial news crawler"""
+def find_resumable_crawl(crawl_id=None):
+    """Return (crawl_id, discovery) of the crawl to resume, or None
+
+    Without a crawl id, the most recent crawl that did not finish is picked.
+    """
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT crawl_id, discovery, status, scraped_articles, updated_at
+            FROM crawl_checkpoints
+            WHERE spider = 'financial_news'
+              AND (crawl_id = %s OR (%s IS NULL AND status <> 'finished'))
+            ORDER BY updated_at DESC
+            LIMIT 1;
+        """, (crawl_id, crawl_id))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return None
+        
+        crawl_id, discovery, status, scraped_articles, updated_at = row
+        # Expired leases belong to workers that are gone; leases still running
+        # may belong to workers of the crawl on another machine
+        cursor.execute("""
+            UPDATE crawl_frontier
+            SET status = 'pending', leased_by = NULL, leased_until = NULL, updated_at = NOW()
+            WHERE crawl_id = %s AND status = 'leased' AND leased_until < NOW();
+        """, (crawl_id,))
+        released = cursor.rowcount
+        cursor.execute("""
+            SELECT COUNT(*) FILTER (WHERE status = 'pending'), COUNT(*) FILTER (WHERE status = 'leased')
+            FROM crawl_frontier
+            WHERE crawl_id = %s;
+        """, (crawl_id,))
+        pending, leased = cursor.fetchone()
+        conn.commit()
+        conn.close()
+        
+        print(f"♻️  Resuming {crawl_id} ({status}, last checkpoint {updated_at:%Y-%m-%d %H:%M:%S})")
+        print(f"   {scraped_articles} articles scraped so far, {pending} requests pending "
+              f"({released} released from the previous run), {leased} leased by running workers")
+        return crawl_id, discovery
+        
+    except Exception as e:
+        print(f"❌ Failed to load crawl checkpoint: {e}")
+        return None
+
+
+def run_crawler(discovery='homepage', workers=1, crawl_id=None):
+    """Run the financial news crawler
+
+    The request queue lives in the crawl_frontier table, so an interrupted
+    crawl can be resumed with its crawl id. With more than one worker, that
+    many spider processes share the crawl. Running the same command with
+    the same --crawl-id on other machines adds them to the crawl.
+    """
     if not os.path.exists(SCRAPY_PROJECT_PATH):
         print(f"❌ Scrapy project not found at: {SCRAPY_PROJECT_PATH}")
         return False
     
     print("🕷️  Starting financial news crawler...")
     print(f"📂 Project path: {SCRAPY_PROJECT_PATH}")
+    print(f"🧭 Discovery mode: {discovery}")
     
     try:
         # Change to scrapy project directory and run spider
         cmd = [
             'scrapy', 'crawl', 'financial_news',
+            '-a', f'discovery={discovery}',
             '-s', 'LOG_LEVEL=DEBUG',
             '-s', f'POSTGRES_HOST={DB_CONFIG["host"]}',
             '-s', f'POSTGRES_PORT={DB_CONFIG["port"]}',
@@ -169,21 +238,25 @@ def run_crawler():
             '-s', f'POSTGRES_PASSWORD={DB_CONFIG["password"]}'
         ]
         
-        result = subprocess.run(
-            cmd,
-            cwd=SCRAPY_PROJECT_PATH,
-            capture_output=False,
-            text=True
-        )
+        crawl_id = crawl_id or f"financial_news-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        cmd += [
+            '-s', 'SCHEDULER=scrapy_project.frontier.PostgresFrontierScheduler',
+            '-s', f'FRONTIER_CRAWL_ID={crawl_id}',
+        ]
+        print(f"🗂️  Frontier: {crawl_id} ({workers} workers)")
+        
+        processes = [
+            subprocess.Popen(cmd, cwd=SCRAPY_PROJECT_PATH, text=True)
+            for _ in range(max(workers, 1))
+        ]
+        returncodes = [process.wait() for process in processes]
         
-        if result.returncode == 0:
+        if all(code == 0 for code in returncodes):
             print("✅ Crawler completed successfully!")
-            print("Output:", result.stdout[-500:])  # Show last 500 chars
         else:
-            print("❌ Crawler failed!")
-            print("Error:", result.stderr)
+            print(f"❌ Crawler failed! Exit codes: {returncodes}")
             
-        return result.returncode == 0
+        return all(code == 0 for code in returncodes)
         
     except Exception as e:
         print(f"❌ Failed to run crawler: {e}")
@@ -191,7 +264,10 @@ def run_crawler():
 
 
 def clean_old_data(days=30):
-    """Clean old scraped data"""
+    """Clean old scraped data and the frontier and checkpoints of old crawls"""
+    from scrapy_project.checkpoint import prune_checkpoints
+    from scrapy_project.frontier import prune_frontier
+    
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
@@ -205,9 +281,14 @@ def clean_old_data(days=30):
         
         deleted_count = cursor.rowcount
         conn.commit()
+        
+        frontier_rows = prune_frontier(conn, days)
+        checkpoints = prune_checkpoints(conn, days)
         conn.close()
         
         print(f"✅ Cleaned {deleted_count} posts older than {days} days")
+        print(f"✅ Pruned {frontier_rows} frontier requests and {checkpoints} checkpoints "
+              f"of crawls idle for {days} days")
         return True
         
     except Exception as e:
@@ -255,6 +336,13 @@ def show_stats():
         print(f"Total posts: {total_posts}")
         print(f"Posts in last 24h: {recent_posts}")
         
+        # Copies linked to a canonical post instead of stored
+        cursor.execute("SELECT to_regclass('post_duplicates') IS NOT NULL;")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT canonical_post_id) FROM post_duplicates;")
+            duplicates, canonical_posts = cursor.fetchone()
+            print(f"Near duplicates linked: {duplicates} (of {canonical_posts} posts)")
+        
         conn.close()
         return True
         
@@ -263,12 +351,120 @@ def show_stats():
         return False
 
 
+def show_run_history(limit=20):
+    """Show recent crawl daemon runs"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, site, status, items_scraped, pages_fetched, errors,
+                   posts_inserted, posts_updated, posts_unchanged,
+                   started_at, finished_at - started_at AS duration
+            FROM crawl_runs
+            ORDER BY started_at DESC
+            LIMIT %s;
+        """, (limit,))
+        
+        print("\n📜 Crawl History:")
+        print("-" * 114)
+        print(f"{'Run':<6} {'Site':<20} {'Status':<12} {'Items':<7} {'Pages':<7} {'Errors':<7} "
+              f"{'New':<7} {'Updated':<8} {'Same':<7} {'Started':<18} {'Duration':<10}")
+        print("-" * 114)
+        
+        for row in cursor.fetchall():
+            run_id, site, status, items, pages, errors, inserted, updated, unchanged, started_at, duration = row
+            duration_str = str(duration).split('.')[0] if duration else '-'
+            print(f"{run_id:<6} {site:<20} {status:<12} {items or 0:<7} {pages or 0:<7} {errors or 0:<7} "
+                  f"{inserted or 0:<7} {updated or 0:<8} {unchanged or 0:<7} "
+                  f"{started_at.strftime('%Y-%m-%d %H:%M'):<18} {duration_str:<10}")
+        
+        conn.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ Failed to get crawl history: {e}")
+        return False
+
+
+def load_site_configs(seed_dir=None):
+    """Validate the site config files and store the changed ones"""
+    from scrapy_project.site_config import SEED_DIR, SiteConfigError, SiteConfigStore, read_seed_files
+    
+    seed_dir = seed_dir or SEED_DIR
+    try:
+        raw_configs = read_seed_files(seed_dir)
+    except Exception as e:
+        print(f"❌ Failed to read site configs in {seed_dir}: {e}")
+        return False
+    
+    conn = psycopg2.connect(**DB_CONFIG)
+    store = SiteConfigStore(conn)
+    store.ensure_schema()
+    previous = store.versions()
+    ok = True
+    for raw in raw_configs:
+        try:
+            version = store.save(raw)
+        except SiteConfigError as e:
+            print(f"❌ {e}")
+            ok = False
+            continue
+        old_version = previous.get(raw['id'], (0, None))[0]
+        state = 'unchanged' if version == old_version else f'v{old_version} -> v{version}'
+        print(f"✅ {raw['name']}: {state}")
+    conn.close()
+    return ok
+
+
+def show_sites():
+    """Show site configs and their versions"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, base_url, config_version, enabled, updated_at
+            FROM sites
+            ORDER BY id;
+        """)
+        
+        print("\n🌐 Sites:")
+        print("-" * 90)
+        print(f"{'ID':<4} {'Name':<20} {'Base URL':<32} {'Version':<8} {'Enabled':<8} {'Updated':<18}")
+        print("-" * 90)
+        
+        for row in cursor.fetchall():
+            site_id, name, base_url, version, enabled, updated_at = row
+            updated_str = updated_at.strftime('%Y-%m-%d %H:%M') if updated_at else '-'
+            print(f"{site_id:<4} {name:<20} {base_url:<32} {version:<8} {'yes' if enabled else 'no':<8} {updated_str:<18}")
+        
+        conn.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ Failed to get sites: {e}")
+        return False
+
+
 def main():
     parser = argparse.ArgumentParser(description='Financial News Crawler Manager')
-    parser.add_argument('command', choices=['crawl', 'setup', 'test', 'clean', 'stats'],
+    parser.add_argument('command', choices=['crawl', 'daemon', 'history', 'sites', 'setup', 'test', 'clean', 'stats'],
                        help='Command to execute')
     parser.add_argument('--days', type=int, default=30,
                        help='Days to keep data (for clean command)')
+    parser.add_argument('--discovery', choices=['homepage', 'sitemap'], default='homepage',
+                       help='How the crawl command finds articles: homepage links or sitemaps/RSS feeds')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Spider processes sharing the crawl through the Postgres frontier')
+    parser.add_argument('--crawl-id',
+                       help='Frontier crawl id, to join a crawl started on another machine')
+    parser.add_argument('--limit', type=int, default=20,
+                       help='Runs to show (for history command)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the last interrupted crawl (or --crawl-id) where it stopped')
+    parser.add_argument('--load', action='store_true',
+                       help='Validate and store the site config files (for sites command)')
+    parser.add_argument('--sites-dir',
+                       help='Directory of site config files (default: sites/)')
     
     args = parser.parse_args()
     
@@ -285,9 +481,32 @@ def main():
         
     elif args.command == 'crawl':
         if test_database_connection():
-            run_crawler()
+            if args.resume:
+                resumable = find_resumable_crawl(args.crawl_id)
+                if resumable is None:
+                    print("⚠️  No interrupted crawl to resume")
+                else:
+                    crawl_id, discovery = resumable
+                    run_crawler(discovery or args.discovery, args.workers, crawl_id)
+            else:
+                run_crawler(args.discovery, args.workers, args.crawl_id)
             show_stats()
         
+    elif args.command == 'daemon':
+        if test_database_connection():
+            from crawl_daemon import run_daemon
+            run_daemon(args.discovery)
+        
+    elif args.command == 'history':
+        if test_database_connection():
+            show_run_history(args.limit)
+        
+    elif args.command == 'sites':
+        if test_database_connection():
+            if args.load:
+                load_site_configs(args.sites_dir)
+            show_sites()
+        
     elif args.command == 'clean':
         if test_database_connection():
             clean_old_data(args.days)
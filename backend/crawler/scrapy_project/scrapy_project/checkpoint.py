@@ -0,0 +1,204 @@
+"""
+Crawl checkpoints for crash-safe resume
+
+A crawl running on the shared frontier (scrapy_project.frontier) already
+has its request queue in PostgreSQL. CheckpointExtension adds the rest of
+the crawl's state: every CHECKPOINT_INTERVAL seconds it flushes the
+frontier's buffered writes and saves the spider's counters to the
+crawl_checkpoints table. A crawl restarted with the same FRONTIER_CRAWL_ID
+(python crawler_manager.py crawl --resume) picks up its counters here and
+its remaining requests from the frontier.
+
+A crawl that finishes with nothing left in its frontier has its checkpoint
+deleted; checkpoints of crawls idle for `crawler_manager.py clean --days`
+are removed by prune_checkpoints().
+
+Spiders opt in by implementing `checkpoint_state()`, returning a dict with
+the CHECKPOINT_COUNTERS, and `restore_checkpoint(checkpoint)`.
+"""
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet.task import LoopingCall
+
+from scrapy_project.db import connect
+
+CHECKPOINTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    crawl_id VARCHAR(100) PRIMARY KEY,
+    spider VARCHAR(100) NOT NULL,
+    discovery VARCHAR(32),
+    started_at TIMESTAMPTZ NOT NULL,
+    scraped_articles INTEGER NOT NULL DEFAULT 0,
+    failed_articles INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    checkpoints INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+# Spider counters kept in crawl_checkpoints, summed over all workers
+CHECKPOINT_COUNTERS = ('scraped_articles', 'failed_articles')
+
+
+class CheckpointStore:
+    """crawl_checkpoints rows, one per crawl id"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def load(self, crawl_id):
+        """Create the table if needed and return the crawl's checkpoint, or None"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(CHECKPOINTS_TABLE_SQL)
+            cursor.execute(
+                "SELECT discovery, started_at, scraped_articles, failed_articles, status "
+                "FROM crawl_checkpoints WHERE crawl_id = %s",
+                (crawl_id,),
+            )
+            row = cursor.fetchone()
+        self.connection.commit()
+        if row is None:
+            return None
+        discovery, started_at, scraped_articles, failed_articles, status = row
+        return {
+            'discovery': discovery,
+            'started_at': started_at,
+            'scraped_articles': scraped_articles,
+            'failed_articles': failed_articles,
+            'status': status,
+        }
+
+    def save(self, crawl_id, spider_name, state, deltas, status):
+        """Add this worker's counter increments to the crawl's checkpoint"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO crawl_checkpoints
+                        (crawl_id, spider, discovery, started_at, scraped_articles, failed_articles, status, checkpoints)
+                    VALUES (%(crawl_id)s, %(spider)s, %(discovery)s, %(started_at)s,
+                            %(scraped_articles)s, %(failed_articles)s, %(status)s, 1)
+                    ON CONFLICT (crawl_id) DO UPDATE SET
+                        scraped_articles = crawl_checkpoints.scraped_articles + EXCLUDED.scraped_articles,
+                        failed_articles = crawl_checkpoints.failed_articles + EXCLUDED.failed_articles,
+                        status = EXCLUDED.status,
+                        checkpoints = crawl_checkpoints.checkpoints + 1,
+                        updated_at = NOW()
+                """, {
+                    'crawl_id': crawl_id,
+                    'spider': spider_name,
+                    'discovery': state.get('discovery'),
+                    'started_at': state['started_at'],
+                    'status': status,
+                    **deltas,
+                })
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def delete(self, crawl_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM crawl_checkpoints WHERE crawl_id = %s", (crawl_id,))
+        self.connection.commit()
+
+
+def prune_checkpoints(connection, days):
+    """Delete the checkpoints of crawls not updated in the last `days` days"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CHECKPOINTS_TABLE_SQL)
+            cursor.execute(
+                "DELETE FROM crawl_checkpoints WHERE updated_at < NOW() - make_interval(days => %s)",
+                (days,),
+            )
+            deleted = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return deleted
+
+
+class CheckpointExtension:
+    """Periodically saves spider counters and flushes the frontier of a resumable crawl"""
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CHECKPOINT_ENABLED', True):
+            raise NotConfigured
+        # Only a crawl with a persistent frontier can be resumed
+        self.crawl_id = settings.get('FRONTIER_CRAWL_ID')
+        if not self.crawl_id:
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.interval = settings.getfloat('CHECKPOINT_INTERVAL', 30.0)
+        self.store = None
+        self.task = None
+        self._saved = dict.fromkeys(CHECKPOINT_COUNTERS, 0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        if not hasattr(spider, 'checkpoint_state'):
+            return
+        try:
+            self.store = CheckpointStore(connect(self.crawler.settings))
+            checkpoint = self.store.load(self.crawl_id)
+        except Exception as e:
+            spider.logger.error(f"❌ Checkpoint store unavailable, crawling without checkpoints: {e}")
+            self.store = None
+            return
+
+        if checkpoint is not None:
+            spider.restore_checkpoint(checkpoint)
+            self.stats.set_value('checkpoint/resumed', True)
+            spider.logger.info(
+                f"♻️  Resuming crawl '{self.crawl_id}' started at {checkpoint['started_at']} "
+                f"({checkpoint['scraped_articles']} articles scraped, {checkpoint['failed_articles']} failed)"
+            )
+        # Counters restored from the checkpoint are not this worker's to add again
+        state = spider.checkpoint_state()
+        self._saved = {name: state[name] for name in CHECKPOINT_COUNTERS}
+
+        self.task = LoopingCall(self.save, spider, 'running')
+        self.task.start(self.interval, now=True)
+
+    def spider_closed(self, spider, reason):
+        if self.store is None:
+            return
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        # The scheduler closes first and counts what the crawl has left
+        if reason == 'finished' and self.stats.get_value('frontier/unfinished') == 0:
+            try:
+                self.store.delete(self.crawl_id)
+                spider.logger.info(f"🧹 Crawl '{self.crawl_id}' complete, checkpoint deleted")
+            except Exception as e:
+                self.store.connection.rollback()
+                spider.logger.error(f"❌ Error deleting checkpoint: {e}")
+        else:
+            self.save(spider, 'finished' if reason == 'finished' else 'interrupted')
+        self.store.connection.close()
+
+    def save(self, spider, status):
+        # Requests and completions the frontier still buffers belong in the checkpoint
+        slot = getattr(self.crawler.engine, '_slot', None)
+        scheduler = slot.scheduler if slot is not None else None
+        state = spider.checkpoint_state()
+        deltas = {name: state[name] - self._saved[name] for name in CHECKPOINT_COUNTERS}
+        try:
+            if hasattr(scheduler, 'flush'):
+                scheduler.flush()
+            self.store.save(self.crawl_id, spider.name, state, deltas, status)
+        except Exception as e:
+            spider.logger.error(f"❌ Error saving checkpoint: {e}")
+            return
+        self._saved = {name: state[name] for name in CHECKPOINT_COUNTERS}
+        self.stats.inc_value('checkpoint/saved')
@@ -0,0 +1,198 @@
+"""
+Conditional re-fetching with HTTP validators
+
+For every page fetched the ETag, Last-Modified and a hash of the body are
+kept in the crawl_page_validators table. When the page is requested again
+they are sent as If-None-Match / If-Modified-Since. A 304 answer, or a 200
+whose body hash did not change (servers that ignore validators), is
+dropped in the downloader: the callback never runs and nothing is written.
+"""
+
+import hashlib
+
+from psycopg2.extras import execute_values
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
+
+from scrapy_project.db import connect
+from scrapy_project.seen_urls import url_fingerprint
+
+VALIDATORS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_page_validators (
+    fingerprint BIGINT PRIMARY KEY,
+    url VARCHAR(1000) NOT NULL,
+    etag VARCHAR(255),
+    last_modified VARCHAR(64),
+    content_hash CHAR(40),
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class NotModified(IgnoreRequest):
+    """The page has not changed since its validators were stored"""
+
+
+class ValidatorStore:
+    """crawl_page_validators rows cached in memory for the length of a crawl"""
+
+    def __init__(self, connection, flush_size=100):
+        self.connection = connection
+        self.flush_size = flush_size
+        self.validators = {}
+        self.pending = {}
+
+    def load(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(VALIDATORS_TABLE_SQL)
+            cursor.execute(
+                "SELECT fingerprint, etag, last_modified, content_hash FROM crawl_page_validators"
+            )
+            for fingerprint, etag, last_modified, content_hash in cursor.fetchall():
+                self.validators[fingerprint] = (etag, last_modified, content_hash)
+        self.connection.commit()
+        return len(self.validators)
+
+    def get(self, fingerprint):
+        return self.validators.get(fingerprint)
+
+    def save(self, fingerprint, url, etag, last_modified, content_hash):
+        self.validators[fingerprint] = (etag, last_modified, content_hash)
+        self.pending[fingerprint] = (fingerprint, url[:1000], etag, last_modified, content_hash)
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        rows = list(self.pending.values())
+        try:
+            with self.connection.cursor() as cursor:
+                execute_values(cursor, """
+                    INSERT INTO crawl_page_validators (fingerprint, url, etag, last_modified, content_hash)
+                    VALUES %s
+                    ON CONFLICT (fingerprint) DO UPDATE SET
+                        url = EXCLUDED.url,
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        content_hash = EXCLUDED.content_hash,
+                        fetched_at = CURRENT_TIMESTAMP
+                """, rows)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.pending.clear()
+        return len(rows)
+
+
+class ConditionalRequestMiddleware:
+    """Downloader middleware sending stored validators and dropping unchanged pages
+
+    Validators of article pages (meta['article']) are only stored once the
+    article's item has been scraped, so an article that failed to parse or
+    save is fetched in full again next time. Set meta['dont_revalidate'] to
+    always fetch a page in full, as the spider does for the homepages,
+    sitemaps and feeds it takes article links from.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.enabled = crawler.settings.getbool('CONDITIONAL_REQUESTS_ENABLED', True)
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.item_scraped, signal=signals.item_scraped)
+        return s
+
+    def spider_opened(self, spider):
+        if not self.enabled:
+            return
+        try:
+            self.store = ValidatorStore(connect(self.crawler.settings))
+            loaded = self.store.load()
+        except Exception as e:
+            spider.logger.error(f"❌ Page validators unavailable, fetching everything in full: {e}")
+            self.store = None
+            return
+        spider.logger.info(f"🏷️  Loaded validators for {loaded} pages")
+
+    def spider_closed(self, spider):
+        if self.store is None:
+            return
+        try:
+            self.store.flush()
+        except Exception as e:
+            spider.logger.error(f"❌ Error saving page validators: {e}")
+        self.store.connection.close()
+
+    def _save(self, pending, spider):
+        try:
+            self.store.save(*pending)
+        except Exception as e:
+            spider.logger.error(f"❌ Error saving page validators: {e}")
+
+    def item_scraped(self, item, response, spider):
+        pending = response.meta.get('page_validators')
+        if self.store is not None and pending:
+            self._save(pending, spider)
+
+    def process_request(self, request, spider):
+        if self.store is None or request.meta.get('dont_revalidate') or request.method != 'GET':
+            return None
+
+        fingerprint = url_fingerprint(request.url)
+        request.meta['validator_fingerprint'] = fingerprint
+        stored = self.store.get(fingerprint)
+        if not stored:
+            return None
+
+        etag, last_modified, _ = stored
+        if etag and b'If-None-Match' not in request.headers:
+            request.headers['If-None-Match'] = etag
+        if last_modified and b'If-Modified-Since' not in request.headers:
+            request.headers['If-Modified-Since'] = last_modified
+        if etag or last_modified:
+            self.stats.inc_value('conditional/revalidated')
+        return None
+
+    def process_response(self, request, response, spider):
+        fingerprint = request.meta.get('validator_fingerprint')
+        if self.store is None or fingerprint is None:
+            return response
+
+        if response.status == 304:
+            self.stats.inc_value('conditional/not_modified')
+            spider.logger.debug(f"🟰 Not modified: {request.url}")
+            raise NotModified(f"Not modified: {request.url}")
+        if response.status != 200:
+            return response
+
+        content_hash = hashlib.sha1(response.body).hexdigest()
+        stored = self.store.get(fingerprint)
+        if stored and stored[2] == content_hash:
+            self.stats.inc_value('conditional/unchanged_body')
+            spider.logger.debug(f"🟰 Unchanged content: {request.url}")
+            raise NotModified(f"Unchanged content: {request.url}")
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        pending = (
+            fingerprint,
+            request.url,
+            etag.decode('latin-1')[:255] if etag else None,
+            last_modified.decode('latin-1')[:64] if last_modified else None,
+            content_hash,
+        )
+        self.stats.inc_value('conditional/changed')
+        if request.meta.get('article'):
+            # Stored on item_scraped, once the article made it through the pipelines
+            request.meta['page_validators'] = pending
+        else:
+            self._save(pending, spider)
+        return response
@@ -0,0 +1,111 @@
+"""
+Publication date parsing for Vietnamese news sites
+
+Handles what the sites print in their article headers:
+
+    Thứ Hai, 12/5/2025 08:30 (GMT+7)
+    14-10-2024 - 05:15 PM
+    09:15 | 12/10/2024
+    Ngày 14 tháng 10 năm 2024, 10:05
+    2024-10-14T08:30:00+07:00
+    2 giờ trước
+
+and returns timezone-aware datetimes. Without an offset in the text the
+time is taken as Vietnam time (UTC+7); without a time of day, midnight.
+The patterns are compiled once, and results are memoized per string, since
+the same header strings repeat across the pages of a site. Relative times
+are cached as the offset and resolved against `now` on every call.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+VIETNAM_TZ = timezone(timedelta(hours=7), 'ICT')
+
+# One of: ISO 8601, "ngày 14 tháng 10 năm 2024", dd/mm/yyyy (or - and .)
+_DATE = re.compile(
+    r'(?P<iso>\d{4}-\d{1,2}-\d{1,2}(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?)'
+    r'|ngày\s+(?P<vn_day>\d{1,2})\s+tháng\s+(?P<vn_month>\d{1,2})\s+năm\s+(?P<vn_year>\d{4})'
+    r'|(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4})'
+)
+_TIME = re.compile(r'(?P<hour>\d{1,2})[:h](?P<minute>\d{2})(?::(?P<second>\d{2}))?(?:\s*(?P<half>am|pm|sa|ch)\b)?')
+_OFFSET = re.compile(r'\(?(?:gmt|utc)\s*(?P<sign>[+-])\s*(?P<hours>\d{1,2})(?::?(?P<minutes>\d{2}))?\)?')
+_RELATIVE = re.compile(r'(?P<amount>\d+)\s*(?P<unit>giây|phút|giờ|tiếng|ngày|tuần)\s*trước|(?P<now>vừa xong|vừa mới)')
+
+_RELATIVE_UNITS = {
+    'giây': timedelta(seconds=1),
+    'phút': timedelta(minutes=1),
+    'giờ': timedelta(hours=1),
+    'tiếng': timedelta(hours=1),
+    'ngày': timedelta(days=1),
+    'tuần': timedelta(weeks=1),
+}
+
+
+def _iso(text):
+    value = datetime.fromisoformat(text.upper().replace('Z', '+00:00'))
+    return value if value.tzinfo else value.replace(tzinfo=VIETNAM_TZ)
+
+
+def _time_of_day(text):
+    match = _TIME.search(text)
+    if not match:
+        return 0, 0, 0
+    hour = int(match['hour'])
+    half = match['half']
+    if half in ('pm', 'ch') and hour < 12:
+        hour += 12
+    elif half in ('am', 'sa') and hour == 12:
+        hour = 0
+    return hour, int(match['minute']), int(match['second'] or 0)
+
+
+@lru_cache(maxsize=4096)
+def _parse(text):
+    """A datetime, a timedelta before now, or None"""
+    text = ' '.join(text.lower().split())
+
+    relative = _RELATIVE.search(text)
+    if relative:
+        if relative['now']:
+            return timedelta(0)
+        return int(relative['amount']) * _RELATIVE_UNITS[relative['unit']]
+
+    date = _DATE.search(text)
+    if not date:
+        return None
+    try:
+        if date['iso']:
+            return _iso(date['iso'])
+        if date['vn_year']:
+            year, month, day = int(date['vn_year']), int(date['vn_month']), int(date['vn_day'])
+        else:
+            year, month, day = int(date['year']), int(date['month']), int(date['day'])
+
+        # The time and offset may come before or after the date
+        rest = f"{text[:date.start()]} {text[date.end():]}"
+        tz = VIETNAM_TZ
+        offset = _OFFSET.search(rest)
+        if offset:
+            minutes = int(offset['hours']) * 60 + int(offset['minutes'] or 0)
+            tz = timezone(timedelta(minutes=-minutes if offset['sign'] == '-' else minutes))
+            rest = f"{rest[:offset.start()]} {rest[offset.end():]}"
+        return datetime(year, month, day, *_time_of_day(rest), tzinfo=tz)
+    except ValueError:
+        return None
+
+
+def is_relative(text):
+    """Whether `text` is a time relative to now ("2 giờ trước"), which moves with every crawl"""
+    return bool(text) and isinstance(_parse(text), timedelta)
+
+
+def parse_date(text, now=None):
+    """Timezone-aware datetime of a date string, or None if it has no date"""
+    if not text:
+        return None
+    value = _parse(text)
+    if isinstance(value, timedelta):
+        return (now or datetime.now(VIETNAM_TZ)) - value
+    return value
@@ -0,0 +1,16 @@
+"""
+PostgreSQL helpers shared by middlewares, extensions and pipelines
+"""
+
+import psycopg2
+
+
+def connect(settings):
+    """Open a psycopg2 connection using the POSTGRES_* Scrapy settings"""
+    return psycopg2.connect(
+        host=settings.get("POSTGRES_HOST", "localhost"),
+        port=settings.getint("POSTGRES_PORT", 5432),
+        database=settings.get("POSTGRES_DB", "postgres"),
+        user=settings.get("POSTGRES_USER", "postgres"),
+        password=settings.get("POSTGRES_PASSWORD", "password"),
+    )
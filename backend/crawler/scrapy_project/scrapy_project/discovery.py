@@ -0,0 +1,160 @@
+"""
+Sitemap and RSS/Atom discovery
+
+Parsers for sitemap indexes, (news) sitemaps and feeds, returning article
+URLs with their last modification time, plus the crawl_state table that
+remembers when each site was last crawled successfully so only entries
+modified since then are enqueued.
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+import lxml.etree
+
+CRAWL_STATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    domain VARCHAR(255) NOT NULL,
+    discovery VARCHAR(32) NOT NULL,
+    last_success_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (domain, discovery)
+);
+"""
+
+_XML_PARSER = lxml.etree.XMLParser(recover=True, remove_comments=True, resolve_entities=False)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _text(element):
+    return (element.text or '').strip() if element is not None else ''
+
+
+def parse_lastmod(value):
+    """Parse a W3C datetime (sitemaps, Atom) or RFC 822 date (RSS) into an aware datetime"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_sitemap(body):
+    """
+    Parse a sitemap index or urlset.
+
+    Returns (kind, entries) where kind is 'sitemapindex' or 'urlset' and
+    entries is a list of (loc, lastmod). For news sitemaps without
+    <lastmod> the <news:publication_date> is used.
+    """
+    root = lxml.etree.fromstring(body, parser=_XML_PARSER)
+    if root is None:
+        return None, []
+
+    entries = []
+    for element in root:
+        loc = lastmod = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'loc':
+                loc = _text(child)
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(_text(child))
+            elif name == 'news' and lastmod is None:
+                for news_child in child:
+                    if _local_name(news_child.tag) == 'publication_date':
+                        lastmod = parse_lastmod(_text(news_child))
+        if loc:
+            entries.append((loc, lastmod))
+    return _local_name(root.tag), entries
+
+
+def parse_feed(body):
+    """Parse an RSS 2.0 or Atom feed into a list of (link, published)"""
+    root = lxml.etree.fromstring(body, parser=_XML_PARSER)
+    if root is None:
+        return []
+
+    entries = []
+    for element in root.iter():
+        name = _local_name(element.tag)
+        if name not in ('item', 'entry'):
+            continue
+        link = published = None
+        for child in element:
+            child_name = _local_name(child.tag)
+            if child_name == 'link':
+                # RSS puts the URL in the text, Atom in href
+                if child.get('href') and child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+                elif _text(child):
+                    link = _text(child)
+            elif child_name in ('pubDate', 'updated', 'published', 'date') and published is None:
+                published = parse_lastmod(_text(child))
+        if link:
+            entries.append((link.strip(), published))
+    return entries
+
+
+def effective_since(last_success_at, max_age_days):
+    """
+    Cut-off for lastmod filtering of one site.
+
+    Never older than `max_age_days` ago, so a site crawled for the first
+    time does not enqueue its whole archive.
+    """
+    floor = datetime.now(timezone.utc) - timedelta(days=max_age_days) if max_age_days else None
+    if last_success_at is None or floor is None:
+        return last_success_at or floor
+    return max(last_success_at, floor)
+
+
+def is_modified_since(lastmod, since):
+    """True unless the entry is known to be older than `since`"""
+    return since is None or lastmod is None or lastmod > since
+
+
+class CrawlStateStore:
+    """Last successful crawl per site and discovery mode"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def load(self, discovery):
+        """Return {domain: last_success_at} for `discovery`"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(CRAWL_STATE_TABLE_SQL)
+            cursor.execute(
+                "SELECT domain, last_success_at FROM crawl_state WHERE discovery = %s",
+                (discovery,),
+            )
+            state = dict(cursor.fetchall())
+        self.connection.commit()
+        return state
+
+    def mark_success(self, domains, discovery, started_at):
+        try:
+            with self.connection.cursor() as cursor:
+                for domain in domains:
+                    cursor.execute("""
+                        INSERT INTO crawl_state (domain, discovery, last_success_at)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (domain, discovery) DO UPDATE SET
+                            last_success_at = EXCLUDED.last_success_at,
+                            updated_at = CURRENT_TIMESTAMP
+                    """, (domain, discovery, started_at))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
@@ -0,0 +1,207 @@
+"""
+Article extraction on the response's lxml tree
+
+Scrapy already parses every response with lxml for its selectors. These
+helpers work on that tree (`response.selector.root`), so the page is
+parsed once and only the article body contributes text, not the sidebars,
+related links and footer around it.
+
+SiteExtractor compiles a site's `article_selectors` once: the CSS
+alternatives of each field ('h1.title, h1.detail-title') become one XPath
+expression, so extracting a field is a single evaluation. When several
+alternatives match, the first match in document order wins. Nodes matched
+by the optional `content_exclude` selector inside the content node (a byline,
+"see also" links) are left out of the content. Fields the
+page's JSON-LD or OpenGraph metadata provides (structured_data.py) are taken
+from there, and only the others are looked up with the site's selectors.
+
+extract_article() does the parsing and extraction of one page in a worker
+of the spider's extraction pool (EXTRACTION_POOL_SIZE), away from the
+reactor thread.
+"""
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+from scrapy.http import HtmlResponse
+
+from scrapy_project.main_content import main_content_text
+from scrapy_project.structured_data import STRUCTURED_FIELDS, article_metadata
+
+_translator = HTMLTranslator()
+
+# Paragraph-level blocks; a list item wrapping its own <p> is read through the <p>
+_BLOCKS = etree.XPath('.//p | .//li[not(.//p)]')
+# All text below a node except scripts and styles
+_TEXT = etree.XPath('.//text()[not(ancestor::script or ancestor::style)]')
+
+
+def _normalize(text):
+    return ' '.join(text.split())
+
+
+def _is_excluded(text, excluded):
+    """Whether a text node lies inside one of the `excluded` elements"""
+    node = text.getparent()
+    if text.is_tail:
+        node = node.getparent()
+    while node is not None:
+        if node in excluded:
+            return True
+        node = node.getparent()
+    return False
+
+
+def _texts(element, excluded=None):
+    texts = _TEXT(element)
+    if excluded:
+        texts = [text for text in texts if not _is_excluded(text, excluded)]
+    return texts
+
+
+def block_text(element, excluded=None):
+    """Whitespace-normalized text of one element, scripts and styles skipped"""
+    return _normalize(''.join(_texts(element, excluded)))
+
+
+def content_text(element, exclude=None):
+    """Article text below `element`, one paragraph per line
+
+    Text inside the nodes the compiled `exclude` XPath matches below
+    `element` is skipped. Falls back to every text node below `element`
+    when it has no <p> or <li> blocks.
+    """
+    excluded = set(exclude(element)) if exclude is not None else None
+    paragraphs = [text for text in (block_text(block, excluded) for block in _BLOCKS(element)) if text]
+    if not paragraphs:
+        paragraphs = [text for text in map(_normalize, _texts(element, excluded)) if text]
+    return '\n'.join(paragraphs)
+
+
+def compile_css(css, *pseudo_elements):
+    """Compile comma-separated CSS alternatives into one XPath expression
+
+    With pseudo-elements ('::text', '::attr(src)'), each alternative is
+    expanded with every one of them.
+    """
+    alternatives = [part.strip() for part in css.split(',') if part.strip()]
+    if pseudo_elements:
+        alternatives = [f'{alt}{pseudo}' for alt in alternatives for pseudo in pseudo_elements]
+    return etree.XPath(_translator.css_to_xpath(', '.join(alternatives)))
+
+
+def first_text(xpath, root):
+    """First non-blank string `xpath` yields on `root`, stripped, or None"""
+    if xpath is None:
+        return None
+    for value in xpath(root):
+        value = value.strip()
+        if value:
+            return value
+    return None
+
+
+# Used when a site's own title selector finds nothing
+FALLBACK_TITLE = compile_css('title, h1', '::text')
+FALLBACK_OG_TITLE = compile_css('meta[property="og:title"]', '::attr(content)')
+# Meta keywords, then tag and category links
+TAGS = compile_css('meta[name="keywords"]::attr(content), .tags a::text, .categories a::text, .tag a::text')
+
+
+class SiteExtractor:
+    """Precompiled article field extractors of one site
+
+    links, title and content selectors are required, the others optional.
+    """
+
+    def __init__(self, selectors):
+        def optional(key, *pseudo_elements):
+            return compile_css(selectors[key], *pseudo_elements) if selectors.get(key) else None
+
+        self.links = compile_css(selectors['links'], '::attr(href)')
+        self.title = compile_css(selectors['title'], '::text')
+        self.content = compile_css(selectors['content'])
+        self.content_exclude = optional('content_exclude')
+        self.excerpt = optional('excerpt', '::text')
+        self.author = optional('author', '::text')
+        self.published_date = optional('published_date', '::text', '::attr(datetime)')
+        self.image = optional('image', '::attr(src)')
+
+    def extract_title(self, root):
+        return (first_text(self.title, root) or first_text(FALLBACK_TITLE, root)
+                or first_text(FALLBACK_OG_TITLE, root))
+
+    def extract_content(self, root):
+        for element in self.content(root):
+            content = content_text(element, self.content_exclude)
+            if content:
+                return content
+        return None
+
+    def extract_excerpt(self, root):
+        return first_text(self.excerpt, root)
+
+    def extract_author(self, root):
+        return first_text(self.author, root)
+
+    def extract_date_text(self, root):
+        return first_text(self.published_date, root)
+
+    def extract_image(self, root):
+        return first_text(self.image, root)
+
+    def extract_tags(self, root, limit=10):
+        tags = []
+        for value in TAGS(root):
+            if value.is_attribute:
+                tags.extend(tag.strip() for tag in value.split(','))
+            else:
+                tags.append(value.strip())
+        return [tag for tag in tags if tag][:limit]
+
+    def extract(self, root):
+        """All article fields of a page; only the title when there is none
+
+        Fields come from the page's JSON-LD / OpenGraph metadata first, and
+        from the selectors when it does not have them; structured_fields
+        names those taken from the metadata. When the content selector finds
+        nothing, the content comes from the text density detector
+        (main_content.py) and content_fallback is set.
+        """
+        metadata = article_metadata(root)
+        title = metadata.get('title') or self.extract_title(root)
+        if not title:
+            return {'title': None}
+        content = self.extract_content(root)
+        content_fallback = content is None
+        if content_fallback:
+            content = main_content_text(root)
+        selectors = {
+            'excerpt': self.extract_excerpt,
+            'author': self.extract_author,
+            'date_text': self.extract_date_text,
+            'image_url': self.extract_image,
+            'tags': self.extract_tags,
+        }
+        fields = {'title': title, 'content': content, 'content_fallback': content_fallback}
+        for name, extract in selectors.items():
+            fields[name] = metadata[name] if name in metadata else extract(root)
+        fields['structured_fields'] = [name for name in STRUCTURED_FIELDS if name in metadata]
+        return fields
+
+
+# SiteExtractors of this extraction pool worker, by article_selectors
+_worker_extractors = {}
+
+
+def extract_article(selectors, url, body, encoding):
+    """SiteExtractor(selectors).extract() on a downloaded page, in a pool worker
+
+    Only the body goes to the worker and only the fields come back; the
+    page is parsed here, so the spider process never builds its tree.
+    """
+    key = tuple(sorted(selectors.items()))
+    extractor = _worker_extractors.get(key)
+    if extractor is None:
+        extractor = _worker_extractors[key] = SiteExtractor(selectors)
+    root = HtmlResponse(url, body=body, encoding=encoding).selector.root
+    return extractor.extract(root)
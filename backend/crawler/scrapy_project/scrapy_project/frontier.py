@@ -0,0 +1,409 @@
+"""
+Shared crawl frontier in PostgreSQL
+
+PostgresFrontierScheduler replaces Scrapy's in-memory scheduler with the
+crawl_frontier table, so any number of spider processes, on one machine or
+several, can work through the same crawl:
+
+    scrapy crawl financial_news \\
+        -s SCHEDULER=scrapy_project.frontier.PostgresFrontierScheduler \\
+        -s FRONTIER_CRAWL_ID=financial_news-20250512
+
+Every process started with the same FRONTIER_CRAWL_ID shares the frontier.
+Requests are deduplicated by fingerprint per crawl, leased in priority
+order with `FOR UPDATE SKIP LOCKED` so two processes never get the same
+request, and a lease that is not completed within FRONTIER_LEASE_SECONDS
+(the process died) makes the request available again.
+
+When the last worker of a crawl finishes, the crawl's completed rows are
+deleted; rows of crawls older than `crawler_manager.py clean --days` are
+removed by prune_frontier().
+"""
+
+import os
+import pickle
+import socket
+import time
+from collections import deque
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+from scrapy import signals
+from scrapy.utils.request import request_from_dict
+from twisted.internet import reactor
+
+from scrapy_project.db import connect
+
+FRONTIER_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    id BIGSERIAL PRIMARY KEY,
+    crawl_id VARCHAR(100) NOT NULL,
+    fingerprint BYTEA NOT NULL,
+    url VARCHAR(2000) NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    request BYTEA NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leased_by VARCHAR(255),
+    leased_until TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (crawl_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_frontier_claim
+    ON crawl_frontier (crawl_id, status, priority DESC, id);
+"""
+
+
+class FrontierStatus:
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class PostgresFrontierScheduler:
+    """Scrapy scheduler storing pending requests in the crawl_frontier table"""
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.crawl_id = settings.get('FRONTIER_CRAWL_ID')
+        self.batch_size = settings.getint('FRONTIER_BATCH_SIZE', 16)
+        self.lease_seconds = settings.getint('FRONTIER_LEASE_SECONDS', 300)
+        # A request leased this many times without completing is given up on
+        self.max_attempts = settings.getint('FRONTIER_MAX_ATTEMPTS', 3)
+        # Minimum seconds between two queries once the frontier looked empty
+        self.poll_interval = settings.getfloat('FRONTIER_POLL_INTERVAL', 1.0)
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.connection = None
+        self.spider = None
+
+        self._buffer = deque()       # leased requests not handed to the engine yet
+        self._in_flight = {}         # frontier id -> request handed to the engine
+        self._to_insert = []         # enqueued requests not written yet
+        self._to_complete = []       # frontier ids finished, not marked done yet
+        self._seen = set()           # fingerprints enqueued by this worker
+        self._next_poll = 0.0
+        self._pending_cache = (0.0, True)
+        self._wakeup = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = cls(crawler)
+        crawler.signals.connect(scheduler.request_left_downloader, signal=signals.request_left_downloader)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self._fingerprinter = self.crawler.request_fingerprinter
+        if not self.crawl_id:
+            # A private frontier for this process only
+            self.crawl_id = f"{spider.name}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self.connection = connect(self.crawler.settings)
+        with self.connection.cursor() as cursor:
+            cursor.execute(FRONTIER_TABLE_SQL)
+        self.connection.commit()
+        spider.logger.info(f"🗂️  Using Postgres frontier '{self.crawl_id}' as worker {self.worker}")
+
+    def close(self, reason):
+        if self._wakeup is not None and self._wakeup.active():
+            self._wakeup.cancel()
+        try:
+            self.flush()
+            leftover = list(self._in_flight) + [frontier_id for frontier_id, _ in self._buffer]
+            if leftover:
+                if reason == 'finished':
+                    # Dropped on the way (e.g. IgnoreRequest in a downloader middleware)
+                    self._mark(leftover, FrontierStatus.DONE)
+                else:
+                    # Interrupted, give them back so another worker or a resume picks them up
+                    self._release(leftover)
+                    self.stats.inc_value('frontier/released', len(leftover))
+            self.stats.set_value('frontier/unfinished', self._count_unfinished())
+            if reason == 'finished':
+                self._compact()
+            self.connection.commit()
+        finally:
+            self.connection.close()
+
+    def _count_unfinished(self):
+        """Requests of this crawl still to be fetched, by this worker or any other
+
+        Failed rows were given up on and do not count.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM crawl_frontier WHERE crawl_id = %s AND status IN (%s, %s)",
+                (self.crawl_id, FrontierStatus.PENDING, FrontierStatus.LEASED),
+            )
+            return cursor.fetchone()[0]
+
+    def _compact(self):
+        """Delete the completed rows once no worker has anything left to do
+
+        Failed rows are kept for inspection until prune_frontier() removes
+        the crawl.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM crawl_frontier
+                WHERE crawl_id = %(crawl_id)s AND status = 'done'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM crawl_frontier
+                      WHERE crawl_id = %(crawl_id)s AND status IN ('pending', 'leased')
+                  )
+            """, {'crawl_id': self.crawl_id})
+            if cursor.rowcount:
+                self.stats.inc_value('frontier/pruned', cursor.rowcount)
+
+    def __len__(self):
+        self.flush()
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM crawl_frontier WHERE crawl_id = %s AND status = %s",
+                (self.crawl_id, FrontierStatus.PENDING),
+            )
+            count = cursor.fetchone()[0]
+        self.connection.commit()
+        return count + len(self._buffer)
+
+    def enqueue_request(self, request):
+        """Buffer `request` for the frontier, False if it is a duplicate
+
+        Duplicates of requests this worker already enqueued are dropped here
+        (scheduler/dropped stat, request_dropped signal). Duplicates of
+        requests enqueued by other workers are dropped by the unique
+        constraint when the batch is written (frontier/duplicates).
+        """
+        fingerprint = self._fingerprinter.fingerprint(request)
+        if not request.dont_filter:
+            if fingerprint in self._seen:
+                self.stats.inc_value('scheduler/dropped')
+                return False
+            self._seen.add(fingerprint)
+        # Retries come back with dont_filter and must replace the finished row
+        retry = bool(request.dont_filter and request.meta.get('retry_times'))
+        self._to_insert.append((
+            retry,
+            (
+                self.crawl_id,
+                fingerprint,
+                request.url[:2000],
+                request.priority,
+                pickle.dumps(request.to_dict(spider=self.spider), protocol=4),
+            ),
+        ))
+        self._next_poll = 0.0
+        self._pending_cache = (0.0, True)
+        if len(self._to_insert) >= self.batch_size:
+            self.flush()
+        return True
+
+    def next_request(self):
+        if not self._buffer:
+            if self._to_insert:
+                self.flush()
+            if time.monotonic() < self._next_poll:
+                return None
+            self._lease()
+            if not self._buffer:
+                self._next_poll = time.monotonic() + self.poll_interval
+                self._wake_engine_later()
+                return None
+
+        frontier_id, request = self._buffer.popleft()
+        request.meta['frontier_id'] = frontier_id
+        self._in_flight[frontier_id] = request
+        self.stats.inc_value('scheduler/dequeued/frontier')
+        return request
+
+    def has_pending_requests(self):
+        if self._buffer or self._to_insert:
+            return True
+        checked_at, pending = self._pending_cache
+        if time.monotonic() - checked_at < self.poll_interval:
+            return pending
+
+        # Requests leased by this worker are the engine's business; requests
+        # leased by other live workers may still produce new requests.
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT EXISTS (
+                    SELECT 1 FROM crawl_frontier
+                    WHERE crawl_id = %(crawl_id)s AND (
+                        status = 'pending'
+                        OR (status = 'leased' AND leased_until < NOW() AND attempts < %(max_attempts)s)
+                        OR (status = 'leased' AND leased_until >= NOW() AND leased_by <> %(worker)s)
+                    )
+                )
+            """, {'crawl_id': self.crawl_id, 'max_attempts': self.max_attempts, 'worker': self.worker})
+            pending = cursor.fetchone()[0]
+        self.connection.commit()
+        self._pending_cache = (time.monotonic(), pending)
+        return pending
+
+    def request_left_downloader(self, request, spider):
+        frontier_id = request.meta.get('frontier_id')
+        if frontier_id is not None and self._in_flight.pop(frontier_id, None) is not None:
+            self._to_complete.append(frontier_id)
+            if len(self._to_complete) >= self.batch_size:
+                self.flush()
+
+    def _wake_engine_later(self):
+        """Have the engine ask for requests again after the poll interval
+
+        Other workers may add requests at any time, but an engine with
+        nothing in flight only polls its scheduler every 5 seconds.
+        """
+        if self._wakeup is None or not self._wakeup.active():
+            self._wakeup = reactor.callLater(self.poll_interval, self._wake_engine)
+
+    def _wake_engine(self):
+        slot = getattr(self.crawler.engine, '_slot', None)
+        if slot is not None and slot.nextcall is not None:
+            slot.nextcall.schedule()
+
+    def flush(self):
+        """Write buffered enqueues and completions"""
+        if not self._to_insert and not self._to_complete:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                # First, so a request that finished and was retried since ends up pending
+                if self._to_complete:
+                    self._mark(self._to_complete, FrontierStatus.DONE, cursor)
+                new_rows = [row for retry, row in self._to_insert if not retry]
+                retry_rows = [row for retry, row in self._to_insert if retry]
+                if new_rows:
+                    inserted = execute_values(cursor, """
+                        INSERT INTO crawl_frontier (crawl_id, fingerprint, url, priority, request)
+                        VALUES %s
+                        ON CONFLICT (crawl_id, fingerprint) DO NOTHING
+                        RETURNING id
+                    """, new_rows, fetch=True)
+                    self.stats.inc_value('frontier/enqueued', len(inserted))
+                    self.stats.inc_value('frontier/duplicates', len(new_rows) - len(inserted))
+                if retry_rows:
+                    execute_values(cursor, """
+                        INSERT INTO crawl_frontier (crawl_id, fingerprint, url, priority, request)
+                        VALUES %s
+                        ON CONFLICT (crawl_id, fingerprint) DO UPDATE SET
+                            request = EXCLUDED.request,
+                            priority = EXCLUDED.priority,
+                            status = 'pending',
+                            leased_by = NULL,
+                            leased_until = NULL,
+                            updated_at = NOW()
+                    """, retry_rows)
+                    self.stats.inc_value('frontier/retried', len(retry_rows))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        self._to_insert = []
+        self._to_complete = []
+
+    def _mark(self, frontier_ids, status, cursor=None):
+        if cursor is None:
+            with self.connection.cursor() as cursor:
+                return self._mark(frontier_ids, status, cursor)
+        cursor.execute(
+            "UPDATE crawl_frontier SET status = %s, leased_until = NULL, updated_at = NOW() "
+            "WHERE id = ANY(%s)",
+            (status, list(frontier_ids)),
+        )
+        if status == FrontierStatus.DONE:
+            self.stats.inc_value('frontier/completed', len(frontier_ids))
+
+    def _release(self, frontier_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE crawl_frontier SET status = 'pending', leased_by = NULL, leased_until = NULL, "
+                "attempts = GREATEST(attempts - 1, 0), updated_at = NOW() "
+                "WHERE id = ANY(%s) AND leased_by = %s",
+                (list(frontier_ids), self.worker),
+            )
+
+    def _lease(self):
+        """Lease the next batch of requests for this worker"""
+        try:
+            with self.connection.cursor() as cursor:
+                # Given up: leased too often without ever completing
+                cursor.execute("""
+                    UPDATE crawl_frontier SET status = 'failed', updated_at = NOW()
+                    WHERE crawl_id = %s AND status = 'leased'
+                      AND leased_until < NOW() AND attempts >= %s
+                """, (self.crawl_id, self.max_attempts))
+                if cursor.rowcount:
+                    self.stats.inc_value('frontier/failed', cursor.rowcount)
+
+                cursor.execute("""
+                    UPDATE crawl_frontier SET
+                        status = 'leased',
+                        leased_by = %(worker)s,
+                        leased_until = NOW() + make_interval(secs => %(lease_seconds)s),
+                        attempts = attempts + 1,
+                        updated_at = NOW()
+                    WHERE id IN (
+                        SELECT id FROM crawl_frontier
+                        WHERE crawl_id = %(crawl_id)s
+                          AND (status = 'pending' OR (status = 'leased' AND leased_until < NOW()))
+                        ORDER BY priority DESC, id
+                        LIMIT %(limit)s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, priority, request
+                """, {
+                    'worker': self.worker,
+                    'lease_seconds': self.lease_seconds,
+                    'crawl_id': self.crawl_id,
+                    'limit': self.batch_size,
+                })
+                rows = cursor.fetchall()
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+        # RETURNING does not keep the subquery order
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        for frontier_id, _, payload in rows:
+            request = request_from_dict(pickle.loads(bytes(payload)), spider=self.spider)
+            self._buffer.append((frontier_id, request))
+        self.stats.inc_value('frontier/leased', len(rows))
+
+
+def delete_crawl_frontier(connection, crawl_id):
+    """Delete every row of one crawl, return the number of rows deleted"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM crawl_frontier WHERE crawl_id = %s", (crawl_id,))
+            deleted = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return deleted
+
+
+def prune_frontier(connection, days):
+    """Delete the rows of crawls with no frontier activity in the last `days` days"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(FRONTIER_TABLE_SQL)
+            cursor.execute("""
+                DELETE FROM crawl_frontier
+                WHERE crawl_id IN (
+                    SELECT crawl_id FROM crawl_frontier
+                    GROUP BY crawl_id
+                    HAVING MAX(updated_at) < NOW() - make_interval(days => %s)
+                )
+            """, (days,))
+            deleted = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return deleted
@@ -0,0 +1,193 @@
+"""
+Single-file HTTP cache storage
+
+Drop-in replacement for Scrapy's FilesystemCacheStorage that keeps every
+cached response as one row of a SQLite database, with the body
+compressed with zstd (zlib when the zstandard package is missing). The
+cache is bounded: entries older than HTTPCACHE_EXPIRATION_SECS are swept,
+and once the compressed bodies exceed HTTPCACHE_SQLITE_MAX_BYTES the
+least recently used entries are evicted.
+
+    HTTPCACHE_STORAGE = 'scrapy_project.httpcache.SqliteCacheStorage'
+"""
+
+import logging
+import pickle
+import sqlite3
+import zlib
+from pathlib import Path
+from time import time
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS responses (
+    key BLOB PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers BLOB NOT NULL,
+    body BLOB NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_stored_at ON responses(stored_at);
+"""
+
+
+class _Codec:
+    """Body compression, zstd when available"""
+
+    def __init__(self, level):
+        if zstandard is not None:
+            self.name = 'zstd'
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+        else:
+            self.name = 'zlib'
+        self.level = level
+
+    def compress(self, data):
+        if self.name == 'zstd':
+            return self._compressor.compress(data)
+        return zlib.compress(data, min(self.level, 9))
+
+    def decompress(self, data, codec):
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ValueError("Cached entry is zstd-compressed but zstandard is not installed")
+            return self._decompressor.decompress(data)
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        return data
+
+
+class SqliteCacheStorage:
+    """HTTP cache storage in one SQLite file per spider, size-capped with LRU eviction"""
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.max_bytes = settings.getint('HTTPCACHE_SQLITE_MAX_BYTES', 512 * 1024 * 1024)
+        # Stores between two expiry/size sweeps
+        self.sweep_interval = settings.getint('HTTPCACHE_SQLITE_SWEEP_INTERVAL', 500)
+        self.codec = _Codec(settings.getint('HTTPCACHE_SQLITE_COMPRESSION_LEVEL', 3))
+        self.db = None
+        self.total_bytes = 0
+        self._stores_since_sweep = 0
+        # key -> last access time, written back in batches instead of on every hit
+        self._accessed = {}
+
+    def open_spider(self, spider):
+        self.path = Path(self.cachedir, f'{spider.name}.sqlite3')
+        self.db = sqlite3.connect(str(self.path), isolation_level=None)
+        # auto_vacuum only applies to a new database, it lets sweeps give space back
+        self.db.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.executescript(SCHEMA_SQL)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+
+        self.sweep()
+        logger.debug(
+            "Using SQLite cache storage in %(cachepath)s (%(size)d bytes)",
+            {'cachepath': self.path, 'size': self.total_bytes},
+            extra={'spider': spider},
+        )
+
+    def close_spider(self, spider):
+        self._flush_access_times()
+        self.db.execute('PRAGMA incremental_vacuum').fetchall()
+        self.db.close()
+
+    def retrieve_response(self, spider, request):
+        key = self._fingerprinter.fingerprint(request)
+        row = self.db.execute(
+            'SELECT url, status, headers, body, codec, stored_at FROM responses WHERE key = ?',
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None  # not cached
+
+        url, status, headers, body, codec, stored_at = row
+        if 0 < self.expiration_secs < time() - stored_at:
+            return None  # expired, removed by the next sweep
+
+        self._accessed[key] = time()
+        headers = Headers(pickle.loads(headers))
+        body = self.codec.decompress(body, codec)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        key = self._fingerprinter.fingerprint(request)
+        body = self.codec.compress(response.body)
+        headers = pickle.dumps(dict(response.headers), protocol=4)
+        size = len(body) + len(headers)
+        now = time()
+
+        previous = self.db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+        self.db.execute(
+            'INSERT OR REPLACE INTO responses '
+            '(key, url, status, headers, body, codec, size, stored_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, response.url, response.status, headers, body, self.codec.name, size, now, now),
+        )
+        self._accessed.pop(key, None)
+        self.total_bytes += size - (previous[0] if previous else 0)
+
+        self._stores_since_sweep += 1
+        if self.total_bytes > self.max_bytes or self._stores_since_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def _flush_access_times(self):
+        if not self._accessed:
+            return
+        self.db.execute('BEGIN')
+        self.db.executemany(
+            'UPDATE responses SET accessed_at = ? WHERE key = ?',
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+        )
+        self.db.execute('COMMIT')
+        self._accessed.clear()
+
+    def sweep(self):
+        """Drop expired entries, then least recently used ones down to 90% of the cap"""
+        self._flush_access_times()
+        self._stores_since_sweep = 0
+        removed = 0
+        if self.expiration_secs > 0:
+            removed += self.db.execute(
+                'DELETE FROM responses WHERE stored_at < ?', (time() - self.expiration_secs,)
+            ).rowcount
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        if self.max_bytes > 0 and self.total_bytes > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            rows = self.db.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+            evict = []
+            for key, size in rows:
+                if self.total_bytes <= target:
+                    break
+                evict.append((key,))
+                self.total_bytes -= size
+            self.db.execute('BEGIN')
+            self.db.executemany('DELETE FROM responses WHERE key = ?', evict)
+            self.db.execute('COMMIT')
+            removed += len(evict)
+
+        if removed:
+            self.db.execute('PRAGMA incremental_vacuum').fetchall()
+            logger.debug("HTTP cache sweep removed %d entries", removed)
+        return removed
@@ -33,6 +33,8 @@ class PostItem(scrapy.Item):
         output_processor=TakeFirst()
     )
     published_date = scrapy.Field(output_processor=TakeFirst())
+    # Set when published_date was resolved from "2 giờ trước" against the crawl time
+    published_date_relative = scrapy.Field()
     author = scrapy.Field(
         input_processor=MapCompose(remove_tags, clean_text),
         output_processor=TakeFirst()
@@ -40,6 +42,11 @@ class PostItem(scrapy.Item):
     tags = scrapy.Field()  # Keep as list for tags
     image_url = scrapy.Field(output_processor=TakeFirst())
     scraped_at = scrapy.Field(output_processor=TakeFirst())
+    # Set by NearDuplicatePipeline: the content's MinHash signature, and for a
+    # copy of a stored article the post it copies and how similar it is
+    content_signature = scrapy.Field()
+    canonical_post_id = scrapy.Field()
+    similarity = scrapy.Field()
 
 
 class SiteItem(scrapy.Item):
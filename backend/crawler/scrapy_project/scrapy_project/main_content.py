@@ -0,0 +1,143 @@
+"""
+Main content detection for pages the site selectors do not match
+
+A readability-style scorer over the lxml tree: every paragraph outside the
+page chrome (nav, header, footer, aside, and blocks whose class or id says
+menu, sidebar, related, share...) scores by its length and commas, and adds
+that score to its parent and half of it to its grandparent. Containers whose
+class or id looks like article content get a bonus. The container with the
+best score after discounting its link density is the main content.
+
+    main_content_text(root)   article text, one paragraph per line, or None
+    article_links(root)       hrefs of headline links outside the page chrome
+
+Both are deterministic and only walk the already parsed tree.
+"""
+
+import re
+
+from lxml import etree
+
+# Never part of the article
+_CHROME_TAGS = frozenset({
+    'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside',
+    'form', 'iframe', 'button', 'select', 'svg',
+})
+_CHROME = re.compile(
+    r'comment|footer|header|sidebar|menu|(?<![a-z])nav|related|share|social|banner|advert|(?<![a-z])ads?(?![a-z])'
+    r'|breadcrumb|(?<![a-z])tags?(?![a-z])|popup|login|subscribe|most-?read|doc-nhieu|tin-lien-quan',
+    re.IGNORECASE,
+)
+_CONTENT = re.compile(r'article|content|detail|entry|post|story|body|main|text|singular', re.IGNORECASE)
+_TAG_BONUS = {'article': 10, 'main': 5, 'section': 3, 'div': 0, 'td': -3, 'ul': -5, 'ol': -5, 'li': -5, 'form': -10}
+
+_PARAGRAPHS = etree.XPath('.//p | .//pre | .//blockquote | .//li[not(.//p)] | .//td[not(.//p)]')
+_BLOCKS = etree.XPath('.//p | .//li[not(.//p)]')
+_TEXT = etree.XPath('.//text()[not(ancestor::script or ancestor::style)]')
+_LINK_TEXT = etree.XPath('.//a//text()')
+_LINKS = etree.XPath('.//a[@href]')
+
+# Paragraphs shorter than this only count when they end a sentence
+MIN_PARAGRAPH_CHARS = 25
+# Blocks with more of their text in links are navigation
+MAX_LINK_DENSITY = 0.5
+# Words in the text of a headline link
+MIN_HEADLINE_WORDS = 4
+# Levels (the element and its nearest ancestors) whose class or id may mark it
+# as chrome; a hint on a page-wide wrapper higher up says nothing about it
+CHROME_HINT_LEVELS = 4
+
+
+def _text(element):
+    return ' '.join(''.join(_TEXT(element)).split())
+
+
+def _is_chrome(element, stop=None):
+    """Whether `element` is inside page chrome, looking up to (not including) `stop`
+
+    Chrome tags count at any level below <body>, class and id hints only on
+    the CHROME_HINT_LEVELS nearest levels.
+    """
+    node = element
+    level = 0
+    while node is not None and node is not stop and node.tag not in ('body', 'html'):
+        if node.tag in _CHROME_TAGS:
+            return True
+        if level < CHROME_HINT_LEVELS:
+            marks = f"{node.get('class', '')} {node.get('id', '')}"
+            if marks.strip() and _CHROME.search(marks):
+                return True
+        node = node.getparent()
+        level += 1
+    return False
+
+
+def link_density(element, text=None):
+    """Share of the text of `element` that is link text"""
+    length = len(text if text is not None else _text(element))
+    if not length:
+        return 0.0
+    return len(' '.join(''.join(_LINK_TEXT(element)).split())) / length
+
+
+def _is_paragraph(text):
+    return len(text) >= MIN_PARAGRAPH_CHARS or text.endswith(('.', '!', '?', '…', '"', '”'))
+
+
+def _base_score(element):
+    score = _TAG_BONUS.get(element.tag, 0)
+    marks = f"{element.get('class', '')} {element.get('id', '')}"
+    if _CONTENT.search(marks):
+        score += 25
+    return score
+
+
+def find_main_content(root):
+    """The element holding the article text, or None"""
+    scores = {}
+    for paragraph in _PARAGRAPHS(root):
+        if _is_chrome(paragraph):
+            continue
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        for node, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+            if node is None or not isinstance(node.tag, str):
+                continue
+            if node not in scores:
+                scores[node] = _base_score(node)
+            scores[node] += score * share
+
+    best, best_score = None, 0
+    for node, score in scores.items():
+        score *= 1 - link_density(node)
+        if score > best_score:
+            best, best_score = node, score
+    return best
+
+
+def main_content_text(root):
+    """Article text of the main content element, one paragraph per line, or None"""
+    node = find_main_content(root)
+    if node is None:
+        return None
+    paragraphs = []
+    for block in _BLOCKS(node):
+        if _is_chrome(block, stop=node):
+            continue
+        text = _text(block)
+        if text and _is_paragraph(text) and link_density(block, text) <= MAX_LINK_DENSITY:
+            paragraphs.append(text)
+    return '\n'.join(paragraphs) or None
+
+
+def article_links(root):
+    """hrefs of links that read like headlines and are not in the page chrome"""
+    links = []
+    for link in _LINKS(root):
+        text = _text(link) or link.get('title', '')
+        if len(text.split()) >= MIN_HEADLINE_WORDS and not _is_chrome(link):
+            links.append(link.get('href'))
+    return links
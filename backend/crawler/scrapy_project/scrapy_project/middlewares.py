@@ -4,9 +4,11 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http import HtmlResponse
-import random
-import time
+from scrapy.utils.httpobj import urlparse_cached
+
+from scrapy_project.site_profiles import get_crawl_profile, site_for_host
 
 
 class ScrapyProjectSpiderMiddleware:
@@ -104,18 +106,121 @@ class ScrapyProjectDownloaderMiddleware:
 
 
 class RandomDelayMiddleware:
-    """Add random delays between requests to be respectful to servers"""
-    
-    def __init__(self, delay_range=(1, 3)):
-        self.delay_range = delay_range
-    
+    """Random per-domain delays between requests, applied by the download slot
+
+    The delay is not waited for here: a request waiting inside a downloader
+    middleware already holds one of the CONCURRENT_REQUESTS, so a burst for
+    one domain would stall every other domain. Instead each domain's download
+    slot gets the middle of RANDOM_DELAY_RANGE as its delay, randomized to
+    0.5x-1.5x (1-3 s for the default 1-3 s range), and the downloader keeps
+    the requests queued in the slot until their time comes.
+
+    Sites with a crawl_profile are left alone: their download slot already
+    applies the profile's delay and concurrency.
+    """
+
+    def __init__(self, crawler, delay_range=(1, 3)):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.delay = sum(delay_range) / 2
+
     @classmethod
     def from_crawler(cls, crawler):
         delay_range = crawler.settings.getlist('RANDOM_DELAY_RANGE', [1, 3])
-        return cls(delay_range=tuple(map(int, delay_range)))
-    
+        return cls(crawler, delay_range=tuple(map(float, delay_range)))
+
+    def _apply(self, request, spider):
+        site_configs = getattr(spider, 'site_configs', None) or {}
+        if site_for_host(urlparse_cached(request).hostname, site_configs) is not None:
+            return False
+        downloader = self.crawler.engine.downloader
+        # The slot is created when the first request to the domain is queued,
+        # that request goes out without waiting anyway
+        slot = downloader.slots.get(downloader.get_slot_key(request))
+        if slot is not None:
+            slot.randomize_delay = True
+            # AutoThrottle may raise the delay, never lower it below ours
+            if slot.delay < self.delay:
+                slot.delay = self.delay
+        return True
+
+    def process_request(self, request, spider):
+        if self._apply(request, spider):
+            self.stats.inc_value('random_delay/requests')
+        else:
+            self.stats.inc_value('random_delay/profiled_requests')
+        return None
+
+    def process_response(self, request, response, spider):
+        # AutoThrottle has just adjusted the slot delay (response_downloaded)
+        self._apply(request, spider)
+        return response
+
+
+class SiteProfileMiddleware:
+    """Apply each site's crawl_profile from the spider's site_configs
+
+    Requests are routed to one download slot per configured site (so
+    subdomains share their site's limits), the site's request budget is
+    enforced, and AutoThrottle is kept from lowering a slot's delay below
+    the delay the site's profile asks for. Concurrency and delay of the
+    slots themselves come from DOWNLOAD_SLOTS, see site_profiles.py.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.site_configs = {}
+        self.profiles = {}
+        self.request_counts = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
+
+    def spider_opened(self, spider):
+        self.site_configs = getattr(spider, 'site_configs', {}) or {}
+        self.profiles = {
+            domain: get_crawl_profile(config) for domain, config in self.site_configs.items()
+        }
+        for domain, profile in self.profiles.items():
+            budget = profile['max_requests'] or 'unlimited'
+            spider.logger.info(
+                f"🚦 Crawl profile for {domain}: concurrency={profile['concurrency']}, "
+                f"delay={profile['delay']}s, budget={budget}"
+            )
+
     def process_request(self, request, spider):
-        delay = random.uniform(*self.delay_range)
-        spider.logger.info(f'Delaying request for {delay:.2f} seconds')
-        time.sleep(delay)
+        site = site_for_host(urlparse_cached(request).hostname, self.site_configs)
+        if site is None:
+            return None
+
+        request.meta.setdefault('download_slot', site)
+        profile = self.profiles[site]
+        count = self.request_counts.get(site, 0)
+        if profile['max_requests'] and count >= profile['max_requests']:
+            if self.stats.get_value(f'site_profile/{site}/budget_exhausted') is None:
+                spider.logger.warning(
+                    f"⚠️  Request budget of {profile['max_requests']} reached for {site}, "
+                    f"dropping further requests"
+                )
+            self.stats.inc_value(f'site_profile/{site}/budget_exhausted')
+            raise IgnoreRequest(f"Request budget exhausted for {site}")
+
+        self.request_counts[site] = count + 1
+        self.stats.inc_value(f'site_profile/{site}/requests')
         return None
+
+    def process_response(self, request, response, spider):
+        site = request.meta.get('download_slot')
+        profile = self.profiles.get(site)
+        if profile:
+            # AutoThrottle adjusts the slot delay on response_downloaded,
+            # which runs before this; let it back off but never speed up
+            # past the site's politeness floor.
+            slot = self.crawler.engine.downloader.slots.get(site)
+            if slot is not None and slot.delay < profile['delay']:
+                slot.delay = profile['delay']
+        return response
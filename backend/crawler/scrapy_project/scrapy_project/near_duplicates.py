@@ -0,0 +1,207 @@
+"""
+Near-duplicate detection of syndicated articles
+
+The sites republish the same wire story with small edits: another title, a
+byline, a paragraph cut or added. DuplicatesPipeline only catches the exact
+title + site_id, so every copy used to become a post of its own.
+
+Each article's content gets a MinHash signature of its word 3-grams
+(shingles). Two signatures agree in about the share of positions that is
+the Jaccard similarity of the two shingle sets: a light edit keeps it above
+0.8, unrelated articles are near 0. The signature is built with one hash
+per shingle (one-permutation hashing): the top bits of the hash pick one of
+NUM_HASHES bins and each bin keeps its smallest value; bins no shingle fell
+into borrow the value of the next filled bin.
+
+For lookups the signature is cut into BANDS bands of ROWS values and each
+band hashed to a 64-bit key. Posts sharing any band key with an article are
+its candidates, found through a GIN index on post_fingerprints.band_keys
+instead of comparing every post; articles with similarity 0.7 share a band
+98.8% of the time, with 0.2 only 2.5%. Candidates are then compared on the
+full signature:
+
+    index = NearDuplicateIndex(connection)
+    match = index.find(minhash(content))   # (post_id, similarity) or None
+
+A near duplicate is recorded in post_duplicates against the post it copies
+(the canonical post) and not stored as a post again.
+"""
+
+import hashlib
+import re
+import struct
+
+NEAR_DUPLICATES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS post_fingerprints (
+    post_id INTEGER PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL,
+    band_keys BIGINT[] NOT NULL
+);
+-- Without a pending list, so every lookup costs the same few index pages
+CREATE INDEX IF NOT EXISTS idx_post_fingerprints_band_keys ON post_fingerprints
+    USING gin (band_keys) WITH (fastupdate = off);
+CREATE TABLE IF NOT EXISTS post_duplicates (
+    id SERIAL PRIMARY KEY,
+    canonical_post_id INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    site_id INTEGER REFERENCES sites(id) ON DELETE CASCADE,
+    title VARCHAR(1000) NOT NULL,
+    url VARCHAR(1000) NOT NULL UNIQUE,
+    similarity REAL NOT NULL,
+    found_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_post_duplicates_canonical ON post_duplicates (canonical_post_id);
+"""
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+# Words per shingle
+SHINGLE_WORDS = 3
+# Shorter texts are not fingerprinted: a few shingles make a noisy signature
+MIN_WORDS = 30
+# Estimated Jaccard similarity from which an article is a copy
+MIN_SIMILARITY = 0.7
+
+_WORD = re.compile(r'\w+')
+_BIN_SHIFT = 64 - (NUM_HASHES - 1).bit_length()
+_VALUE_MASK = 0xFFFFFFFF
+# Added per bin skipped, so a borrowed value differs from the one it copies
+_BORROW_OFFSET = 0x9E3779B9
+_SIGNATURE = struct.Struct(f'<{NUM_HASHES}I')
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Set of the lowercased word n-grams of `text`"""
+    words = _WORD.findall(text.lower())
+    return {' '.join(gram) for gram in zip(*(words[i:] for i in range(size)))}
+
+
+def minhash(text):
+    """MinHash signature of `text`, a tuple of NUM_HASHES ints, or None when
+    it has fewer than MIN_WORDS words"""
+    if not text or len(_WORD.findall(text)) < MIN_WORDS:
+        return None
+    mins = [None] * NUM_HASHES
+    for gram in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+        slot = value >> _BIN_SHIFT
+        value &= _VALUE_MASK
+        if mins[slot] is None or value < mins[slot]:
+            mins[slot] = value
+
+    signature = list(mins)
+    for slot, value in enumerate(mins):
+        if value is None:
+            step = 1
+            while mins[(slot + step) % NUM_HASHES] is None:
+                step += 1
+            signature[slot] = (mins[(slot + step) % NUM_HASHES] + step * _BORROW_OFFSET) & _VALUE_MASK
+    return tuple(signature)
+
+
+def band_keys(signature):
+    """One signed 64-bit key per band of the signature"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS}I', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def pack(signature):
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack(data):
+    return _SIGNATURE.unpack(bytes(data))
+
+
+class NearDuplicateIndex:
+    """post_fingerprints and post_duplicates rows; add(), add_missing() and link() leave the commit to the caller"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def ensure_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(NEAR_DUPLICATES_TABLE_SQL)
+        self.connection.commit()
+
+    def candidates(self, signature, url=None, title=None, site_id=None):
+        """(post_id, signature) of the posts sharing a band key with `signature`
+
+        The post the article itself is saved as (same URL, or same title on
+        the same site) is left out, so a re-crawled article is not a copy of
+        its own earlier version. That takes a second query, by primary key,
+        only when there are candidates; joining posts into the first one
+        makes PostgreSQL scan all of posts.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT post_id, signature FROM post_fingerprints WHERE band_keys && %s::BIGINT[]",
+                (band_keys(signature),),
+            )
+            rows = cursor.fetchall()
+            if rows and (url or title):
+                cursor.execute("""
+                    SELECT id FROM posts
+                    WHERE id = ANY(%s) AND (url = %s OR (title = %s AND site_id = %s))
+                """, ([post_id for post_id, _ in rows], url, title, site_id))
+                own = {row[0] for row in cursor.fetchall()}
+                rows = [row for row in rows if row[0] not in own]
+        return [(post_id, unpack(data)) for post_id, data in rows]
+
+    def find(self, signature, min_similarity=MIN_SIMILARITY, **exclude):
+        """(post_id, similarity) of the most similar post from min_similarity, or None
+
+        Ties go to the oldest post. `exclude` takes the url, title and
+        site_id of the article, see candidates().
+        """
+        best = None
+        for post_id, other in self.candidates(signature, **exclude):
+            score = similarity(signature, other)
+            if score >= min_similarity and (best is None or (-score, post_id) < (-best[1], best[0])):
+                best = (post_id, score)
+        return best
+
+    def add(self, post_id, signature):
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO post_fingerprints (post_id, signature, band_keys)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (post_id) DO UPDATE SET
+                    signature = EXCLUDED.signature,
+                    band_keys = EXCLUDED.band_keys
+            """, (post_id, pack(signature), band_keys(signature)))
+
+    def add_missing(self, site_id, title, signature):
+        """Fingerprint the post saved as `title` on the site, unless it has one
+
+        For posts stored before near-duplicate detection, or with it turned off.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO post_fingerprints (post_id, signature, band_keys)
+                SELECT id, %s, %s FROM posts WHERE title = %s AND site_id = %s
+                ON CONFLICT (post_id) DO NOTHING
+            """, (pack(signature), band_keys(signature), title, site_id))
+
+    def link(self, canonical_post_id, site_id, title, url, score):
+        """Record the article at `url` as a copy of the canonical post"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO post_duplicates (canonical_post_id, site_id, title, url, similarity)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (url) DO UPDATE SET
+                    canonical_post_id = EXCLUDED.canonical_post_id,
+                    site_id = EXCLUDED.site_id,
+                    title = EXCLUDED.title,
+                    similarity = EXCLUDED.similarity,
+                    found_at = NOW()
+            """, (canonical_post_id, site_id, title, url, score))
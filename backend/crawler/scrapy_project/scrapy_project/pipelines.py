@@ -5,12 +5,16 @@
 
 import psycopg2
 import os
+import json
 import logging
 from datetime import datetime
 from itemadapter import ItemAdapter
-from scrapy.exceptions import DropItem
+from scrapy.exceptions import DropItem, NotConfigured
 import hashlib
 
+from scrapy_project.db import connect
+from scrapy_project.near_duplicates import NEAR_DUPLICATES_TABLE_SQL, NearDuplicateIndex, minhash
+
 
 class DuplicatesPipeline:
     """Pipeline to filter out duplicate items based on title + site_id"""
@@ -62,16 +66,100 @@ class ValidationPipeline:
         return item
 
 
+class NearDuplicatePipeline:
+    """Pipeline to link copies of stored articles to the post they copy
+
+    Computes the MinHash signature of each article's content and looks up
+    stored posts with similar content (scrapy_project/near_duplicates.py).
+    A copy gets canonical_post_id and similarity set, and PostgresPipeline
+    records it in post_duplicates instead of storing it as a post; any other
+    article is stored with its signature.
+    """
+
+    def __init__(self, settings, stats):
+        self.settings = settings
+        self.stats = stats
+        self.min_similarity = settings.getfloat('NEAR_DUPLICATE_MIN_SIMILARITY', 0.7)
+        self.connection = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('NEAR_DUPLICATES_ENABLED', True):
+            raise NotConfigured
+        return cls(crawler.settings, crawler.stats)
+
+    def open_spider(self, spider):
+        try:
+            self.connection = connect(self.settings)
+            self.index = NearDuplicateIndex(self.connection)
+        except Exception as e:
+            spider.logger.error(f"❌ Near-duplicate index unavailable, storing every article: {e}")
+            self.connection = None
+
+    def close_spider(self, spider):
+        if self.connection is not None:
+            self.connection.close()
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        if adapter.get('name'):  # SiteItem
+            return item
+        if self.connection is None:
+            return item
+
+        signature = minhash(adapter.get('content'))
+        if signature is None:
+            self.stats.inc_value('near_duplicates/too_short')
+            return item
+        adapter['content_signature'] = signature
+
+        try:
+            match = self.index.find(
+                signature, self.min_similarity,
+                url=adapter.get('url'), title=adapter.get('title'), site_id=adapter.get('site_id'),
+            )
+            self.connection.commit()
+        except psycopg2.Error as e:
+            self.connection.rollback()
+            spider.logger.error(f"Error looking up near duplicates: {e}")
+            return item
+
+        self.stats.inc_value('near_duplicates/checked')
+        if match is not None:
+            adapter['canonical_post_id'], adapter['similarity'] = match
+            self.stats.inc_value('near_duplicates/linked')
+            spider.logger.info(
+                f"🔗 Near duplicate of post {match[0]} ({match[1]:.0%} similar): {adapter['title'][:50]}"
+            )
+        return item
+
+
+def content_hash(*values):
+    """16-byte digest of a post's stored values, to tell whether a re-crawl changed it"""
+    serialized = json.dumps(values, ensure_ascii=False, default=str)
+    return hashlib.blake2b(serialized.encode('utf-8'), digest_size=16).digest()
+
+
 class PostgresPipeline:
-    """Pipeline to save items to PostgreSQL database"""
+    """Pipeline to save items to PostgreSQL database
+
+    A post seen again is only rewritten when its content_hash changed, so
+    re-crawling unchanged articles costs no row versions, WAL or index
+    updates. published_date is not part of the hash: a relative date
+    ("2 giờ trước") resolves to a different time on every crawl, so it never
+    replaces a stored date, and an absolute one is compared on its own. posts/inserted, posts/updated and posts/unchanged count the
+    outcomes of the run.
+    """
 
     def __init__(self, postgres_host, postgres_port, postgres_db, 
-                 postgres_user, postgres_password):
+                 postgres_user, postgres_password, stats=None):
         self.postgres_host = postgres_host
         self.postgres_port = postgres_port
         self.postgres_db = postgres_db
         self.postgres_user = postgres_user
         self.postgres_password = postgres_password
+        self.stats = stats
+        self.post_counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
 
     @classmethod
     def from_crawler(cls, crawler):
@@ -81,6 +169,7 @@ class PostgresPipeline:
             postgres_db=crawler.settings.get("POSTGRES_DB", "postgres"),
             postgres_user=crawler.settings.get("POSTGRES_USER", "postgres"),
             postgres_password=crawler.settings.get("POSTGRES_PASSWORD", "password"),
+            stats=crawler.stats,
         )
 
     def open_spider(self, spider):
@@ -115,6 +204,9 @@ class PostgresPipeline:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+        ALTER TABLE sites ADD COLUMN IF NOT EXISTS config JSONB;
+        ALTER TABLE sites ADD COLUMN IF NOT EXISTS config_version INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE sites ADD COLUMN IF NOT EXISTS enabled BOOLEAN NOT NULL DEFAULT TRUE;
         """
         
         # Create posts table
@@ -129,12 +221,23 @@ class PostgresPipeline:
             author VARCHAR(255),
             tags TEXT[],
             image_url VARCHAR(1000),
-            published_date TIMESTAMP,
+            published_date TIMESTAMPTZ,
             scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(title, site_id)
         );
+        ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+        -- Dates saved before they carried a zone were Vietnam dates
+        DO $$
+        BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'posts'
+                  AND column_name = 'published_date') = 'timestamp without time zone' THEN
+                ALTER TABLE posts ALTER COLUMN published_date TYPE TIMESTAMPTZ
+                    USING published_date AT TIME ZONE 'Asia/Ho_Chi_Minh';
+            END IF;
+        END $$;
         """
         
         # Create index for better performance
@@ -148,6 +251,7 @@ class PostgresPipeline:
         try:
             self.cursor.execute(sites_table)
             self.cursor.execute(posts_table)
+            self.cursor.execute(NEAR_DUPLICATES_TABLE_SQL)
             
             for index in indexes:
                 self.cursor.execute(index)
@@ -163,6 +267,11 @@ class PostgresPipeline:
         if hasattr(self, 'connection'):
             self.connection.close()
             spider.logger.info("PostgreSQL connection closed")
+        counts = self.post_counts
+        spider.logger.info(
+            f"📊 Posts: {counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged"
+        )
 
     def process_item(self, item, spider):
         """Process and save item to database"""
@@ -171,6 +280,8 @@ class PostgresPipeline:
         try:
             if adapter.get('name'):  # This is a SiteItem
                 self.insert_site(adapter)
+            elif adapter.get('canonical_post_id'):  # A copy of a stored post
+                self.insert_duplicate(adapter)
             else:  # This is a PostItem
                 self.insert_post(adapter)
                 
@@ -208,13 +319,15 @@ class PostgresPipeline:
         self.connection.commit()
 
     def insert_post(self, adapter):
-        """Insert post data"""
+        """Insert post data, or update it if its content hash changed"""
+        # No row comes back when the WHERE skips the update; xmax is 0 for a new row
         insert_query = """
         INSERT INTO posts (
             site_id, title, content, excerpt, url, author, 
-            tags, image_url, published_date, scraped_at
+            tags, image_url, published_date, scraped_at, content_hash
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%(site_id)s, %(title)s, %(content)s, %(excerpt)s, %(url)s, %(author)s,
+                %(tags)s, %(image_url)s, %(published_date)s, %(scraped_at)s, %(content_hash)s)
         ON CONFLICT (title, site_id) DO UPDATE SET
             content = EXCLUDED.content,
             excerpt = EXCLUDED.excerpt,
@@ -222,9 +335,15 @@ class PostgresPipeline:
             author = EXCLUDED.author,
             tags = EXCLUDED.tags,
             image_url = EXCLUDED.image_url,
-            published_date = EXCLUDED.published_date,
+            published_date = CASE WHEN %(relative_date)s
+                THEN COALESCE(posts.published_date, EXCLUDED.published_date)
+                ELSE EXCLUDED.published_date END,
             scraped_at = EXCLUDED.scraped_at,
-            updated_at = CURRENT_TIMESTAMP;
+            content_hash = EXCLUDED.content_hash,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE posts.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+           OR (NOT %(relative_date)s AND posts.published_date IS DISTINCT FROM EXCLUDED.published_date)
+        RETURNING id, xmax = 0;
         """
         
         # Convert tags list to PostgreSQL array format
@@ -234,19 +353,55 @@ class PostgresPipeline:
         else:
             tags_array = [tags] if tags else []
         
-        self.cursor.execute(insert_query, (
+        values = {
+            'site_id': adapter['site_id'],
+            'title': adapter['title'],
+            'content': adapter.get('content', ''),
+            'excerpt': adapter.get('excerpt', ''),
+            'url': adapter.get('url', ''),
+            'author': adapter.get('author', ''),
+            'tags': tags_array,
+            'image_url': adapter.get('image_url', ''),
+        }
+        self.cursor.execute(insert_query, {
+            **values,
+            'published_date': adapter.get('published_date'),
+            'relative_date': bool(adapter.get('published_date_relative')),
+            'scraped_at': adapter.get('scraped_at', datetime.now()),
+            'content_hash': content_hash(*values.values()),
+        })
+        row = self.cursor.fetchone()
+        if row is None:
+            if adapter.get('content_signature'):
+                NearDuplicateIndex(self.connection).add_missing(
+                    adapter['site_id'], adapter['title'], adapter['content_signature']
+                )
+            self.connection.commit()
+            self.count_post('unchanged')
+            return
+        post_id, inserted = row
+        
+        # Fingerprint for NearDuplicatePipeline's lookups
+        if adapter.get('content_signature'):
+            NearDuplicateIndex(self.connection).add(post_id, adapter['content_signature'])
+        
+        self.connection.commit()
+        self.count_post('inserted' if inserted else 'updated')
+
+    def count_post(self, outcome):
+        self.post_counts[outcome] += 1
+        if self.stats is not None:
+            self.stats.inc_value(f'posts/{outcome}')
+
+    def insert_duplicate(self, adapter):
+        """Link a near duplicate to its canonical post instead of storing it"""
+        NearDuplicateIndex(self.connection).link(
+            adapter['canonical_post_id'],
             adapter['site_id'],
             adapter['title'],
-            adapter.get('content', ''),
-            adapter.get('excerpt', ''),
             adapter.get('url', ''),
-            adapter.get('author', ''),
-            tags_array,
-            adapter.get('image_url', ''),
-            adapter.get('published_date'),
-            adapter.get('scraped_at', datetime.now())
-        ))
-        
+            adapter['similarity'],
+        )
         self.connection.commit()
 
 
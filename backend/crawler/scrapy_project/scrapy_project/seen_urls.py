@@ -0,0 +1,224 @@
+"""
+Persistent store of already-ingested article URLs
+
+Article URLs that made it through the item pipelines are recorded in the
+crawl_seen_urls table as 64-bit fingerprints. At spider open all
+fingerprints are loaded into a Bloom filter, and SeenUrlMiddleware drops
+article requests whose URL is already in the store before they are
+scheduled. The Bloom filter answers "definitely new" without a query; its
+positives are confirmed against the table in one query per page.
+"""
+
+import hashlib
+import math
+
+from psycopg2.extras import execute_values
+from scrapy import Request, signals
+from w3lib.url import canonicalize_url
+
+from scrapy_project.db import connect
+
+SEEN_URLS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_seen_urls (
+    fingerprint BIGINT PRIMARY KEY,
+    url VARCHAR(1000) NOT NULL,
+    site_id INTEGER,
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def url_fingerprint(url):
+    """Signed 64-bit fingerprint of the canonical form of `url`"""
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+class BloomFilter:
+    """Bloom filter over 64-bit fingerprints, sized for a false-positive rate"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, fingerprint):
+        # Double hashing over the two halves of the fingerprint
+        value = fingerprint & 0xFFFFFFFFFFFFFFFF
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, fingerprint):
+        for position in self._positions(fingerprint):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, fingerprint):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(fingerprint))
+
+
+class SeenUrlStore:
+    """crawl_seen_urls table fronted by an in-memory Bloom filter"""
+
+    def __init__(self, connection, error_rate=0.001, flush_size=100):
+        self.connection = connection
+        self.error_rate = error_rate
+        self.flush_size = flush_size
+        self.bloom = None
+        self.pending = {}
+
+    def load(self):
+        """Create the table if needed and fill the Bloom filter, return the row count"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(SEEN_URLS_TABLE_SQL)
+            cursor.execute("SELECT fingerprint FROM crawl_seen_urls")
+            fingerprints = [row[0] for row in cursor.fetchall()]
+        self.connection.commit()
+
+        # Leave room for the URLs this crawl is going to add
+        self.bloom = BloomFilter(max(len(fingerprints) * 2, 100000), self.error_rate)
+        for fingerprint in fingerprints:
+            self.bloom.add(fingerprint)
+        return len(fingerprints)
+
+    def maybe_seen(self, fingerprint):
+        return fingerprint in self.bloom
+
+    def confirm(self, fingerprints):
+        """Return the subset of `fingerprints` that is really in the store"""
+        if not fingerprints:
+            return set()
+        confirmed = {fp for fp in fingerprints if fp in self.pending}
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT fingerprint FROM crawl_seen_urls WHERE fingerprint = ANY(%s)",
+                (list(fingerprints),),
+            )
+            confirmed.update(row[0] for row in cursor.fetchall())
+        self.connection.commit()
+        return confirmed
+
+    def add(self, url, site_id=None):
+        fingerprint = url_fingerprint(url)
+        self.bloom.add(fingerprint)
+        self.pending[fingerprint] = (fingerprint, url[:1000], site_id)
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        rows = list(self.pending.values())
+        try:
+            with self.connection.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    "INSERT INTO crawl_seen_urls (fingerprint, url, site_id) VALUES %s "
+                    "ON CONFLICT (fingerprint) DO NOTHING",
+                    rows,
+                )
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.pending.clear()
+        return len(rows)
+
+
+class SeenUrlMiddleware:
+    """Spider middleware dropping article requests for URLs ingested by earlier crawls
+
+    Only requests flagged with meta['article'] are checked, so homepages
+    and pagination are always fetched; meta['refetch'] marks an article
+    known to have changed and bypasses the check. A URL is recorded once
+    its item has been scraped, i.e. after it passed every item pipeline.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.enabled = crawler.settings.getbool('SEEN_URLS_ENABLED', True)
+        self.error_rate = crawler.settings.getfloat('SEEN_URLS_BLOOM_ERROR_RATE', 0.001)
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.item_scraped, signal=signals.item_scraped)
+        return s
+
+    def spider_opened(self, spider):
+        if not self.enabled:
+            return
+        try:
+            self.store = SeenUrlStore(connect(self.crawler.settings), self.error_rate)
+            loaded = self.store.load()
+        except Exception as e:
+            spider.logger.error(f"❌ Seen-URL store unavailable, crawling without it: {e}")
+            self.store = None
+            return
+        self.stats.set_value('seen_urls/loaded', loaded)
+        spider.logger.info(f"🧠 Loaded {loaded} seen article URLs into the Bloom filter")
+
+    def spider_closed(self, spider):
+        if self.store is None:
+            return
+        try:
+            self.store.flush()
+        except Exception as e:
+            spider.logger.error(f"❌ Error saving seen URLs: {e}")
+        self.store.connection.close()
+
+    def item_scraped(self, item, response, spider):
+        if self.store is None or item.get('name') or not response.meta.get('article'):
+            return
+        urls = {response.url, *response.meta.get('redirect_urls', [])}
+        try:
+            for url in urls:
+                self.store.add(url, item.get('site_id'))
+            self.stats.inc_value('seen_urls/recorded', len(urls))
+        except Exception as e:
+            spider.logger.error(f"❌ Error saving seen URLs: {e}")
+
+    def process_spider_output(self, response, result, spider):
+        if self.store is None:
+            yield from result
+            return
+
+        # Buffer the page's output so Bloom positives are confirmed in one query
+        outputs = []
+        candidates = {}
+        for output in result:
+            if (isinstance(output, Request) and output.meta.get('article')
+                    and not output.meta.get('refetch')):
+                fingerprint = url_fingerprint(output.url)
+                outputs.append((output, fingerprint))
+                if self.store.maybe_seen(fingerprint):
+                    candidates[fingerprint] = output.url
+            else:
+                outputs.append((output, None))
+
+        seen = set()
+        if candidates:
+            try:
+                seen = self.store.confirm(candidates)
+            except Exception as e:
+                spider.logger.error(f"❌ Error checking seen URLs, keeping requests: {e}")
+                self.store.connection.rollback()
+            self.stats.inc_value('seen_urls/bloom_false_positives', len(candidates) - len(seen))
+
+        for output, fingerprint in outputs:
+            if fingerprint is not None and fingerprint in seen:
+                self.stats.inc_value('seen_urls/requests_avoided')
+                spider.logger.debug(f"⏭️  Already ingested, skipping: {output.url}")
+                continue
+            yield output
+
+    def process_start_requests(self, start_requests, spider):
+        for r in start_requests:
+            yield r
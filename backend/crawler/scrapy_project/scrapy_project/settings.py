@@ -28,6 +28,7 @@ ITEM_PIPELINES = {
     'scrapy_project.pipelines.LoggingPipeline': 100,
     'scrapy_project.pipelines.ValidationPipeline': 200,
     'scrapy_project.pipelines.DuplicatesPipeline': 300,
+    'scrapy_project.pipelines.NearDuplicatePipeline': 350,
     'scrapy_project.pipelines.PostgresPipeline': 400,
     'scrapy_project.pipelines.StatsLoggingPipeline': 500,
 }
@@ -35,10 +36,16 @@ ITEM_PIPELINES = {
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
-DOWNLOAD_DELAY = 2
-# The download delay setting will honor only one of:
+# These are the defaults for domains without a crawl_profile. Sites listed in
+# FinancialNewsSpider.site_configs get their own download slot with the
+# concurrency and delay of their crawl_profile (see site_profiles.py).
+# DOWNLOAD_DELAY is also the lowest delay AutoThrottle will pick for any
+# slot; SiteProfileMiddleware keeps each site at or above its own delay.
+DOWNLOAD_DELAY = 0.5
+CONCURRENT_REQUESTS = 16
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
-CONCURRENT_REQUESTS_PER_IP = 1
+# Throttle per site rather than per IP: several sites share CDN addresses
+CONCURRENT_REQUESTS_PER_IP = 0
 
 # Disable cookies (enabled by default)
 COOKIES_ENABLED = False
@@ -60,15 +67,26 @@ DEFAULT_REQUEST_HEADERS = {
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 SPIDER_MIDDLEWARES = {
     'scrapy_project.middlewares.ScrapyProjectSpiderMiddleware': 543,
+    'scrapy_project.seen_urls.SeenUrlMiddleware': 550,
 }
 
+# Sitemap discovery (-a discovery=sitemap) enqueues entries modified since the
+# last successful sitemap crawl, but never older than this many days
+DISCOVERY_MAX_AGE_DAYS = 3
+
+# Skip article URLs already ingested by earlier crawls (crawl_seen_urls table)
+SEEN_URLS_ENABLED = True
+SEEN_URLS_BLOOM_ERROR_RATE = 0.001
+
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
+    'scrapy_project.middlewares.SiteProfileMiddleware': 540,
     'scrapy_project.middlewares.ScrapyProjectDownloaderMiddleware': 543,
     'scrapy_project.middlewares.RandomDelayMiddleware': 550,
     'scrapy_project.middlewares_logging.LoggingMiddleware': 560,
     'scrapy_project.middlewares_logging.StatsLoggingMiddleware': 570,
+    'scrapy_project.conditional.ConditionalRequestMiddleware': 580,
     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
     'scrapy_user_agents.middlewares.RandomUserAgentMiddleware': 400,
 }
@@ -91,7 +109,51 @@ AUTOTHROTTLE_DEBUG = True
 HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 3600
 HTTPCACHE_DIR = 'httpcache'
-HTTPCACHE_IGNORE_HTTP_CODES = [503, 504, 505, 500, 403, 404, 408, 429]
+HTTPCACHE_IGNORE_HTTP_CODES = [503, 504, 505, 500, 403, 404, 408, 429, 304]
+# One zstd-compressed SQLite file per spider instead of several files per
+# response, capped in size with least-recently-used eviction
+HTTPCACHE_STORAGE = 'scrapy_project.httpcache.SqliteCacheStorage'
+HTTPCACHE_SQLITE_MAX_BYTES = 512 * 1024 * 1024
+HTTPCACHE_SQLITE_COMPRESSION_LEVEL = 3
+
+# Send stored ETag/Last-Modified validators and drop unchanged pages
+# (crawl_page_validators table)
+CONDITIONAL_REQUESTS_ENABLED = True
+
+# Shared crawl frontier (crawl_frontier table), used by several processes at
+# once with -s SCHEDULER=scrapy_project.frontier.PostgresFrontierScheduler
+# and the same -s FRONTIER_CRAWL_ID (python crawler_manager.py crawl --workers N)
+FRONTIER_BATCH_SIZE = 16
+FRONTIER_LEASE_SECONDS = 300
+FRONTIER_MAX_ATTEMPTS = 3
+FRONTIER_POLL_INTERVAL = 1.0
+
+# Save spider counters and flush the frontier every CHECKPOINT_INTERVAL
+# seconds (crawl_checkpoints table), so a frontier crawl can be resumed
+EXTENSIONS = {
+    'scrapy_project.checkpoint.CheckpointExtension': 500,
+}
+CHECKPOINT_ENABLED = True
+CHECKPOINT_INTERVAL = 30
+
+# The crawl daemon never resumes a run, so it deletes a run's frontier rows and
+# checkpoint when the run ends; those of runs it could not clean up after (the
+# daemon was killed) are pruned after this many days
+DAEMON_CRAWL_RETENTION_DAYS = 7
+
+# Worker processes that parse article pages and extract their fields, so the
+# reactor thread keeps downloading meanwhile (0 = extract in the reactor thread)
+EXTRACTION_POOL_SIZE = 0
+
+# Articles whose content is at least NEAR_DUPLICATE_MIN_SIMILARITY similar to a
+# stored post (estimated Jaccard of word 3-grams) are linked to it in the
+# post_duplicates table instead of being stored again
+NEAR_DUPLICATES_ENABLED = True
+NEAR_DUPLICATE_MIN_SIMILARITY = 0.7
+
+# Site configs come from the sites table (python crawler_manager.py sites --load);
+# without a database the spider reads the seed files in this directory
+SITE_CONFIGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sites')
 
 # PostgreSQL Database settings
 POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
@@ -100,7 +162,8 @@ POSTGRES_DB = os.getenv('POSTGRES_DB', 'postgres')
 POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'password')
 
-# Random delay settings
+# Random delay settings: hosts without a crawl profile wait 0.5x-1.5x the middle of
+# this range between requests, through their download slot (RandomDelayMiddleware)
 RANDOM_DELAY_RANGE = [1, 3]
 
 # Log level
@@ -0,0 +1,257 @@
+"""
+Site configs stored in the sites table
+
+Each crawled site is described declaratively: start URLs, crawl_profile,
+article_selectors, url_patterns and discovery. The config lives as JSONB
+in the sites table next to its name and base_url, with a config_version
+bumped on every change. YAML (or JSON) seed files in crawler/sites/ are
+loaded into the table with `python crawler_manager.py sites --load`:
+
+    id: 3
+    name: CafeF
+    base_url: https://cafef.vn
+    enabled: true
+    start_urls: [https://cafef.vn/]
+    crawl_profile: {concurrency: 2, delay: 1.0, max_requests: 500}
+    article_selectors:
+      links: a[href*="/chung-khoan-"]
+      title: h1.title, h1.detail-title
+      content: .detail-content, .contentwrap
+
+Every config is validated and its selectors and URL patterns compiled when
+it is loaded; an invalid one raises SiteConfigError and is skipped. The
+spider reads the table when a crawl starts, so the next crawl (or the next
+daemon run) picks up changes without a restart.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+from urllib.parse import urlparse
+
+import yaml
+
+from scrapy_project.db import connect
+from scrapy_project.extraction import SiteExtractor
+from scrapy_project.site_profiles import get_crawl_profile
+from scrapy_project.url_classifier import build_pattern
+
+logger = logging.getLogger(__name__)
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sites')
+
+SITES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sites (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    base_url VARCHAR(500) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE sites ADD COLUMN IF NOT EXISTS config JSONB;
+ALTER TABLE sites ADD COLUMN IF NOT EXISTS config_version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE sites ADD COLUMN IF NOT EXISTS enabled BOOLEAN NOT NULL DEFAULT TRUE;
+"""
+
+# Columns of the sites table; everything else goes into the config column
+SITE_COLUMNS = ('id', 'name', 'base_url', 'description', 'enabled')
+CONFIG_KEYS = ('start_urls', 'crawl_profile', 'article_selectors', 'url_patterns', 'discovery')
+REQUIRED_SELECTORS = ('links', 'title', 'content')
+OPTIONAL_SELECTORS = ('excerpt', 'author', 'published_date', 'image', 'content_exclude')
+
+
+class SiteConfigError(ValueError):
+    """A site config that cannot be used"""
+
+
+def _require(condition, name, message):
+    if not condition:
+        raise SiteConfigError(f"{name}: {message}")
+
+
+def validate_site_config(raw):
+    """Check and normalize one site config, return (domain, config)
+
+    The returned config is what FinancialNewsSpider.site_configs holds for
+    the domain. Selectors, URL patterns and the crawl profile are compiled
+    here, so a broken config fails at load rather than in the middle of a
+    crawl.
+    """
+    name = raw.get('name') if isinstance(raw, dict) else None
+    _require(isinstance(raw, dict), '<site>', "config must be a mapping")
+    _require(isinstance(name, str) and name.strip(), '<site>', "'name' is required")
+    unknown = set(raw) - set(SITE_COLUMNS) - set(CONFIG_KEYS) - {'version'}
+    _require(not unknown, name, f"unknown keys {sorted(unknown)}")
+    _require(isinstance(raw.get('id'), int), name, "'id' must be an integer")
+
+    base_url = raw.get('base_url') or ''
+    parsed = urlparse(base_url)
+    _require(parsed.scheme in ('http', 'https') and parsed.netloc, name, f"invalid base_url {base_url!r}")
+    domain = parsed.netloc.lower()
+
+    start_urls = raw.get('start_urls') or [base_url.rstrip('/') + '/']
+    _require(isinstance(start_urls, list), name, "'start_urls' must be a list")
+    for url in start_urls:
+        host = urlparse(url).netloc.lower()
+        _require(host == domain or host.endswith('.' + domain), name, f"start URL {url!r} is not on {domain}")
+
+    selectors = raw.get('article_selectors')
+    _require(isinstance(selectors, dict), name, "'article_selectors' is required")
+    for key in REQUIRED_SELECTORS:
+        _require(isinstance(selectors.get(key), str) and selectors[key].strip(), name,
+                 f"article_selectors.{key} is required")
+    unknown = set(selectors) - set(REQUIRED_SELECTORS) - set(OPTIONAL_SELECTORS)
+    _require(not unknown, name, f"unknown article_selectors {sorted(unknown)}")
+    try:
+        SiteExtractor(selectors)
+    except Exception as e:
+        raise SiteConfigError(f"{name}: invalid article selector: {e}") from e
+
+    try:
+        build_pattern(raw.get('url_patterns'))
+    except (re.error, TypeError, AttributeError) as e:
+        raise SiteConfigError(f"{name}: invalid url_patterns: {e}") from e
+
+    try:
+        crawl_profile = get_crawl_profile(raw)
+    except (TypeError, ValueError) as e:
+        raise SiteConfigError(f"{name}: invalid crawl_profile: {e}") from e
+
+    config = {
+        'id': raw['id'],
+        'name': name,
+        'start_urls': list(start_urls),
+        'crawl_profile': crawl_profile,
+        'article_selectors': dict(selectors),
+        'version': raw.get('version', 0),
+    }
+    for key in ('url_patterns', 'discovery'):
+        if raw.get(key):
+            config[key] = raw[key]
+    return domain, config
+
+
+def read_seed_files(seed_dir=SEED_DIR):
+    """Raw site configs of the YAML/JSON files in `seed_dir`, in file name order"""
+    paths = sorted(
+        path for pattern in ('*.yaml', '*.yml', '*.json')
+        for path in glob.glob(os.path.join(seed_dir, pattern))
+    )
+    configs = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            raw = yaml.safe_load(f)
+        if not isinstance(raw, dict):
+            raise SiteConfigError(f"{os.path.basename(path)}: expected one site config mapping")
+        configs.append(raw)
+    return configs
+
+
+class SiteConfigStore:
+    """Versioned site configs in the sites table"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def ensure_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(SITES_TABLE_SQL)
+        self.connection.commit()
+
+    def versions(self):
+        """{site id: (config_version, enabled)}, cheap enough to poll"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT id, config_version, enabled FROM sites WHERE config IS NOT NULL")
+            versions = {site_id: (version, enabled) for site_id, version, enabled in cursor.fetchall()}
+        self.connection.commit()
+        return versions
+
+    def load(self):
+        """Validated configs of the enabled sites, keyed by domain"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, name, base_url, config, config_version FROM sites
+                WHERE enabled AND config IS NOT NULL
+                ORDER BY id
+            """)
+            rows = cursor.fetchall()
+        self.connection.commit()
+
+        site_configs = {}
+        for site_id, name, base_url, config, version in rows:
+            raw = dict(config, id=site_id, name=name, base_url=base_url, version=version)
+            try:
+                domain, site_config = validate_site_config(raw)
+            except SiteConfigError as e:
+                logger.error(f"❌ Skipping site config v{version}: {e}")
+                continue
+            site_configs[domain] = site_config
+        return site_configs
+
+    def save(self, raw):
+        """Validate and upsert one raw config, return its version
+
+        The version only changes when the stored config differs.
+        """
+        validate_site_config(raw)
+        config = {key: raw[key] for key in CONFIG_KEYS if key in raw}
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO sites (id, name, base_url, description, enabled, config, config_version)
+                    VALUES (%s, %s, %s, %s, %s, %s, 1)
+                    ON CONFLICT (id) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        base_url = EXCLUDED.base_url,
+                        description = COALESCE(EXCLUDED.description, sites.description),
+                        enabled = EXCLUDED.enabled,
+                        config = EXCLUDED.config,
+                        config_version = sites.config_version + CASE
+                            WHEN sites.config IS DISTINCT FROM EXCLUDED.config
+                              OR sites.enabled IS DISTINCT FROM EXCLUDED.enabled THEN 1 ELSE 0 END,
+                        updated_at = CURRENT_TIMESTAMP
+                    RETURNING config_version
+                """, (
+                    raw['id'], raw['name'], raw['base_url'], raw.get('description'),
+                    bool(raw.get('enabled', True)), json.dumps(config, ensure_ascii=False),
+                ))
+                version = cursor.fetchone()[0]
+                # Keep the id sequence ahead of explicitly numbered sites
+                cursor.execute("SELECT setval(pg_get_serial_sequence('sites', 'id'), (SELECT MAX(id) FROM sites))")
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return version
+
+
+def load_site_configs(settings):
+    """Site configs for a crawl: the sites table, or the seed files without one"""
+    try:
+        connection = connect(settings)
+        try:
+            store = SiteConfigStore(connection)
+            store.ensure_schema()
+            site_configs = store.load()
+        finally:
+            connection.close()
+        if site_configs:
+            return site_configs
+        logger.warning("⚠️  No site configs in the sites table, using the seed files")
+    except Exception as e:
+        logger.warning(f"⚠️  Could not load site configs from the database, using the seed files: {e}")
+
+    site_configs = {}
+    for raw in read_seed_files(settings.get('SITE_CONFIGS_DIR') or SEED_DIR):
+        if not raw.get('enabled', True):
+            continue
+        try:
+            domain, site_config = validate_site_config(raw)
+        except SiteConfigError as e:
+            logger.error(f"❌ Skipping site config: {e}")
+            continue
+        site_configs[domain] = site_config
+    return site_configs
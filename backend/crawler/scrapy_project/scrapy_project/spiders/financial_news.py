@@ -1,113 +1,110 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import scrapy
 from itemloaders import ItemLoader
+from scrapy.spidermiddlewares.httperror import HttpError
+from scrapy.utils.gz import gunzip, gzip_magic_number
+from scrapy.utils.sitemap import sitemap_urls_from_robots
+from scrapy_project import dates, discovery, main_content
+from scrapy_project.conditional import NotModified
+from scrapy_project.db import connect
+from scrapy_project.extraction import SiteExtractor, extract_article
 from scrapy_project.items import PostItem, SiteItem
-from datetime import datetime
-import re
+from scrapy_project.site_config import load_site_configs
+from scrapy_project.site_profiles import build_download_slots
+from scrapy_project.structured_data import STRUCTURED_FIELDS
+from scrapy_project.url_classifier import UrlClassifier
+from datetime import datetime, timezone
 import logging
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urldefrag, urljoin, urlparse
 
 
 class FinancialNewsSpider(scrapy.Spider):
     name = 'financial_news'
-    allowed_domains = [
-        'vneconomy.vn',
-        # 'fica.dantri.com.vn', 
-        # 'cafef.vn',
-        # 'vietnamfinance.vn',
-        # 'stockbiz.vn'
-    ]
-    
-    start_urls = [
-        'https://vneconomy.vn/',
-        # 'https://fica.dantri.com.vn/',
-        # 'https://cafef.vn/',
-        # 'https://vietnamfinance.vn/',
-        # 'https://stockbiz.vn/'
-    ]
+    # Both default to the domains and start_urls of the site configs
+    allowed_domains = []
+    start_urls = []
+    # Sites to crawl, keyed by domain. Loaded from the sites table when the
+    # crawl starts (see site_config.py); a subclass may set its own instead.
+    site_configs = {}
     
-    def __init__(self, *args, **kwargs):
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # Read the site configs once per crawl, so edits apply to the next crawl
+        site_configs = cls.site_configs or load_site_configs(settings)
+        settings.set('SITE_CONFIGS', site_configs, priority='spider')
+        # One download slot per site, sized by its crawl_profile
+        slots = build_download_slots(site_configs)
+        slots.update(settings.getdict('DOWNLOAD_SLOTS'))
+        settings.set('DOWNLOAD_SLOTS', slots, priority='spider')
+
+    # How article URLs are found: 'homepage' follows article links on each
+    # start URL, 'sitemap' reads sitemaps and RSS/Atom feeds (-a discovery=sitemap)
+    DISCOVERY_MODES = ('homepage', 'sitemap')
+
+    def __init__(self, discovery='homepage', sites=None, *args, **kwargs):
         super(FinancialNewsSpider, self).__init__(*args, **kwargs)
+        if discovery not in self.DISCOVERY_MODES:
+            raise ValueError(f"Unknown discovery mode {discovery!r}, expected one of {self.DISCOVERY_MODES}")
+        self.discovery_mode = discovery
+        # Crawl only some of the sites (-a sites=vneconomy.vn,cafef.vn)
+        if isinstance(sites, str):
+            sites = sites.split(',')
+        self.only_sites = set(sites) if sites else None
         self.start_time = datetime.now()
+        self.started_at = datetime.now(timezone.utc)
         self.scraped_articles = 0
         self.failed_articles = 0
         self.sites_processed = 0
+        self.crawl_state = None
+        self.discovery_since = {}
+        # Sites with a discovered article that was never fetched this crawl
+        self.incomplete_domains = set()
+        self.url_classifiers = {}
+        self.extractors = {}
+        self.extraction_pool = None
         
         self.logger.info(f"🚀 Starting {self.name} spider at {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        self.logger.info(f"📋 Configured domains: {', '.join(self.allowed_domains)}")
-        self.logger.info(f"🔗 Start URLs: {len(self.start_urls)} URLs to process")
+        self.logger.info(f"🧭 Discovery mode: {self.discovery_mode}")
+    
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.configure_sites(crawler.settings.get('SITE_CONFIGS') or cls.site_configs)
+        spider.extraction_pool_size = crawler.settings.getint('EXTRACTION_POOL_SIZE', 0)
+        if spider.extraction_pool_size > 0:
+            spider.extraction_pool = ProcessPoolExecutor(spider.extraction_pool_size)
+            spider.logger.info(f"⚙️  Extracting articles in {spider.extraction_pool_size} worker processes")
+        return spider
     
-    # Site configurations for each domain
-    site_configs = {
-        'vneconomy.vn': {
-            'id': 1,
-            'name': 'VnEconomy',
-            'article_selectors': {
-                'links': 'h3.story__title > a',
-                'title': 'h1.detail__title',
-                'content': 'div.detail__content',
-                'excerpt': 'h2.detail__summary',
-                'author': '.detail__author',
-                'published_date': 'div.detail__meta',
-                'image': 'figure.detail__avatar'
-            }
-        },
-        # 'fica.dantri.com.vn': {
-        #     'id': 2,
-        #     'name': 'Dân Trí Finance',
-        #     'article_selectors': {
-        #         'links': 'a[href*="/tai-chinh/"], a[href*="/chung-khoan/"], a[href*="/kinh-doanh/"]',
-        #         'title': 'h1.detail-title, h1.title-detail',
-        #         'content': '.detail-content, .singular-content',
-        #         'excerpt': '.detail-sapo, .sapo',
-        #         'author': '.detail-author, .author',
-        #         'published_date': '.detail-time, .publish-time',
-        #         'image': '.detail-image img, .featured-image img'
-        #     }
-        # },
-        # 'cafef.vn': {
-        #     'id': 3,
-        #     'name': 'CafeF',
-        #     'article_selectors': {
-        #         'links': 'a[href*="/chung-khoan-"], a[href*="/tai-chinh-"], a[href*="/kinh-te-"]',
-        #         'title': 'h1.title, h1.detail-title',
-        #         'content': '.detail-content, .contentwrap',
-        #         'excerpt': '.sapo, .detail-sapo',
-        #         'author': '.author, .detail-author',
-        #         'published_date': '.time, .detail-time',
-        #         'image': '.detail-img img, .thumb img'
-        #     }
-        # },
-        # 'vietnamfinance.vn': {
-        #     'id': 4,
-        #     'name': 'Vietnam Finance',
-        #     'article_selectors': {
-        #         'links': 'a[href*="/news/"], a[href*="/market/"], a[href*="/stock/"]',
-        #         'title': 'h1.entry-title, h1.post-title',
-        #         'content': '.entry-content, .post-content',
-        #         'excerpt': '.entry-excerpt, .post-excerpt',
-        #         'author': '.author-name, .entry-author',
-        #         'published_date': '.entry-date, .post-date',
-        #         'image': '.entry-thumbnail img, .post-thumbnail img'
-        #     }
-        # },
-        # 'stockbiz.vn': {
-        #     'id': 5,
-        #     'name': 'StockBiz',
-        #     'article_selectors': {
-        #         'links': 'a[href*="/news/"], a[href*="/analysis/"], a[href*="/market/"]',
-        #         'title': 'h1.post-title, h1.entry-title',
-        #         'content': '.post-content, .entry-content',
-        #         'excerpt': '.post-excerpt, .entry-excerpt',
-        #         'author': '.post-author, .entry-author',
-        #         'published_date': '.post-date, .entry-date',
-        #         'image': '.post-thumbnail img, .entry-thumbnail img'
-        #     }
-        # }
-    }
+    def configure_sites(self, site_configs):
+        """Use the validated site configs loaded for this crawl"""
+        self.site_configs = site_configs
+        if not self.start_urls:
+            self.start_urls = [url for config in site_configs.values() for url in config.get('start_urls', [])]
+        if not self.allowed_domains:
+            self.allowed_domains = list(site_configs)
+        if self.only_sites:
+            self.start_urls = [url for url in self.start_urls if urlparse(url).netloc in self.only_sites]
+        # Article selectors of every site, compiled once
+        self.extractors = {
+            domain: SiteExtractor(config['article_selectors'])
+            for domain, config in site_configs.items()
+        }
+        
+        versions = ', '.join(f"{domain} v{config.get('version', 0)}" for domain, config in site_configs.items())
+        self.logger.info(f"📋 Configured domains: {versions}")
+        self.logger.info(f"🔗 Start URLs: {len(self.start_urls)} URLs to process")
 
     def start_requests(self):
         """Generate initial requests with site registration"""
+        if self.discovery_mode == 'sitemap':
+            yield from self.sitemap_start_requests()
+            return
+
         self.logger.info(f"🌐 Generating start requests for {len(self.start_urls)} URLs")
         
         for idx, url in enumerate(self.start_urls, 1):
@@ -118,7 +115,7 @@ class FinancialNewsSpider(scrapy.Spider):
                 yield scrapy.Request(
                     url=url,
                     callback=self.register_site,
-                    meta={'domain': domain},
+                    meta={'domain': domain, 'dont_revalidate': True},
                     dont_filter=True
                 )
             else:
@@ -126,6 +123,13 @@ class FinancialNewsSpider(scrapy.Spider):
 
     def register_site(self, response):
         """Register site information in database"""
+        yield self.build_site_item(response)
+        
+        # Now crawl articles from this site
+        yield from self.parse(response)
+
+    def build_site_item(self, response):
+        """Create the SiteItem for the site of `response`"""
         domain = response.meta['domain']
         config = self.site_configs[domain]
         
@@ -140,10 +144,184 @@ class FinancialNewsSpider(scrapy.Spider):
         self.sites_processed += 1
         self.logger.info(f"✅ Site registered successfully: {config['name']}")
         
-        yield site_loader.load_item()
+        return site_loader.load_item()
+
+    def load_discovery_since(self):
+        """Cut-off time per domain for lastmod filtering, from the last successful crawl"""
+        max_age_days = self.settings.getint('DISCOVERY_MAX_AGE_DAYS', 3)
+        last_success = {}
+        try:
+            self.crawl_state = discovery.CrawlStateStore(connect(self.settings))
+            last_success = self.crawl_state.load(self.discovery_mode)
+        except Exception as e:
+            self.logger.error(f"❌ Could not load crawl state, using the last {max_age_days} days: {e}")
+            self.crawl_state = None
+        
+        domains = [urlparse(url).netloc for url in self.start_urls]
+        for domain in [d for d in domains if d in self.site_configs]:
+            since = discovery.effective_since(last_success.get(domain), max_age_days)
+            self.discovery_since[domain] = since
+            self.logger.info(f"🕒 {domain}: enqueueing entries modified after {since or 'any time'}")
+
+    def sitemap_start_requests(self):
+        """Start from each site's sitemaps and feeds instead of its homepage"""
+        self.load_discovery_since()
         
-        # Now crawl articles from this site
-        yield from self.parse(response)
+        for url in self.start_urls:
+            domain = urlparse(url).netloc
+            if domain not in self.site_configs:
+                self.logger.warning(f"⚠️  Domain {domain} not found in site_configs, skipping")
+                continue
+            
+            config = self.site_configs[domain].get('discovery', {})
+            # Listings are always fetched in full: a 304 would drop the
+            # entries whose articles failed last time along with the rest
+            meta = {'domain': domain, 'register_site': True, 'dont_revalidate': True}
+            for feed_url in config.get('feeds', []):
+                yield scrapy.Request(feed_url, callback=self.parse_feed, meta=dict(meta), dont_filter=True)
+                meta['register_site'] = False
+            
+            if config.get('sitemaps'):
+                for sitemap_url in config['sitemaps']:
+                    yield scrapy.Request(sitemap_url, callback=self.parse_sitemap, meta=dict(meta), dont_filter=True)
+                    meta['register_site'] = False
+            else:
+                yield scrapy.Request(
+                    urljoin(url, '/robots.txt'),
+                    callback=self.parse_robots,
+                    errback=self.robots_failed,
+                    meta=meta,
+                    dont_filter=True
+                )
+
+    def _default_sitemap_request(self, domain, meta):
+        return scrapy.Request(f"https://{domain}/sitemap.xml", callback=self.parse_sitemap, meta=meta, dont_filter=True)
+
+    def parse_robots(self, response):
+        """Follow the sitemaps listed in robots.txt"""
+        domain = response.meta['domain']
+        meta = {'domain': domain, 'register_site': response.meta.get('register_site', False), 'dont_revalidate': True}
+        sitemap_urls = list(sitemap_urls_from_robots(response.text, base_url=response.url))
+        self.logger.info(f"🤖 robots.txt of {domain} lists {len(sitemap_urls)} sitemaps")
+        
+        if not sitemap_urls:
+            yield self._default_sitemap_request(domain, meta)
+            return
+        for sitemap_url in sitemap_urls:
+            yield scrapy.Request(sitemap_url, callback=self.parse_sitemap, meta=dict(meta), dont_filter=True)
+            meta['register_site'] = False
+
+    def robots_failed(self, failure):
+        domain = failure.request.meta['domain']
+        self.logger.warning(f"⚠️  No robots.txt for {domain}, trying /sitemap.xml")
+        yield self._default_sitemap_request(domain, dict(failure.request.meta))
+
+    def _discovered_articles(self, response, entries):
+        """Article requests for the entries modified since the last successful crawl"""
+        domain = response.meta['domain']
+        config = self.site_configs[domain]
+        since = self.discovery_since.get(domain)
+        stats = self.crawler.stats
+        
+        enqueued = 0
+        for url, lastmod in entries:
+            stats.inc_value('discovery/urls_found')
+            full_url = urljoin(response.url, url)
+            if not self.is_article_url(full_url, domain):
+                continue
+            if not discovery.is_modified_since(lastmod, since):
+                stats.inc_value('discovery/urls_not_modified')
+                continue
+            enqueued += 1
+            stats.inc_value('discovery/urls_enqueued')
+            yield scrapy.Request(
+                full_url,
+                callback=self.parse_article,
+                errback=self.discovered_article_failed,
+                meta={
+                    'domain': domain,
+                    'site_id': config['id'],
+                    'article': True,
+                    # Known to have changed since the last crawl, fetch it even if seen before
+                    'refetch': since is not None and lastmod is not None
+                }
+            )
+        self.logger.info(f"✅ Queued {enqueued} new or changed articles from {response.url}")
+
+    def discovered_article_failed(self, failure):
+        """A discovered article was dropped (request budget, download error, ...)"""
+        domain = failure.request.meta['domain']
+        if failure.check(NotModified):
+            # Fetched, and unchanged since it was last saved
+            self.crawler.stats.inc_value('discovery/urls_unchanged')
+            return
+        if failure.check(HttpError) and failure.value.response.status in (404, 410):
+            # Removed since the sitemap was written, fetching it again will not help
+            self.crawler.stats.inc_value('discovery/urls_gone')
+            return
+        self.incomplete_domains.add(domain)
+        self.crawler.stats.inc_value('discovery/urls_failed')
+        self.logger.warning(f"⚠️  Discovered article not fetched: {failure.request.url} ({failure.value!r})")
+
+    def completed_discovery_domains(self, reason):
+        """Sites whose discovered entries were all fetched, so their cut-off may move
+
+        A crawl that ran out of a site's request budget, lost a discovered
+        article or left rows unfinished in a shared frontier still closes as
+        'finished', but moving the cut-off would skip those entries for good.
+        """
+        if reason != 'finished':
+            return []
+        stats = self.crawler.stats
+        if stats.get_value('frontier/unfinished', 0):
+            self.logger.info(
+                f"🕒 {stats.get_value('frontier/unfinished')} frontier requests unfinished, "
+                f"keeping the {self.discovery_mode} cut-off"
+            )
+            return []
+        completed = []
+        for domain in self.discovery_since:
+            if stats.get_value(f'site_profile/{domain}/budget_exhausted'):
+                self.logger.info(f"🕒 {domain}: request budget exhausted, keeping the cut-off")
+            elif domain in self.incomplete_domains:
+                self.logger.info(f"🕒 {domain}: discovered articles not fetched, keeping the cut-off")
+            else:
+                completed.append(domain)
+        return completed
+
+    def parse_sitemap(self, response):
+        """Parse a sitemap index or (news) sitemap"""
+        if response.meta.get('register_site'):
+            yield self.build_site_item(response)
+        
+        body = gunzip(response.body, max_size=self.settings.getint('DOWNLOAD_MAXSIZE')) \
+            if gzip_magic_number(response) else response.body
+        kind, entries = discovery.parse_sitemap(body)
+        self.crawler.stats.inc_value('discovery/sitemaps')
+        self.logger.info(f"🗺️  {kind or 'Unreadable sitemap'} with {len(entries)} entries: {response.url}")
+        
+        if kind == 'sitemapindex':
+            since = self.discovery_since.get(response.meta['domain'])
+            for loc, lastmod in entries:
+                if discovery.is_modified_since(lastmod, since):
+                    yield response.follow(
+                        loc, callback=self.parse_sitemap,
+                        meta={'domain': response.meta['domain'], 'dont_revalidate': True}
+                    )
+                else:
+                    self.crawler.stats.inc_value('discovery/sitemaps_not_modified')
+        elif kind == 'urlset':
+            yield from self._discovered_articles(response, entries)
+
+    def parse_feed(self, response):
+        """Parse an RSS or Atom feed"""
+        if response.meta.get('register_site'):
+            yield self.build_site_item(response)
+        
+        entries = discovery.parse_feed(response.body)
+        self.crawler.stats.inc_value('discovery/feeds')
+        self.logger.info(f"📡 Feed with {len(entries)} entries: {response.url}")
+        yield from self._discovered_articles(response, entries)
 
     def parse(self, response):
         """Parse homepage and extract article links"""
@@ -153,25 +331,27 @@ class FinancialNewsSpider(scrapy.Spider):
             return
             
         config = self.site_configs[domain]
-        selectors = config['article_selectors']
+        extractor = self.extractors[domain]
+        root = response.selector.root
         
         self.logger.info(f"🔍 Parsing homepage for {domain}: {response.url}")
         
         # Extract article links
-        article_links = response.css(selectors['links'])
-        self.logger.info(f"📰 Found {len(article_links)} article links using selector: {selectors['links']}")
+        article_links = extractor.links(root)
+        self.logger.info(f"📰 Found {len(article_links)} article links using selector: {config['article_selectors']['links']}")
         
-        # If no specific selectors work, try generic article link patterns
+        # If no specific selectors work, take the headline links outside the page chrome
         if not article_links:
-            self.logger.warning(f"⚠️  No articles found with specific selectors, trying generic patterns...")
-            article_links = response.css('a[href*="/"]')
-            self.logger.info(f"📰 Found {len(article_links)} generic links")
+            self.logger.warning(f"⚠️  No articles found with specific selectors, trying headline links...")
+            article_links = main_content.article_links(root)
+            self.crawler.stats.inc_value('extraction/links_fallback')
+            self.logger.info(f"📰 Found {len(article_links)} headline links")
         
         processed_urls = set()
         valid_articles = 0
         
-        for link in article_links:  # Limit to 20 articles per site
-            url = link.css('::attr(href)').get()
+        for url in article_links:
+            url = url.strip()
             if not url:
                 continue
                 
@@ -179,7 +359,7 @@ class FinancialNewsSpider(scrapy.Spider):
             full_url = urljoin(response.url, url)
             
             # Check if URL looks like an article URL
-            if self.is_article_url(full_url, domain) and full_url not in processed_urls:
+            if full_url not in processed_urls and self.is_article_url(full_url, domain):
                 processed_urls.add(full_url)
                 valid_articles += 1
                 self.logger.debug(f"📄 [{valid_articles}] Queueing article: {full_url}")
@@ -188,7 +368,8 @@ class FinancialNewsSpider(scrapy.Spider):
                     callback=self.parse_article,
                     meta={
                         'domain': domain,
-                        'site_id': config['id']
+                        'site_id': config['id'],
+                        'article': True
                     }
                 )
         
@@ -212,33 +393,77 @@ class FinancialNewsSpider(scrapy.Spider):
                 break
 
     def is_article_url(self, url, domain):
-        """Check if URL looks like an article URL"""
-        # Keywords that indicate article URLs
-        # article_keywords = [
-        #     'news', 'bai-viet', 'tin-tuc', 'article', 'detail',
-        #     'chung-khoan', 'tai-chinh', 'kinh-te', 'doanh-nghiep',
-        #     'market', 'stock', 'finance', 'economy', 'business'
-        # ]
-        
-        # # Exclude URLs that are likely not articles
-        # exclude_keywords = [
-        #     'tag', 'category', 'author', 'search', 'page',
-        #     'login', 'register', 'contact', 'about',
-        #     '.jpg', '.png', '.gif', '.pdf', '.doc'
-        # ]
-        
-        # url_lower = url.lower()
-        
-        # # Check for exclude keywords first
-        # if any(keyword in url_lower for keyword in exclude_keywords):
-        #     return False
-            
-        # # Check for article keywords or date patterns
-        # has_article_keyword = any(keyword in url_lower for keyword in article_keywords)
-        # has_date_pattern = re.search(r'/\d{4}/', url) or re.search(r'/\d{6}/', url)
-        
-        return True
-    def parse_article(self, response):
+        """Check if URL looks like an article URL, using the site's compiled classifier"""
+        classifier = self.url_classifiers.get(domain)
+        if classifier is None:
+            classifier = self.url_classifiers[domain] = UrlClassifier(
+                self.site_configs.get(domain, {}).get('url_patterns')
+            )
+        
+        is_article = classifier.is_article(urldefrag(url).url)
+        self.crawler.stats.inc_value(f"url_classifier/{domain}/{'accepted' if is_article else 'rejected'}")
+        if not is_article:
+            self.logger.debug(f"🚫 Not an article URL: {url}")
+        return is_article
+
+    def log_classifier_precision(self):
+        """Share of fetched article URLs that really were articles, per site"""
+        stats = self.crawler.stats
+        for domain in self.url_classifiers:
+            articles = stats.get_value(f"url_classifier/{domain}/articles", 0)
+            non_articles = stats.get_value(f"url_classifier/{domain}/non_articles", 0)
+            if articles + non_articles == 0:
+                continue
+            precision = articles / (articles + non_articles)
+            stats.set_value(f"url_classifier/{domain}/precision", round(precision, 3))
+            self.logger.info(
+                f"🎯 URL classifier for {domain}: "
+                f"{stats.get_value(f'url_classifier/{domain}/accepted', 0)} accepted, "
+                f"{stats.get_value(f'url_classifier/{domain}/rejected', 0)} rejected, "
+                f"precision {precision:.1%}"
+            )
+
+    def count_structured_fields(self, fields):
+        """Count the article fields taken from JSON-LD / OpenGraph and from selectors"""
+        stats = self.crawler.stats
+        structured = fields.get('structured_fields', ())
+        for name in STRUCTURED_FIELDS:
+            if not fields.get(name):
+                continue
+            if name in structured:
+                stats.inc_value('structured_data/fields')
+                stats.inc_value(f'structured_data/{name}')
+            else:
+                stats.inc_value('structured_data/selector_fields')
+
+    def log_structured_data_share(self):
+        """Share of the extracted article fields served from structured data"""
+        stats = self.crawler.stats
+        structured = stats.get_value('structured_data/fields', 0)
+        total = structured + stats.get_value('structured_data/selector_fields', 0)
+        if total == 0:
+            return
+        stats.set_value('structured_data/share', round(structured / total, 3))
+        self.logger.info(f"🧩 Structured data: {structured} of {total} article fields ({structured / total:.1%})")
+
+    async def extract_fields(self, response, domain):
+        """Article fields of `response`, extracted in the pool when there is one"""
+        if self.extraction_pool is not None:
+            selectors = self.site_configs[domain]['article_selectors']
+            try:
+                # The reactor keeps downloading and running pipelines meanwhile
+                fields = await asyncio.wrap_future(self.extraction_pool.submit(
+                    extract_article, selectors, response.url, response.body, response.encoding
+                ))
+                self.crawler.stats.inc_value('extraction_pool/articles')
+                return fields
+            except BrokenProcessPool:
+                self.logger.error("❌ Extraction pool worker died, starting a new pool")
+                self.crawler.stats.inc_value('extraction_pool/broken')
+                self.extraction_pool = ProcessPoolExecutor(self.extraction_pool_size)
+        return self.extractors[domain].extract(response.selector.root)
+
+    async def parse_article(self, response):
         """Parse individual article page"""
         domain = response.meta['domain']
         site_id = response.meta['site_id']
@@ -246,163 +471,122 @@ class FinancialNewsSpider(scrapy.Spider):
         if domain not in self.site_configs:
             self.logger.error(f"❌ Domain {domain} not found in site_configs for article: {response.url}")
             return
-            
-        config = self.site_configs[domain]
-        selectors = config['article_selectors']
         
         self.logger.debug(f"📖 Parsing article: {response.url}")
+        fields = await self.extract_fields(response, domain)
         
-        # Create item loader
-        loader = ItemLoader(item=PostItem(), response=response)
+        # Create item loader (without the response, which would parse it)
+        loader = ItemLoader(item=PostItem())
         loader.add_value('url', response.url)
         loader.add_value('scraped_at', datetime.now())
         
-        # Extract title
-        title_selectors = selectors['title'].split(', ')
-        title = None
-        for selector in title_selectors:
-            title = response.css(f'{selector}::text').get()
-            if title:
-                self.logger.debug(f"✅ Title found with selector '{selector}': {title[:50]}...")
-                break
-        
-        if not title:
-            # Fallback to meta title or h1
-            title = (response.css('title::text').get() or 
-                    response.css('h1::text').get() or 
-                    response.css('meta[property="og:title"]::attr(content)').get())
-            if title:
-                self.logger.debug(f"✅ Title found with fallback method: {title[:50]}...")
-        
+        # Title from JSON-LD / OpenGraph, else the selector, <title> and <h1>
+        title = fields['title']
         if title:
-            loader.add_value('title', title.strip())
+            self.logger.debug(f"✅ Title found: {title[:50]}...")
+            loader.add_value('title', title)
         else:
             # Skip articles without titles
             self.logger.warning(f"⚠️  No title found for article: {response.url}")
             self.failed_articles += 1
+            self.crawler.stats.inc_value(f"url_classifier/{domain}/non_articles")
             return
+        self.count_structured_fields(fields)
         
-        # Extract content using BeautifulSoup for better HTML parsing
-        content_selectors = selectors['content'].split(',')
-        soup = BeautifulSoup(response.body, "html.parser")
-        content = None
-        
-        for selector in content_selectors:
-            html_content = soup.select_one(selector.strip())
-            self.logger.debug(f"🔍 Trying content selector: {selector.strip()}")
-            if html_content:
-                # Get all text, preserving paragraphs
-                content = '\n'.join(p.get_text(strip=True) for p in soup.find_all(['p', 'li']) if p.get_text(strip=True))
-                # Fallback: if no <p> or <li>, get all text
-                if not content.strip():
-                    content = soup.get_text(separator='\n', strip=True)
-                if content.strip():
-                    self.logger.debug(f"✅ Content found: {len(content)} characters")
-                    break
-
+        # Extract content from the matched node of the parsed page
+        content = fields['content']
         if content:
+            self.logger.debug(f"✅ Content found: {len(content)} characters")
             loader.add_value('content', content)
+            if fields['content_fallback']:
+                self.logger.debug("🧮 Content taken from the text density fallback")
+                self.crawler.stats.inc_value('extraction/content_fallback')
         else:
             self.logger.warning(f"⚠️  No content found for article: {response.url}")
         
         # Extract excerpt/sapo
-        excerpt_selectors = selectors['excerpt'].split(', ')
-        for selector in excerpt_selectors:
-            excerpt = response.css(f'{selector}::text').get()
-            if excerpt:
-                loader.add_value('excerpt', excerpt.strip())
-                self.logger.debug(f"✅ Excerpt found with selector '{selector}'")
-                break
+        excerpt = fields['excerpt']
+        if excerpt:
+            loader.add_value('excerpt', excerpt)
+            self.logger.debug("✅ Excerpt found")
         
         # Extract author
-        author_selectors = selectors['author'].split(', ')
-        for selector in author_selectors:
-            author = response.css(f'{selector}::text').get()
-            if author:
-                loader.add_value('author', author.strip())
-                self.logger.debug(f"✅ Author found: {author.strip()}")
-                break
+        author = fields['author']
+        if author:
+            loader.add_value('author', author)
+            self.logger.debug(f"✅ Author found: {author}")
         
         # Extract published date
-        date_selectors = selectors['published_date'].split(', ')
-        for selector in date_selectors:
-            date_text = (response.css(f'{selector}::text').get() or 
-                        response.css(f'{selector}::attr(datetime)').get())
-            if date_text:
-                parsed_date = self.parse_date(date_text.strip())
-                if parsed_date:
-                    loader.add_value('published_date', parsed_date)
-                    self.logger.debug(f"✅ Published date found: {parsed_date}")
-                    break
+        date_text = fields['date_text']
+        if date_text:
+            parsed_date = self.parse_date(date_text)
+            if parsed_date:
+                loader.add_value('published_date', parsed_date)
+                self.logger.debug(f"✅ Published date found: {parsed_date}")
         
         # Extract image
-        image_selectors = selectors['image'].split(', ')
-        for selector in image_selectors:
-            image_url = response.css(f'{selector}::attr(src)').get()
-            if image_url:
-                full_image_url = urljoin(response.url, image_url)
-                loader.add_value('image_url', full_image_url)
-                self.logger.debug(f"✅ Image found: {full_image_url}")
-                break
-        
-        # Extract tags (try meta keywords or category links)
-        tags = []
-        
-        # Try meta keywords
-        meta_keywords = response.css('meta[name="keywords"]::attr(content)').get()
-        if meta_keywords:
-            tags.extend([tag.strip() for tag in meta_keywords.split(',')])
-        
-        # Try category/tag links
-        tag_links = response.css('.tags a::text, .categories a::text, .tag a::text').getall()
-        if tag_links:
-            tags.extend([tag.strip() for tag in tag_links])
-        
+        image_url = fields['image_url']
+        if image_url:
+            full_image_url = urljoin(response.url, image_url)
+            loader.add_value('image_url', full_image_url)
+            self.logger.debug(f"✅ Image found: {full_image_url}")
+        
+        # Extract tags (meta keywords, then category/tag links)
+        tags = fields['tags']
         if tags:
-            loader.add_value('tags', tags[:10])  # Limit to 10 tags
+            loader.add_value('tags', tags)
             self.logger.debug(f"✅ Tags found: {', '.join(tags[:5])}{'...' if len(tags) > 5 else ''}")
         
         # Load the item and set site_id directly (not through loader to avoid array conversion)
         item = loader.load_item()
         item['site_id'] = site_id
+        item['published_date_relative'] = dates.is_relative(date_text)
         
         self.scraped_articles += 1
+        self.crawler.stats.inc_value(f"url_classifier/{domain}/articles")
         self.logger.info(f"✅ [{self.scraped_articles}] Article scraped successfully: {title[:50]}...")
         
         yield item
 
     def parse_date(self, date_string):
-        """Parse date string into datetime object"""
-        # Common Vietnamese date patterns
-        date_patterns = [
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',  # YYYY-MM-DD
-            r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, date_string)
-            if match:
-                try:
-                    if pattern == date_patterns[1]:  # YYYY-MM-DD
-                        year, month, day = map(int, match.groups())
-                    else:  # DD/MM/YYYY or DD-MM-YYYY
-                        day, month, year = map(int, match.groups())
-                    
-                    return datetime(year, month, day)
-                except (ValueError, TypeError):
-                    continue
-        
-        # Try to parse ISO format
-        try:
-            return datetime.fromisoformat(date_string.replace('Z', '+00:00'))
-        except:
-            pass
-        
-        return None
+        """Parse date string into a timezone-aware datetime (Vietnam time unless stated)"""
+        return dates.parse_date(date_string)
+
+    def checkpoint_state(self):
+        """Counters saved by CheckpointExtension for crawl --resume"""
+        return {
+            'discovery': self.discovery_mode,
+            'started_at': self.started_at,
+            'scraped_articles': self.scraped_articles,
+            'failed_articles': self.failed_articles,
+        }
+
+    def restore_checkpoint(self, checkpoint):
+        """Continue the counters and start time of an interrupted crawl"""
+        self.scraped_articles += checkpoint['scraped_articles']
+        self.failed_articles += checkpoint['failed_articles']
+        # Sitemap entries modified since the original start must not be skipped
+        self.started_at = min(self.started_at, checkpoint['started_at'])
 
     def closed(self, reason):
         """Log final statistics when spider closes"""
+        self.log_classifier_precision()
+        self.log_structured_data_share()
+        if self.extraction_pool is not None:
+            self.extraction_pool.shutdown(wait=False, cancel_futures=True)
+        if self.crawl_state is not None:
+            completed = self.completed_discovery_domains(reason)
+            if completed:
+                try:
+                    self.crawl_state.mark_success(completed, self.discovery_mode, self.started_at)
+                    self.logger.info(
+                        f"🕒 Recorded successful {self.discovery_mode} crawl at {self.started_at} "
+                        f"for {', '.join(completed)}"
+                    )
+                except Exception as e:
+                    self.logger.error(f"❌ Error saving crawl state: {e}")
+            self.crawl_state.connection.close()
+        
         end_time = datetime.now()
         duration = end_time - self.start_time
         
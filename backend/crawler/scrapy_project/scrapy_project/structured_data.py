@@ -0,0 +1,143 @@
+"""
+Article metadata from JSON-LD and OpenGraph
+
+Most news sites describe the article in the page head: a schema.org
+NewsArticle in a <script type="application/ld+json"> block, and OpenGraph
+<meta property="og:..."> / article:... tags. article_metadata() reads both
+in one pass over the parsed tree:
+
+    field       JSON-LD                     then meta tags
+    title       headline, name              og:title
+    excerpt     description                 og:description, description
+    author      author(.name), creator      article:author, author
+    date_text   datePublished, dateCreated  article:published_time
+    image_url   image(.url), thumbnailUrl   og:image
+    tags        keywords                    article:tag
+
+and returns the fields it found; SiteExtractor runs the site's selectors
+only for the others. JSON-LD nodes may be lists, @graph containers or typed
+with several @types; the first node typed as an article is used. Blocks
+that are not valid JSON are skipped.
+"""
+
+import html
+import json
+
+from lxml import etree
+
+STRUCTURED_FIELDS = ('title', 'excerpt', 'author', 'date_text', 'image_url', 'tags')
+
+ARTICLE_TYPES = frozenset({
+    'Article', 'NewsArticle', 'ReportageNewsArticle', 'AnalysisNewsArticle',
+    'OpinionNewsArticle', 'BackgroundNewsArticle', 'BlogPosting', 'LiveBlogPosting',
+})
+
+_JSON_LD = etree.XPath('//script[@type="application/ld+json"]/text()')
+_META = etree.XPath('//meta[@content]')
+
+# Meta tags per field, best first
+_META_FIELDS = {
+    'title': ('og:title', 'twitter:title'),
+    'excerpt': ('og:description', 'description', 'twitter:description'),
+    'author': ('article:author', 'author'),
+    'date_text': ('article:published_time', 'pubdate', 'datepublished'),
+    'image_url': ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image'),
+}
+
+
+def _clean(value):
+    if not isinstance(value, str):
+        return None
+    return ' '.join(html.unescape(value).split()) or None
+
+
+def _name(value):
+    """Text of a string, or of the name of a Person / Organization / ImageObject"""
+    if isinstance(value, dict):
+        value = value.get('name')
+    return _clean(value)
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _nodes(data):
+    """Every JSON-LD node in a parsed block, walking lists and @graph"""
+    if isinstance(data, list):
+        for entry in data:
+            yield from _nodes(entry)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from _nodes(data['@graph'])
+
+
+def _is_article(node):
+    types = node.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(kind in ARTICLE_TYPES for kind in types if isinstance(kind, str))
+
+
+def json_ld_article(root):
+    """The first JSON-LD node typed as an article, or None"""
+    for text in _JSON_LD(root):
+        try:
+            data = json.loads(text, strict=False)
+        except ValueError:
+            continue
+        for node in _nodes(data):
+            if _is_article(node):
+                return node
+    return None
+
+
+def _from_json_ld(node):
+    authors = node.get('author') or node.get('creator')
+    authors = authors if isinstance(authors, list) else [authors]
+    image = _first(node.get('image') or node.get('thumbnailUrl'))
+    if isinstance(image, dict):
+        image = image.get('url') or image.get('contentUrl')
+    keywords = node.get('keywords')
+    if isinstance(keywords, str):
+        keywords = keywords.split(',')
+    return {
+        'title': _clean(node.get('headline')) or _clean(node.get('name')),
+        'excerpt': _clean(node.get('description')),
+        'author': ', '.join(filter(None, map(_name, authors))) or None,
+        'date_text': _clean(_first(node.get('datePublished') or node.get('dateCreated'))),
+        'image_url': _clean(image),
+        'tags': [tag for tag in map(_clean, keywords) if tag] if isinstance(keywords, list) else None,
+    }
+
+
+def _from_meta(root):
+    values = {}
+    for meta in _META(root):
+        key = (meta.get('property') or meta.get('name') or meta.get('itemprop') or '').lower()
+        if key:
+            values.setdefault(key, []).append(meta.get('content'))
+    fields = {}
+    for field, keys in _META_FIELDS.items():
+        for key in keys:
+            value = _clean(_first(values.get(key)))
+            # article:author is often the author's profile URL, not a name
+            if value and not (field == 'author' and value.startswith(('http://', 'https://'))):
+                fields[field] = value
+                break
+    tags = [tag for tag in map(_clean, values.get('article:tag', ())) if tag]
+    if tags:
+        fields['tags'] = tags
+    return fields
+
+
+def article_metadata(root, limit_tags=10):
+    """The STRUCTURED_FIELDS found in the page's JSON-LD and meta tags"""
+    node = json_ld_article(root)
+    fields = {name: value for name, value in _from_json_ld(node).items() if value} if node else {}
+    if len(fields) < len(STRUCTURED_FIELDS):
+        for name, value in _from_meta(root).items():
+            fields.setdefault(name, value)
+    if 'tags' in fields:
+        fields['tags'] = fields['tags'][:limit_tags]
+    return fields
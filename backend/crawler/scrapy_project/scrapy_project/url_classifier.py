@@ -0,0 +1,64 @@
+"""
+Per-site article URL classifier
+
+Each site's deny, allow and article patterns are combined into a single
+compiled regular expression, so classifying a link is one regex search:
+
+    ^(?!.*(?:deny...))(?=.*(?:allow...)).*(?:article...)
+
+A site config can extend the defaults with
+
+    'url_patterns': {
+        'deny': [r'/video/'],          # never an article
+        'allow': [r'^https://cafef\\.vn/'],  # must match one of these (optional)
+        'article': [r'-\\d{6,}\\.chn$'],      # looks like an article
+    }
+"""
+
+import re
+
+# Navigation, listing, account and media links
+DEFAULT_DENY_PATTERNS = [
+    r'/(?:tag|tags|tim-kiem|search|author|tac-gia|category|chuyen-muc|page|trang)(?:/|-\d|\.htm|$)',
+    r'/(?:login|dang-nhap|register|dang-ky|contact|lien-he|about|gioi-thieu)(?:/|\.htm|$)',
+    r'[?&](?:page|p)=\d',
+    r'\.(?:jpe?g|png|gif|webp|svg|pdf|docx?|xlsx?|zip|mp3|mp4)(?:[?#]|$)',
+    r'^(?:mailto|javascript|tel):',
+]
+
+# What article URLs of Vietnamese news sites look like: a date in the path,
+# a long numeric id, or a slug of at least four words
+DEFAULT_ARTICLE_PATTERNS = [
+    r'/20\d{2}/(?:0?[1-9]|1[0-2])/',
+    r'/20\d{2}(?:0[1-9]|1[0-2])\d{2}/',
+    r'-\d{5,}(?:\.\w{2,5})?/?$',
+    r'/[a-z0-9]+(?:-[a-z0-9]+){3,}(?:\.html?|\.chn|\.aspx)?/?$',
+]
+
+
+def _alternation(patterns):
+    return '|'.join(f'(?:{pattern})' for pattern in patterns)
+
+
+def build_pattern(url_patterns=None):
+    """Combine default and site patterns into one compiled regex"""
+    url_patterns = url_patterns or {}
+    deny = DEFAULT_DENY_PATTERNS + list(url_patterns.get('deny', []))
+    allow = list(url_patterns.get('allow', []))
+    article = list(url_patterns.get('article', [])) + DEFAULT_ARTICLE_PATTERNS
+
+    pattern = f'^(?!.*(?:{_alternation(deny)}))'
+    if allow:
+        pattern += f'(?=.*(?:{_alternation(allow)}))'
+    pattern += f'.*(?:{_alternation(article)})'
+    return re.compile(pattern, re.IGNORECASE)
+
+
+class UrlClassifier:
+    """Decides whether a URL of one site is worth fetching as an article"""
+
+    def __init__(self, url_patterns=None):
+        self.pattern = build_pattern(url_patterns)
+
+    def is_article(self, url):
+        return self.pattern.search(url) is not None
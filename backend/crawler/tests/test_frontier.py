@@ -0,0 +1,151 @@
+"""
+PostgresFrontierScheduler bookkeeping against an in-memory crawl_frontier
+Run with: pytest tests/test_frontier.py
+
+FakeConnection stands in for psycopg2 and keeps the crawl_frontier rows in
+a dict, applying the scheduler's statements in the order they are sent, so
+the outcome of one flush() is the one Postgres would give.
+"""
+
+import os
+import sys
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CRAWLER_DIR, 'scrapy_project'))
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.utils.test import get_crawler
+
+from scrapy_project import frontier
+from scrapy_project.frontier import FrontierStatus, PostgresFrontierScheduler
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        if sql.startswith('CREATE'):
+            return
+        if sql.startswith('UPDATE crawl_frontier SET status = %s'):
+            status, frontier_ids = params
+            for frontier_id in frontier_ids:
+                self.rows[frontier_id]['status'] = status
+            self.rowcount = len(frontier_ids)
+            return
+        raise AssertionError(f"Unexpected statement: {sql}")
+
+    def insert(self, sql, values, fetch=False):
+        """execute_values() of the INSERT ... ON CONFLICT statements"""
+        inserted = []
+        for crawl_id, fingerprint, url, priority, request in values:
+            row = next(
+                (row for row in self.rows.values()
+                 if row['crawl_id'] == crawl_id and row['fingerprint'] == fingerprint),
+                None,
+            )
+            if row is None:
+                frontier_id = len(self.rows) + 1
+                self.rows[frontier_id] = {
+                    'crawl_id': crawl_id, 'fingerprint': fingerprint, 'url': url,
+                    'priority': priority, 'request': request, 'status': FrontierStatus.PENDING,
+                }
+                inserted.append((frontier_id,))
+            elif 'DO UPDATE' in sql:
+                row.update(request=request, priority=priority, status=FrontierStatus.PENDING)
+        return inserted if fetch else None
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rows = {}
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(frontier, 'connect', lambda settings: connection)
+    monkeypatch.setattr(
+        frontier, 'execute_values',
+        lambda cursor, sql, values, fetch=False: cursor.insert(sql, values, fetch),
+    )
+    return connection
+
+
+@pytest.fixture
+def scheduler(connection):
+    crawler = get_crawler(Spider, {'FRONTIER_CRAWL_ID': 'test', 'FRONTIER_BATCH_SIZE': 100})
+    crawler.stats.open_spider(None)
+    scheduler = PostgresFrontierScheduler.from_crawler(crawler)
+    scheduler.open(Spider('test'))
+    return scheduler
+
+
+def lease(scheduler, request):
+    """Write `request` to the frontier and hand it to the engine"""
+    scheduler.enqueue_request(request)
+    scheduler.flush()
+    frontier_id, row = next(
+        (frontier_id, row) for frontier_id, row in scheduler.connection.rows.items()
+        if row['url'] == request.url
+    )
+    row['status'] = FrontierStatus.LEASED
+    request.meta['frontier_id'] = frontier_id
+    scheduler._in_flight[frontier_id] = request
+    return frontier_id
+
+
+def test_retry_after_leaving_downloader_stays_pending(scheduler, connection):
+    request = Request('https://example.com/article-1')
+    frontier_id = lease(scheduler, request)
+
+    # The download finished, then RetryMiddleware sent the request back
+    scheduler.request_left_downloader(request, scheduler.spider)
+    retry = request.replace(dont_filter=True)
+    retry.meta['retry_times'] = 1
+    scheduler.enqueue_request(retry)
+    scheduler.flush()
+
+    assert connection.rows[frontier_id]['status'] == FrontierStatus.PENDING
+    assert len(connection.rows) == 1
+
+
+def test_completed_request_is_done(scheduler, connection):
+    request = Request('https://example.com/article-1')
+    frontier_id = lease(scheduler, request)
+
+    scheduler.request_left_downloader(request, scheduler.spider)
+    scheduler.flush()
+
+    assert connection.rows[frontier_id]['status'] == FrontierStatus.DONE
+
+
+def test_duplicate_is_dropped(scheduler, connection):
+    assert scheduler.enqueue_request(Request('https://example.com/article-1'))
+    assert not scheduler.enqueue_request(Request('https://example.com/article-1'))
+    assert scheduler.enqueue_request(Request('https://example.com/article-1', dont_filter=True))
+    scheduler.flush()
+
+    assert len(connection.rows) == 1
+    assert scheduler.stats.get_value('scheduler/dropped') == 1
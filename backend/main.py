@@ -39,6 +39,11 @@ async def health_check():
 def on_startup():
     create_db_and_tables()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    from app.services.llm_clients import aclose_clients
+    await aclose_clients()
+
 if __name__ == "__main__":
     import uvicorn
     import sys
@@ -48,5 +53,10 @@ if __name__ == "__main__":
         from app.seeds.seeder import run_seeders
         print("Running database seeders...")
         run_seeders()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        # python main.py --worker [count], count defaults to AI_JOB_WORKERS
+        from app.workers.ai_job_worker import run_workers, AI_JOB_WORKERS
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else AI_JOB_WORKERS
+        run_workers(count)
     else:
         uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
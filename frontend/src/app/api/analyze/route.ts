@@ -1,6 +1,28 @@
 import { getToken } from "next-auth/jwt";
 import { type NextRequest } from 'next/server';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_POLL_TIMEOUT_MS = 120000;
+
+// analyze-and-save answers 202 with a job id, poll the job until the worker finishes it
+async function waitForJob(statusUrl: string, accessToken: string) {
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+        const jobResponse = await fetch(statusUrl, {
+            headers: { 'Authorization': `Bearer ${accessToken}` },
+        });
+        if (!jobResponse.ok) {
+            return null;
+        }
+        const job = await jobResponse.json();
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+    return null;
+}
+
 export async function POST(request: NextRequest) {
     const token = await getToken({ req: request, secret: process.env.NEXTAUTH_SECRET });
 
@@ -21,12 +43,17 @@ export async function POST(request: NextRequest) {
         body: JSON.stringify(payload),
     });
 
-    if (analyzeResponse.status !== 200) {
+    if (analyzeResponse.status !== 202) {
       // Return a 401 error for the client to handle
       return new Response(JSON.stringify({ error: "Token expired" }), { status: 401 });
     }
-    const data = await analyzeResponse.json();
+    const accepted = await analyzeResponse.json();
+    const job = await waitForJob(accepted.status_url, token.accessToken as string);
+
+    if (!job || job.status !== 'succeeded') {
+      return new Response(JSON.stringify({ error: job?.last_error ?? "Analysis timed out" }), { status: 502 });
+    }
 
-    return new Response(JSON.stringify(data), { status: 200 });
+    return new Response(JSON.stringify(job.result), { status: 200 });
 }
 
@@ -13,6 +13,7 @@ import {
 import { Textarea } from "@/components/ui/textarea";
 
 const BASE_URL_API = "http://localhost:8001";
+const JOB_POLL_INTERVAL_MS = 1000;
 
 export default function NewMedicationNotePage() {
   const [note, setNote] = useState("Hôm nay tôi uống paracetamol 500mg, và cảm thấy đỡ đau đầu hơn ");
@@ -42,8 +43,22 @@ export default function NewMedicationNotePage() {
         throw new Error('Failed to analyze note');
       }
 
-      const data = await response.json();
-      setResult(data);
+      // The backend queues the analysis and returns a job to poll
+      const accepted = await response.json();
+      let job = { status: accepted.status, result: null, last_error: null };
+      while (job.status === 'pending' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const jobResponse = await fetch(accepted.status_url);
+        if (!jobResponse.ok) {
+          throw new Error('Failed to fetch analysis job');
+        }
+        job = await jobResponse.json();
+      }
+
+      if (job.status !== 'succeeded') {
+        throw new Error(job.last_error ?? 'Failed to analyze note');
+      }
+      setResult(job.result);
     } catch (error) {
       console.error("Error analyzing note:", error);
       // TODO: Hiển thị thông báo lỗi cho người dùng